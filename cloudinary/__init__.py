@@ -1,9 +1,12 @@
 from __future__ import absolute_import
 
+import importlib
 import os
 import re
 import logging
 import numbers
+import sys
+import threading
 
 from math import ceil
 
@@ -11,10 +14,8 @@ from six import python_2_unicode_compatible, string_types
 
 
 logger = logging.getLogger("Cloudinary")
-ch = logging.StreamHandler()
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-ch.setFormatter(formatter)
-logger.addHandler(ch)
+# Applications configure where log records go
+logger.addHandler(logging.NullHandler())
 
 from cloudinary import utils
 from cloudinary.compat import urlparse, parse_qs
@@ -61,6 +62,9 @@ def get_user_agent():
 
 
 def import_django_settings():
+    if "django" not in sys.modules and not os.environ.get("DJANGO_SETTINGS_MODULE"):
+        # Not running in a Django process, so there are no settings to read and no need to import Django
+        return None
     try:
         from django.core.exceptions import ImproperlyConfigured
 
@@ -127,8 +131,8 @@ class Config(object):
             return None
 
     def update(self, **keywords):
-        for k, v in keywords.items():
-            self.__dict__[k] = v
+        # A single dict update, so other threads see either none or all of the new values
+        self.__dict__.update(keywords)
 
     def _is_nested_key(self, key):
         return re.match(r'\w+\[\w+\]', key)
@@ -150,22 +154,52 @@ class Config(object):
         outer[last_key] = value
 
 
-_config = Config()
+# Created on first use, so importing the package does not read the environment or the Django settings
+_config = None
+_config_lock = threading.Lock()
 
 
 def config(**keywords):
+    """
+    :return: the configuration of the current :func:`using` scope, or the global configuration outside of scopes,
+             updated with ``keywords``
+    :rtype: Config
+    """
     global _config
-    _config.update(**keywords)
-    return _config
+    result = current_config()
+    if result is not None:
+        if keywords:
+            result = update_current_config(**keywords)
+    else:
+        if _config is None:
+            with _config_lock:
+                if _config is None:
+                    _config = Config()
+        result = _config
+        if keywords:
+            # Reads leave the shared configuration untouched, so concurrent URL generation does not contend on it
+            result.update(**keywords)
+    if "profile_urls" in keywords:
+        from cloudinary import profiling
+        if keywords["profile_urls"]:
+            profiling.enable()
+        else:
+            profiling.disable()
+    return result
 
 
 def reset_config():
     global _config
-    _config = Config()
+    with _config_lock:
+        _config = None
 
 
 @python_2_unicode_compatible
 class CloudinaryResource(object):
+    # The __dict__ slot keeps arbitrary attributes working, it is only allocated when one is set
+    __slots__ = ("metadata", "public_id", "format", "version", "signature", "type", "resource_type", "url_options",
+                 "__dict__", "__weakref__")
+
     def __init__(self, public_id=None, format=None, version=None,
                  signature=None, url_options=None, metadata=None, type=None, resource_type=None,
                  default_resource_type=None):
@@ -279,14 +313,15 @@ class CloudinaryResource(object):
 
         return breakpoints
 
-    def __generate_single_srcset_url(self, breakpoint, **options):
+    @staticmethod
+    def __srcset_url_parts(breakpoint, **options):
         """
-        Helper function. Generates a single srcset item url.
+        Helper function. Generates the parts of a single srcset item url that do not depend on the public ID.
 
-        :param width:   Width in pixels of the srcset item
+        :param breakpoint: Width in pixels of the srcset item
         :param options: A dict with additional options
 
-        :return: Resulting URL of the item
+        :return: A tuple of the delivery type, the transformation string and the remaining options
         """
 
         # The following line is used for the next purposes:
@@ -307,29 +342,26 @@ class CloudinaryResource(object):
         for key in {"width", "height"}:
             options.pop(key, None)
 
-        return utils.cloudinary_url(self.public_id, **options)[0]
+        storage_type = options.pop("type", "upload")
+        if storage_type == 'fetch':
+            options["fetch_format"] = options.get("fetch_format", options.pop("format", None))
+        transformation, options = utils.generate_transformation_string(**options)
+        return storage_type, transformation, options
 
-    def __generate_image_srcset_attribute(self, srcset_data, **options):
+    def _srcset_templates(self, srcset_data, **options):
         """
-        Helper function. Generates srcset attribute value of the HTML img tag.
+        Generates the parts of the srcset items that are shared by all resources rendered with the same options.
 
-        :param srcset_data: A dictionary containing the following keys:
-                                breakpoints A list of breakpoints.
-                                min_width   Minimal width of the srcset images
-                                max_width   Maximal width of the srcset images.
-                                max_images  Number of srcset images to generate.
+        :param srcset_data: The srcset option, see :meth:`__get_srcset_breakpoints`
         :param options:     Additional options
 
-        :return:  Resulting srcset attribute value
+        :return: A list of (breakpoint, type, transformation, options) tuples, or None if srcset_data is not a dict
 
         :raises ValueError: In case of invalid or missing parameters
         """
-        if not srcset_data:
+        if not srcset_data or isinstance(srcset_data, string_types):
             return None
 
-        if isinstance(srcset_data, string_types):
-            return srcset_data
-
         breakpoints = self.__get_srcset_breakpoints(srcset_data)
 
         # The code below is a part of cloudinary_url code that affects options.
@@ -340,7 +372,26 @@ class CloudinaryResource(object):
             options["fetch_format"] = options.get("fetch_format", options.pop("format", None))
         # END OF TODO
 
-        return ", ".join([self.__generate_single_srcset_url(bp, **options) + " {0}w".format(bp) for bp in breakpoints])
+        return [(bp,) + self.__srcset_url_parts(bp, **options) for bp in breakpoints]
+
+    def __generate_image_srcset_attribute(self, srcset_data, srcset_templates):
+        """
+        Helper function. Generates srcset attribute value of the HTML img tag.
+
+        :param srcset_data:      The srcset option
+        :param srcset_templates: The result of :meth:`_srcset_templates` for srcset_data
+
+        :return:  Resulting srcset attribute value
+        """
+        if not srcset_data:
+            return None
+
+        if isinstance(srcset_data, string_types):
+            return srcset_data
+
+        return ", ".join([
+            utils.cloudinary_url_with_transformation(self.public_id, storage_type, transformation, dict(options))[0] +
+            " {0}w".format(bp) for bp, storage_type, transformation, options in srcset_templates])
 
     def __generate_image_sizes_attribute(self, srcset_data):
         """
@@ -367,7 +418,19 @@ class CloudinaryResource(object):
             self.default_poster_options(options)
 
         src, attrs = self.__build_url(**options)
+        return self._image_tag(src, attrs, options)
+
+    def _image_tag(self, src, attrs, options, srcset_templates=None):
+        """
+        Generates the HTML img tag from a delivery URL.
+
+        :param src:              The delivery URL
+        :param attrs:            The options left after building the URL, used as HTML attributes
+        :param options:          The options given to :meth:`image`
+        :param srcset_templates: The result of :meth:`_srcset_templates`, computed from options when not given
 
+        :return: The HTML img tag
+        """
         client_hints = attrs.pop("client_hints", config().client_hints)
         responsive = attrs.pop("responsive", False)
         hidpi = attrs.pop("hidpi", False)
@@ -386,7 +449,9 @@ class CloudinaryResource(object):
 
         if "srcset" in options:
             srcset_data = options["srcset"]
-            attrs["srcset"] = self.__generate_image_srcset_attribute(srcset_data, **options)
+            if srcset_templates is None:
+                srcset_templates = self._srcset_templates(srcset_data, **options)
+            attrs["srcset"] = self.__generate_image_srcset_attribute(srcset_data, srcset_templates)
 
             if "sizes" in srcset_data and srcset_data["sizes"] is True:
                 attrs["sizes"] = self.__generate_image_sizes_attribute(srcset_data)
@@ -491,3 +556,18 @@ class CloudinaryImage(CloudinaryResource):
 class CloudinaryVideo(CloudinaryResource):
     def __init__(self, public_id=None, **kwargs):
         super(CloudinaryVideo, self).__init__(public_id=public_id, default_resource_type="video", **kwargs)
+
+
+from cloudinary.client import Cloudinary, current_config, update_current_config, using  # noqa: E402
+
+# Submodules that importing the package used to import, and that are now imported on first access
+_LAZY_SUBMODULES = ("api",)
+
+if sys.version_info >= (3, 7):
+    def __getattr__(name):
+        if name in _LAZY_SUBMODULES:
+            return importlib.import_module("cloudinary." + name)
+        raise AttributeError("module 'cloudinary' has no attribute '{0}'".format(name))
+else:
+    # Module level __getattr__ is not supported
+    from cloudinary import api  # noqa: E402
@@ -0,0 +1,21 @@
+# Copyright Cloudinary
+"""
+Asyncio versions of the upload API, the main Admin API methods and the Search API. Requires Python 3.6+.
+
+Requests share a keep-alive connection pool per event loop. The number of concurrent requests is limited by
+the ``aio_max_connections`` configuration parameter; further requests wait for a free connection.
+Files given by path are streamed from disk instead of being read into memory.
+
+Example::
+
+    from cloudinary import aio
+
+    async def main():
+        results = await asyncio.gather(*[aio.uploader.upload(path) for path in paths])
+        resource = await aio.api.resource(results[0]["public_id"])
+        found = await aio.Search().expression("tags=shoe").execute()
+        await aio.close()
+"""
+from cloudinary.aio import api, uploader
+from cloudinary.aio.http import AsyncConnectionPool, close, get_pool
+from cloudinary.aio.search import Search
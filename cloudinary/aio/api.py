@@ -0,0 +1,120 @@
+# Copyright Cloudinary
+import asyncio
+import json
+from urllib.parse import urlencode
+
+from urllib3.filepost import encode_multipart_formdata
+
+from cloudinary import api
+from cloudinary.aio.http import ProtocolError, get_pool
+from cloudinary.api import GeneralError, only, transformation_string
+
+logger = api.logger
+
+URL_METHODS = ("GET", "HEAD", "DELETE", "OPTIONS")
+
+
+async def ping(**options):
+    return await call_api("get", ["ping"], {}, **options)
+
+
+async def usage(**options):
+    return await call_api("get", ["usage"], {}, **options)
+
+
+async def resource_types(**options):
+    return await call_api("get", ["resources"], {}, **options)
+
+
+async def resources(**options):
+    method, uri, params = api._resources_request(options)
+    return await call_api(method, uri, params, **options)
+
+
+async def resources_by_tag(tag, **options):
+    method, uri, params = api._resources_by_tag_request(tag, options)
+    return await call_api(method, uri, params, **options)
+
+
+async def resources_by_ids(public_ids, **options):
+    method, uri, params = api._resources_by_ids_request(public_ids, options)
+    return await call_api(method, uri, params, **options)
+
+
+async def resource(public_id, **options):
+    method, uri, params = api._resource_request(public_id, options)
+    return await call_api(method, uri, params, **options)
+
+
+async def update(public_id, **options):
+    method, uri, params = api._update_request(public_id, options)
+    return await call_api(method, uri, params, **options)
+
+
+async def delete_resources(public_ids, **options):
+    method, uri, params = api._delete_resources_request(options, public_ids=public_ids)
+    return await call_api(method, uri, params, **options)
+
+
+async def delete_resources_by_prefix(prefix, **options):
+    method, uri, params = api._delete_resources_request(options, prefix=prefix)
+    return await call_api(method, uri, params, **options)
+
+
+async def delete_resources_by_tag(tag, **options):
+    method, uri, params = api._delete_resources_by_tag_request(tag, options)
+    return await call_api(method, uri, params, **options)
+
+
+async def tags(**options):
+    method, uri, params = api._tags_request(options)
+    return await call_api(method, uri, params, **options)
+
+
+async def transformations(**options):
+    uri = ["transformations"]
+    return await call_api("get", uri, only(options, "next_cursor", "max_results"), **options)
+
+
+async def transformation(transformation, **options):
+    uri = ["transformations", transformation_string(transformation)]
+    return await call_api("get", uri, only(options, "next_cursor", "max_results"), **options)
+
+
+async def root_folders(**options):
+    return await call_api("get", ["folders"], {}, **options)
+
+
+async def subfolders(of_folder_path, **options):
+    return await call_api("get", ["folders", of_folder_path], {}, **options)
+
+
+async def call_json_api(method, uri, jsonBody, **options):
+    logger.debug(jsonBody)
+    data = json.dumps(jsonBody).encode('utf-8')
+    return await _call_api(method, uri, body=data,
+                           headers={'Content-Type': 'application/json'}, **options)
+
+
+async def call_api(method, uri, params, **options):
+    return await _call_api(method, uri, params=params, **options)
+
+
+async def _call_api(method, uri, params=None, body=None, headers=None, **options):
+    api_url, processed_params, req_headers = api._prepare_request(uri, params, headers, options)
+    method = method.upper()
+    if body is None and processed_params:
+        if method in URL_METHODS:
+            api_url += "?" + urlencode(processed_params)
+        else:
+            body, req_headers["Content-Type"] = encode_multipart_formdata(processed_params)
+
+    try:
+        response = await get_pool().request(method, api_url, req_headers, body, options.get("timeout"))
+    except asyncio.TimeoutError as e:
+        raise GeneralError("Unexpected error {0!r}".format(e))
+    except (OSError, ProtocolError) as e:
+        raise GeneralError("Socket Error: %s" % (str(e)))
+
+    return api._parse_response(response, response.data)
+
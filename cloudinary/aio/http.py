@@ -0,0 +1,321 @@
+# Copyright Cloudinary
+"""
+A minimal asyncio HTTP/1.1 client with keep-alive connection pooling and a concurrency limit.
+"""
+import asyncio
+import os
+import ssl
+import uuid
+import weakref
+from urllib.parse import urlsplit
+
+import certifi
+
+import cloudinary
+
+DEFAULT_MAX_CONNECTIONS = 10
+DEFAULT_MAX_IDLE_CONNECTIONS = 10
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Methods whose requests can be sent again when the response was lost
+IDEMPOTENT_METHODS = frozenset(("GET", "HEAD", "PUT", "DELETE", "OPTIONS", "TRACE"))
+
+_pools = weakref.WeakKeyDictionary()
+
+
+class ProtocolError(IOError):
+    pass
+
+
+class AsyncResponse(object):
+    """
+    The response of an :class:`AsyncConnectionPool` request.
+
+    Provides the ``status``, ``headers`` and ``data`` attributes of a urllib3 response, so it can be passed
+    to the response parsers of :mod:`cloudinary.api` and :mod:`cloudinary.uploader`. The header names are
+    lower-cased, and repeated headers are joined with commas.
+    """
+    def __init__(self, status, reason, headers, data):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.data = data
+
+    def __repr__(self):
+        return "<AsyncResponse [{0} {1}]>".format(self.status, self.reason)
+
+
+class StreamingBody(object):
+    """
+    A request body of a known length that is sent in chunks.
+
+    :param chunks: a callable returning an async iterator over the ``bytes`` chunks of the body, called again
+                   when the request is sent again
+    :param length: the total length of the body
+    :param content_type: the value of the ``Content-Type`` header
+    """
+    def __init__(self, chunks, length, content_type=None):
+        self.chunks = chunks
+        self.length = length
+        self.content_type = content_type
+
+
+class FilePart(object):
+    """
+    A file field of a multipart body.
+
+    :param filename: the file name sent with the field, or None
+    :param data: the file content as ``bytes``, or a file path whose content is streamed from disk
+    """
+    def __init__(self, filename, data=None, path=None):
+        self.filename = filename
+        self.data = data
+        self.path = path
+
+    @property
+    def length(self):
+        return len(self.data) if self.path is None else os.path.getsize(self.path)
+
+    async def chunks(self, chunk_size):
+        if self.path is None:
+            yield self.data
+            return
+        loop = asyncio.get_event_loop()
+        with open(self.path, "rb") as file_io:
+            while True:
+                chunk = await loop.run_in_executor(None, file_io.read, chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+
+def multipart_body(fields, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Encode fields as a streamed ``multipart/form-data`` body.
+
+    :param fields: ordered mapping of field names to values. A :class:`FilePart` value is sent as a file.
+    :param chunk_size: the size of the chunks read from files
+
+    :rtype: StreamingBody
+    """
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        if isinstance(value, FilePart):
+            disposition = 'form-data; name="{0}"'.format(name)
+            if value.filename:
+                disposition += '; filename="{0}"'.format(value.filename)
+            head = "--{0}\r\nContent-Disposition: {1}\r\nContent-Type: application/octet-stream\r\n\r\n".format(
+                boundary, disposition)
+            parts.append((head.encode("utf-8"), value))
+        else:
+            if not isinstance(value, bytes):
+                value = str(value).encode("utf-8")
+            head = '--{0}\r\nContent-Disposition: form-data; name="{1}"\r\n\r\n'.format(boundary, name)
+            parts.append((head.encode("utf-8") + value, None))
+    tail = "--{0}--\r\n".format(boundary).encode("utf-8")
+
+    length = len(tail)
+    for head, file_part in parts:
+        length += len(head) + 2 + (file_part.length if file_part is not None else 0)
+
+    async def chunks():
+        for head, file_part in parts:
+            yield head
+            if file_part is not None:
+                async for chunk in file_part.chunks(chunk_size):
+                    yield chunk
+            yield b"\r\n"
+        yield tail
+
+    return StreamingBody(chunks, length, "multipart/form-data; boundary={0}".format(boundary))
+
+
+class AsyncConnectionPool(object):
+    """
+    Sends HTTP/1.1 requests over pooled keep-alive connections.
+
+    At most ``max_connections`` requests are in flight at the same time; further requests wait for a free slot.
+    A pool is bound to the event loop it is first used in.
+    """
+    def __init__(self, max_connections=DEFAULT_MAX_CONNECTIONS, max_idle_connections=DEFAULT_MAX_IDLE_CONNECTIONS,
+                 ssl_context=None):
+        self.max_connections = max_connections
+        self.max_idle_connections = max_idle_connections
+        self._ssl_context = ssl_context
+        self._limiter = None
+        self._idle = {}
+
+    @property
+    def ssl_context(self):
+        if self._ssl_context is None:
+            self._ssl_context = ssl.create_default_context(cafile=certifi.where())
+        return self._ssl_context
+
+    async def request(self, method, url, headers=None, body=None, timeout=None):
+        """
+        Send a request and read the complete response.
+
+        :param method: the HTTP method
+        :param url: the request URL, including the query string
+        :param headers: the request headers
+        :param body: ``bytes``, a :class:`StreamingBody` or None
+        :param timeout: the timeout of the request in seconds, including the wait for a free connection
+
+        :rtype: AsyncResponse
+        """
+        if self._limiter is None:
+            self._limiter = asyncio.Semaphore(self.max_connections)
+        coroutine = self._limited_request(method, url, headers or {}, body)
+        if timeout is None:
+            return await coroutine
+        return await asyncio.wait_for(coroutine, timeout)
+
+    async def close(self):
+        """Close all idle connections."""
+        idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for _, writer in connections:
+                writer.close()
+
+    async def _limited_request(self, method, url, headers, body):
+        async with self._limiter:
+            parts = urlsplit(url)
+            key = (parts.scheme, parts.hostname, parts.port or DEFAULT_PORTS[parts.scheme])
+            path = (parts.path or "/") + ("?" + parts.query if parts.query else "")
+            while True:
+                reader, writer, reused = await self._acquire(key)
+                sent = False
+                try:
+                    await self._send(writer, method, parts.netloc, path, headers, body)
+                    sent = True
+                    if isinstance(body, StreamingBody):
+                        await self._stream(writer, body)
+                    response, keep_alive = await self._receive(reader, method)
+                except (ConnectionError, asyncio.IncompleteReadError, ProtocolError):
+                    writer.close()
+                    # A stale connection fails before the request head is sent, otherwise the server may have
+                    # processed a request that must not be sent twice
+                    if reused and (not sent or method in IDEMPOTENT_METHODS):
+                        continue
+                    raise
+                except BaseException:
+                    writer.close()
+                    raise
+                self._release(key, reader, writer, keep_alive)
+                return response
+
+    async def _acquire(self, key):
+        connections = self._idle.get(key, [])
+        while connections:
+            reader, writer = connections.pop()
+            if not reader.at_eof() and not writer.is_closing():
+                return reader, writer, True
+            writer.close()
+        scheme, host, port = key
+        reader, writer = await asyncio.open_connection(
+            host, port, ssl=self.ssl_context if scheme == "https" else None)
+        return reader, writer, False
+
+    def _release(self, key, reader, writer, keep_alive):
+        connections = self._idle.setdefault(key, [])
+        if keep_alive and len(connections) < self.max_idle_connections:
+            connections.append((reader, writer))
+        else:
+            writer.close()
+
+    @staticmethod
+    async def _send(writer, method, host, path, headers, body):
+        """Send the request head, and the body unless it is streamed."""
+        lines = ["{0} {1} HTTP/1.1".format(method, path), "Host: {0}".format(host)]
+        names = set(name.lower() for name in headers)
+        lines.extend("{0}: {1}".format(name, value) for name, value in headers.items())
+        if isinstance(body, StreamingBody):
+            if body.content_type and "content-type" not in names:
+                lines.append("Content-Type: {0}".format(body.content_type))
+            length = body.length
+        else:
+            length = len(body) if body else 0
+        if body is not None or method in ("POST", "PUT"):
+            lines.append("Content-Length: {0}".format(length))
+        head = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+        writer.write(head + body if body and not isinstance(body, StreamingBody) else head)
+        await writer.drain()
+
+    @staticmethod
+    async def _stream(writer, body):
+        async for chunk in body.chunks():
+            writer.write(chunk)
+            await writer.drain()
+
+    @staticmethod
+    async def _receive(reader, method):
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Connection closed by the server")
+        try:
+            version, status, reason = (status_line.decode("latin-1").rstrip("\r\n").split(" ", 2) + [""])[:3]
+            status = int(status)
+        except ValueError:
+            raise ProtocolError("Invalid status line: {0!r}".format(status_line))
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            name, value = name.strip().lower(), value.strip()
+            headers[name] = headers[name] + ", " + value if name in headers else value
+
+        keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+        if method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+            data = b""
+        elif "chunked" in headers.get("transfer-encoding", "").lower():
+            data = await _read_chunked(reader)
+        elif "content-length" in headers:
+            data = await reader.readexactly(int(headers["content-length"]))
+        else:
+            data = await reader.read()
+            keep_alive = False
+        return AsyncResponse(status, reason, headers, data), keep_alive
+
+
+async def _read_chunked(reader):
+    chunks = []
+    while True:
+        size_line = await reader.readline()
+        try:
+            size = int(size_line.split(b";", 1)[0].strip(), 16)
+        except ValueError:
+            raise ProtocolError("Invalid chunk size: {0!r}".format(size_line))
+        if size == 0:
+            # Skip the trailer
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            return b"".join(chunks)
+        chunks.append(await reader.readexactly(size))
+        await reader.readexactly(2)
+
+
+def get_pool():
+    """
+    :return: the connection pool of the running event loop. Its size is set by the ``aio_max_connections``
+             configuration parameter.
+    :rtype: AsyncConnectionPool
+    """
+    loop = asyncio.get_event_loop()
+    pool = _pools.get(loop)
+    if pool is None:
+        pool = AsyncConnectionPool(cloudinary.config().aio_max_connections or DEFAULT_MAX_CONNECTIONS)
+        _pools[loop] = pool
+    return pool
+
+
+async def close():
+    """Close the idle connections of the running event loop's pool."""
+    pool = _pools.pop(asyncio.get_event_loop(), None)
+    if pool is not None:
+        await pool.close()
@@ -0,0 +1,12 @@
+# Copyright Cloudinary
+from cloudinary import search
+from cloudinary.aio import api
+
+
+class Search(search.Search):
+    """Build a search query and execute it asynchronously."""
+    async def execute(self, **options):
+        """Execute the search and return results."""
+        options["content_type"] = 'application/json'
+        uri = ['resources', 'search']
+        return await api.call_json_api('post', uri, self.query, **options)
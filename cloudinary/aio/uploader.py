@@ -0,0 +1,167 @@
+# Copyright Cloudinary
+import asyncio
+from os.path import getsize
+
+import cloudinary
+from cloudinary import uploader, utils
+from cloudinary.aio.http import DEFAULT_CHUNK_SIZE, FilePart, ProtocolError, get_pool, multipart_body
+from cloudinary.api import Error
+
+
+async def upload(file, **options):
+    params = utils.build_upload_params(**options)
+    return await call_api("upload", params, file=file, **options)
+
+
+async def unsigned_upload(file, upload_preset, **options):
+    return await upload(file, upload_preset=upload_preset, unsigned=True, **options)
+
+
+async def upload_large(file, **options):
+    """ Upload large files. """
+    if utils.is_remote_url(file):
+        return await upload(file, **options)
+
+    loop = asyncio.get_event_loop()
+    upload_id = utils.random_public_id()
+    with open(file, 'rb') as file_io:
+        results = None
+        current_loc = 0
+        chunk_size = options.get("chunk_size", 20000000)
+        file_size = getsize(file)
+        chunk = await loop.run_in_executor(None, file_io.read, chunk_size)
+        while chunk:
+            range = "bytes {0}-{1}/{2}".format(current_loc, current_loc + len(chunk) - 1, file_size)
+            current_loc += len(chunk)
+
+            results = await upload_large_part(
+                (file, chunk),
+                http_headers={"Content-Range": range,
+                              "X-Unique-Upload-Id": upload_id},
+                **options)
+            options["public_id"] = results.get("public_id")
+            chunk = await loop.run_in_executor(None, file_io.read, chunk_size)
+        return results
+
+
+async def upload_large_part(file, **options):
+    """ Upload large files. """
+    params = utils.build_upload_params(**options)
+    if 'resource_type' not in options:
+        options['resource_type'] = "raw"
+    return await call_api("upload", params, file=file, **options)
+
+
+async def destroy(public_id, **options):
+    params = {
+        "timestamp": utils.now(),
+        "type": options.get("type"),
+        "invalidate": options.get("invalidate"),
+        "public_id": public_id
+    }
+    return await call_api("destroy", params, **options)
+
+
+async def rename(from_public_id, to_public_id, **options):
+    params = {
+        "timestamp": utils.now(),
+        "type": options.get("type"),
+        "overwrite": options.get("overwrite"),
+        "invalidate": options.get("invalidate"),
+        "from_public_id": from_public_id,
+        "to_public_id": to_public_id
+    }
+    return await call_api("rename", params, **options)
+
+
+async def explicit(public_id, **options):
+    params = utils.build_upload_params(**options)
+    params["public_id"] = public_id
+    return await call_api("explicit", params, **options)
+
+
+# options may include 'exclusive' (boolean) which causes clearing this tag from all other resources
+async def add_tag(tag, public_ids=None, **options):
+    exclusive = options.pop("exclusive", None)
+    command = "set_exclusive" if exclusive else "add"
+    return await call_tags_api(tag, command, public_ids, **options)
+
+
+async def remove_tag(tag, public_ids=None, **options):
+    return await call_tags_api(tag, "remove", public_ids, **options)
+
+
+async def replace_tag(tag, public_ids=None, **options):
+    return await call_tags_api(tag, "replace", public_ids, **options)
+
+
+async def remove_all_tags(public_ids, **options):
+    return await call_tags_api(None, "remove_all", public_ids, **options)
+
+
+async def add_context(context, public_ids, **options):
+    return await call_context_api(context, "add", public_ids, **options)
+
+
+async def remove_all_context(public_ids, **options):
+    return await call_context_api(None, "remove_all", public_ids, **options)
+
+
+async def call_tags_api(tag, command, public_ids=None, **options):
+    params = {
+        "timestamp": utils.now(),
+        "tag": tag,
+        "public_ids": utils.build_array(public_ids),
+        "command": command,
+        "type": options.get("type")
+    }
+    return await call_api("tags", params, **options)
+
+
+async def call_context_api(context, command, public_ids=None, **options):
+    params = {
+        "timestamp": utils.now(),
+        "context": utils.encode_context(context),
+        "public_ids": utils.build_array(public_ids),
+        "command": command,
+        "type": options.get("type")
+    }
+    return await call_api("context", params, **options)
+
+
+async def call_api(action, params, http_headers=None, return_error=False, unsigned=False, file=None, timeout=None,
+                   **options):
+    """
+    Send an upload API request.
+
+    Accepts the same arguments as :func:`cloudinary.uploader.call_api`. A file path is streamed from disk
+    instead of being read into memory.
+    """
+    param_list = uploader._build_param_list(params, unsigned, options)
+    api_url = utils.cloudinary_api_url(action, **options)
+    if file:
+        if isinstance(file, str):
+            if utils.is_remote_url(file):
+                param_list["file"] = file
+            else:
+                param_list["file"] = FilePart(uploader.escape_uri_path(file), path=file)
+        elif hasattr(file, 'read') and callable(file.read):
+            name = file.name if hasattr(file, 'name') and isinstance(file.name, str) else "stream"
+            param_list["file"] = FilePart(uploader.escape_uri_path(name), data=file.read())
+        elif isinstance(file, tuple):
+            param_list["file"] = FilePart(file[0], data=file[1])
+        else:
+            param_list["file"] = FilePart("file", data=file)
+
+    headers = {"User-Agent": cloudinary.get_user_agent()}
+    headers.update(http_headers or {})
+
+    body = multipart_body(param_list, options.get("chunk_size", DEFAULT_CHUNK_SIZE))
+    try:
+        response = await get_pool().request("POST", api_url, headers, body, timeout)
+    except asyncio.TimeoutError as e:
+        raise Error("Unexpected error - {0!r}".format(e))
+    except (OSError, ProtocolError) as e:
+        raise Error("Socket error: {0!r}".format(e))
+
+    return uploader._parse_response(response, response.data, return_error)
@@ -3,14 +3,15 @@
 import email.utils
 import json
 import socket
+import threading
 
 import urllib3
 from six import string_types
 from urllib3.exceptions import HTTPError
 
-import certifi
 import cloudinary
-from cloudinary import utils
+from cloudinary import codec, instrumentation, utils
+from cloudinary.coalesce import SingleFlight
 
 logger = cloudinary.logger
 
@@ -59,18 +60,39 @@ EXCEPTION_CODES = {
 
 
 class Response(dict):
+    """
+    The decoded result of an Admin API call.
+
+    The rate limit headers of the response are only parsed when the ``rate_limit_*`` attributes are read,
+    which are None if the response has no rate limit headers.
+    """
     def __init__(self, result, response, **kwargs):
-        super(Response, self).__init__(**kwargs)
-        self.update(result)
-        self.rate_limit_allowed = int(response.headers["x-featureratelimit-limit"])
-        self.rate_limit_reset_at = email.utils.parsedate(response.headers["x-featureratelimit-reset"])
-        self.rate_limit_remaining = int(response.headers["x-featureratelimit-remaining"])
+        dict.__init__(self, result, **kwargs)
+        self._headers = response.headers
 
+    @property
+    def rate_limit_allowed(self):
+        value = self._headers.get("x-featureratelimit-limit")
+        return int(value) if value is not None else None
 
-_http = urllib3.PoolManager(
-        cert_reqs='CERT_REQUIRED',
-        ca_certs=certifi.where()
-        )
+    @property
+    def rate_limit_reset_at(self):
+        value = self._headers.get("x-featureratelimit-reset")
+        return email.utils.parsedate(value) if value is not None else None
+
+    @property
+    def rate_limit_remaining(self):
+        value = self._headers.get("x-featureratelimit-remaining")
+        return int(value) if value is not None else None
+
+
+# Created on first use, so importing the module does not load the CA certificates
+_http = None
+_http_lock = threading.Lock()
+
+_single_flight = SingleFlight()
+
+COALESCED_JSON_URIS = [["resources", "search"]]
 
 
 def ping(**options):
@@ -85,7 +107,15 @@ def resource_types(**options):
     return call_api("get", ["resources"], {}, **options)
 
 
+# The functions building the (method, uri, params) of requests, which remove the options they use from
+# ``options``, are shared with cloudinary.aio.api
+
 def resources(**options):
+    method, uri, params = _resources_request(options)
+    return call_api(method, uri, params, **options)
+
+
+def _resources_request(options):
     resource_type = options.pop("resource_type", "image")
     upload_type = options.pop("type", None)
     uri = ["resources", resource_type]
@@ -93,15 +123,20 @@ def resources(**options):
         uri.append(upload_type)
     params = only(options, "next_cursor", "max_results", "prefix", "tags",
                   "context", "moderations", "direction", "start_at")
-    return call_api("get", uri, params, **options)
+    return "get", uri, params
 
 
 def resources_by_tag(tag, **options):
+    method, uri, params = _resources_by_tag_request(tag, options)
+    return call_api(method, uri, params, **options)
+
+
+def _resources_by_tag_request(tag, options):
     resource_type = options.pop("resource_type", "image")
     uri = ["resources", resource_type, "tags", tag]
     params = only(options, "next_cursor", "max_results", "tags",
                   "context", "moderations", "direction")
-    return call_api("get", uri, params, **options)
+    return "get", uri, params
 
 
 def resources_by_moderation(kind, status, **options):
@@ -113,26 +148,45 @@ def resources_by_moderation(kind, status, **options):
 
 
 def resources_by_ids(public_ids, **options):
+    method, uri, params = _resources_by_ids_request(public_ids, options)
+    return call_api(method, uri, params, **options)
+
+
+def _resources_by_ids_request(public_ids, options):
     resource_type = options.pop("resource_type", "image")
     upload_type = options.pop("type", "upload")
     uri = ["resources", resource_type, upload_type]
     params = dict(only(options, "tags", "moderations", "context"), public_ids=public_ids)
-    return call_api("get", uri, params, **options)
+    return "get", uri, params
 
 
 def resource(public_id, **options):
+    method, uri, params = _resource_request(public_id, options)
+    return call_api(method, uri, params, **options)
+
+
+def _resource_request(public_id, options):
     resource_type = options.pop("resource_type", "image")
     upload_type = options.pop("type", "upload")
     uri = ["resources", resource_type, upload_type, public_id]
     params = only(options, "exif", "faces", "colors", "image_metadata",
                   "pages", "phash", "coordinates", "max_results")
-    return call_api("get", uri, params, **options)
+    return "get", uri, params
 
 
 def update(public_id, **options):
+    method, uri, params = _update_request(public_id, options)
+    return call_api(method, uri, params, **options)
+
+
+def _update_request(public_id, options):
     resource_type = options.pop("resource_type", "image")
     upload_type = options.pop("type", "upload")
     uri = ["resources", resource_type, upload_type, public_id]
+    return "post", uri, _update_params(options)
+
+
+def _update_params(options):
     params = only(options, "moderation_status", "raw_convert",
                   "quality_override", "ocr",
                   "categorization", "detection", "similarity_search",
@@ -151,39 +205,40 @@ def update(public_id, **options):
         params["auto_tagging"] = str(options.get("auto_tagging"))
     if "access_control" in options:
         params["access_control"] = utils.json_encode(utils.build_list_of_dicts(options.get("access_control")))
-
-    return call_api("post", uri, params, **options)
+    return params
 
 
 def delete_resources(public_ids, **options):
-    resource_type = options.pop("resource_type", "image")
-    upload_type = options.pop("type", "upload")
-    uri = ["resources", resource_type, upload_type]
-    params = __delete_resource_params(options, public_ids=public_ids)
-    return call_api("delete", uri, params, **options)
+    method, uri, params = _delete_resources_request(options, public_ids=public_ids)
+    return call_api(method, uri, params, **options)
 
 
 def delete_resources_by_prefix(prefix, **options):
-    resource_type = options.pop("resource_type", "image")
-    upload_type = options.pop("type", "upload")
-    uri = ["resources", resource_type, upload_type]
-    params = __delete_resource_params(options, prefix=prefix)
-    return call_api("delete", uri, params, **options)
+    method, uri, params = _delete_resources_request(options, prefix=prefix)
+    return call_api(method, uri, params, **options)
 
 
 def delete_all_resources(**options):
+    method, uri, params = _delete_resources_request(options, all=True)
+    return call_api(method, uri, params, **options)
+
+
+def _delete_resources_request(options, **params):
     resource_type = options.pop("resource_type", "image")
     upload_type = options.pop("type", "upload")
     uri = ["resources", resource_type, upload_type]
-    params = __delete_resource_params(options, all=True)
-    return call_api("delete", uri, params, **options)
+    return "delete", uri, delete_resource_params(options, **params)
 
 
 def delete_resources_by_tag(tag, **options):
+    method, uri, params = _delete_resources_by_tag_request(tag, options)
+    return call_api(method, uri, params, **options)
+
+
+def _delete_resources_by_tag_request(tag, options):
     resource_type = options.pop("resource_type", "image")
     uri = ["resources", resource_type, "tags", tag]
-    params = __delete_resource_params(options)
-    return call_api("delete", uri, params, **options)
+    return "delete", uri, delete_resource_params(options)
 
 
 def delete_derived_resources(derived_resource_ids, **options):
@@ -223,9 +278,13 @@ def delete_derived_by_transformation(public_ids, transformations,
 
 
 def tags(**options):
+    method, uri, params = _tags_request(options)
+    return call_api(method, uri, params, **options)
+
+
+def _tags_request(options):
     resource_type = options.pop("resource_type", "image")
-    uri = ["tags", resource_type]
-    return call_api("get", uri, only(options, "next_cursor", "max_results", "prefix"), **options)
+    return "get", ["tags", resource_type], only(options, "next_cursor", "max_results", "prefix")
 
 
 def transformations(**options):
@@ -399,6 +458,30 @@ def call_api(method, uri, params, **options):
 
 
 def _call_api(method, uri, params=None, body=None, headers=None, **options):
+    api_url, processed_params, req_headers = _prepare_request(uri, params, headers, options)
+    kw = {}
+    if 'timeout' in options:
+        kw['timeout'] = options['timeout']
+    if body is not None:
+        kw['body'] = body
+
+    coalesce = options.get("coalesce", cloudinary.config().coalesce_requests)
+    if coalesce and _is_idempotent(method, uri):
+        key = (method.upper(), api_url, json.dumps(processed_params, sort_keys=True, default=str), body,
+               req_headers.get("authorization"))
+        return _single_flight.do(key, _execute_request, method, api_url, processed_params, req_headers, kw)
+
+    return _execute_request(method, api_url, processed_params, req_headers, kw)
+
+
+def _prepare_request(uri, params, headers, options):
+    """
+    Build the URL, the request parameters and the authenticated headers of an Admin API request.
+
+    Removes the account options (``upload_prefix``, ``cloud_name``, ``api_key``, ``api_secret``) from ``options``.
+
+    :return: a tuple of (api_url, processed_params, req_headers)
+    """
     prefix = options.pop("upload_prefix",
                          cloudinary.config().upload_prefix) or "https://api.cloudinary.com"
     cloud_name = options.pop("cloud_name", cloudinary.config().cloud_name)
@@ -429,21 +512,41 @@ def _call_api(method, uri, params=None, body=None, headers=None, **options):
     )
     if headers is not None:
         req_headers.update(headers)
-    kw = {}
-    if 'timeout' in options:
-        kw['timeout'] = options['timeout']
-    if body is not None:
-        kw['body'] = body
+    return api_url, processed_params, req_headers
+
+
+def _is_idempotent(method, uri):
+    return method.upper() == "GET" or (method.upper() == "POST" and uri in COALESCED_JSON_URIS)
+
+
+def _execute_request(method, api_url, processed_params, req_headers, kw):
     try:
-        response = _http.request(method.upper(), api_url, processed_params, req_headers, **kw)
+        response = instrumentation.request(_get_http(), "admin", method.upper(), api_url, processed_params,
+                                           req_headers, **kw)
         body = response.data
     except HTTPError as e:
         raise GeneralError("Unexpected error {0}", e.message)
     except socket.error as e:
         raise GeneralError("Socket Error: %s" % (str(e)))
 
+    return _parse_response(response, body)
+
+
+def _parse_response(response, body):
+    """
+    Decode the body of an Admin API response.
+
+    :param response: the HTTP response, providing ``status`` and ``headers``
+    :param body: the response body
+    :type body: bytes
+
+    :return: the decoded response
+    :rtype: Response
+
+    :raises Error: the error matching the response status, if the response contains an error
+    """
     try:
-        result = json.loads(body.decode('utf-8'))
+        result = codec.loads(body)
     except Exception as e:
         # Error is parsing json
         raise GeneralError("Error parsing server response (%d) - %s. Got - %s" % (response.status, body, e))
@@ -456,6 +559,46 @@ def _call_api(method, uri, params=None, body=None, headers=None, **options):
     return Response(result, response)
 
 
+def coalescing_stats():
+    """
+    Report how identical concurrent read requests were coalesced.
+
+    Coalescing is enabled with ``cloudinary.config(coalesce_requests=True)`` or per call with ``coalesce=True``.
+    It applies to GET requests and search queries.
+
+    :return: dictionary with the number of ``executed`` requests, ``coalesced`` requests that shared
+             an in-flight request, and requests currently ``in_flight``
+    :rtype: dict
+    """
+    return _single_flight.stats()
+
+
+def reset_coalescing_stats():
+    _single_flight.reset_stats()
+
+
+def _get_http():
+    client = cloudinary.client.current_client()
+    if client is not None:
+        return client.get_http("admin", _new_http)
+    global _http
+    if _http is None:
+        with _http_lock:
+            if _http is None:
+                _http = _new_http()
+    return _http
+
+
+def _new_http():
+    import certifi
+    http = urllib3.PoolManager(
+        cert_reqs='CERT_REQUIRED',
+        ca_certs=certifi.where()
+    )
+    instrumentation.instrument(http)
+    return http
+
+
 def only(source, *keys):
     return {key: source[key] for key in keys if key in source}
 
@@ -476,7 +619,17 @@ def __prepare_streaming_profile_params(**options):
     return params
 
 
-def __delete_resource_params(options, **params):
+def delete_resource_params(options, **params):
+    """
+    Build the parameters of the requests deleting resources.
+
+    :param options: the options of the request, providing ``transformations``, ``keep_original``, ``next_cursor``
+                    and ``invalidate``
+    :param params: the parameters selecting the resources, e.g. ``public_ids`` or ``prefix``
+
+    :return: the request parameters
+    :rtype: dict
+    """
     p = dict(transformations=utils.build_eager(options.get('transformations')),
              **only(options, "keep_original", "next_cursor", "invalidate"))
     p.update(params)
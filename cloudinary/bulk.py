@@ -0,0 +1,230 @@
+# Copyright Cloudinary
+"""
+Tag and context commands on any number of resources.
+
+The functions of :mod:`cloudinary.uploader` send one request for all the given public IDs, which fails above
+the limit of public IDs per request. The functions of this module take any iterable of public IDs, including
+generators that read a listing page by page, send them in batches of at most
+:data:`cloudinary.coalesce.MAX_PUBLIC_IDS` concurrently, within an optional budget of requests per second, and
+retry batches that failed temporarily::
+
+    ids = (resource["public_id"] for page in pages for resource in page["resources"])
+    result = cloudinary.bulk.add_tag("sale", ids, concurrency=8, max_rate=10)
+    result.succeeded, result.failed
+"""
+import sys
+import threading
+import time
+
+import six
+from six.moves.queue import Queue
+
+import cloudinary
+from cloudinary import api, uploader
+from cloudinary.client import bind
+from cloudinary.coalesce import MAX_PUBLIC_IDS
+from cloudinary.retry import is_retryable, retry_delay
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_MAX_ATTEMPTS = 5
+
+NOT_UPDATED = "Not updated"
+
+
+class BulkResult(object):
+    """
+    The outcome of a bulk command for each public ID.
+
+    :ivar succeeded: the public IDs the server reported as updated, in the order of the requests
+    :ivar failed: the error of each public ID that was not updated
+    :ivar requests: the number of requests sent, including retries
+    """
+    def __init__(self):
+        self.succeeded = []
+        self.failed = {}
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def ok(self):
+        return not self.failed
+
+    def __repr__(self):
+        return "<BulkResult succeeded={0} failed={1} requests={2}>".format(len(self.succeeded), len(self.failed),
+                                                                          self.requests)
+
+    def _add(self, public_ids, response=None, error=None):
+        with self._lock:
+            if error is not None:
+                for public_id in public_ids:
+                    self.failed[public_id] = error
+                return
+            updated = set(response.get("public_ids") or ())
+            for public_id in public_ids:
+                if public_id in updated:
+                    self.succeeded.append(public_id)
+                else:
+                    self.failed[public_id] = NOT_UPDATED
+
+
+class RateBudget(object):
+    """
+    Spaces calls to at most ``rate`` per second, shared by all threads.
+
+    :param rate: calls per second, None for no limit
+    """
+    def __init__(self, rate=None):
+        if rate is not None and rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self._lock = threading.Lock()
+        self._next_at = 0.0
+
+    def acquire(self):
+        """Wait until the next call is within the budget."""
+        if self.rate is None:
+            return
+        with self._lock:
+            now = time.time()
+            start_at = max(now, self._next_at)
+            self._next_at = start_at + 1.0 / self.rate
+        if start_at > now:
+            time.sleep(start_at - now)
+
+
+def add_tag(tag, public_ids, **options):
+    """
+    Add a tag to the resources. With ``exclusive=True`` the tag is also removed from all other resources.
+
+    :param public_ids: an iterable of public IDs
+    :param options: the options of :func:`run`, and of the request
+
+    :rtype: BulkResult
+    """
+    if options.pop("exclusive", None):
+        return run("tags", tag, "add", public_ids, first_command="set_exclusive", **options)
+    return run("tags", tag, "add", public_ids, **options)
+
+
+def remove_tag(tag, public_ids, **options):
+    """:rtype: BulkResult"""
+    return run("tags", tag, "remove", public_ids, **options)
+
+
+def replace_tag(tag, public_ids, **options):
+    """:rtype: BulkResult"""
+    return run("tags", tag, "replace", public_ids, **options)
+
+
+def remove_all_tags(public_ids, **options):
+    """:rtype: BulkResult"""
+    return run("tags", None, "remove_all", public_ids, **options)
+
+
+def add_context(context, public_ids, **options):
+    """:rtype: BulkResult"""
+    return run("context", context, "add", public_ids, **options)
+
+
+def remove_all_context(public_ids, **options):
+    """:rtype: BulkResult"""
+    return run("context", None, "remove_all", public_ids, **options)
+
+
+def run(api_name, value, command, public_ids, concurrency=DEFAULT_CONCURRENCY, max_rate=None,
+        max_attempts=DEFAULT_MAX_ATTEMPTS, batch_size=MAX_PUBLIC_IDS, first_command=None, **options):
+    """
+    Send a tags or context command for the public IDs in batches.
+
+    :param api_name: ``tags`` or ``context``
+    :param value: the tag, or the context
+    :param command: the command of the tags or context API
+    :param public_ids: an iterable of public IDs, read as the batches are sent
+    :param concurrency: the number of concurrent requests
+    :param max_rate: the maximal number of requests per second, by default the ``bulk_max_rate`` configuration
+                     parameter, or unlimited
+    :param max_attempts: the number of attempts of a batch that fails temporarily, e.g. when rate limited
+    :param batch_size: the number of public IDs per request
+    :param first_command: the command of the first batch, which is sent before the others
+    :param options: the options of the requests
+
+    :rtype: BulkResult
+    """
+    if concurrency <= 0 or max_attempts <= 0 or not 0 < batch_size <= MAX_PUBLIC_IDS:
+        raise ValueError("concurrency and max_attempts must be positive, and batch_size at most {0}".format(
+            MAX_PUBLIC_IDS))
+    call = uploader.call_tags_api if api_name == "tags" else uploader.call_context_api
+    if max_rate is None:
+        max_rate = cloudinary.config().bulk_max_rate
+    budget = RateBudget(float(max_rate) if max_rate else None)
+    result = BulkResult()
+
+    def send(batch_command, batch):
+        attempts = 0
+        while True:
+            attempts += 1
+            budget.acquire()
+            with result._lock:
+                result.requests += 1
+            try:
+                response = call(value, batch_command, batch, coalesce=False, **options)
+            except api.Error as e:
+                if attempts < max_attempts and is_retryable(e):
+                    time.sleep(retry_delay(attempts))
+                    continue
+                result._add(batch, error="{0}: {1}".format(type(e).__name__, e))
+            else:
+                result._add(batch, response)
+            return
+
+    batches = _batches(public_ids, batch_size)
+    if first_command is not None:
+        first = next(batches, None)
+        if first is not None:
+            send(first_command, first)
+
+    pending = Queue(maxsize=concurrency * 2)
+    errors = []
+
+    def work():
+        while True:
+            batch = pending.get()
+            if batch is None:
+                return
+            try:
+                send(command, batch)
+            except Exception:
+                errors.append(sys.exc_info())
+                result._add(batch, error=NOT_UPDATED)
+
+    workers = [threading.Thread(target=bind(work)) for _ in range(concurrency)]
+    for worker in workers:
+        worker.daemon = True
+        worker.start()
+    try:
+        for batch in batches:
+            pending.put(batch)
+    finally:
+        for _ in workers:
+            pending.put(None)
+        for worker in workers:
+            worker.join()
+    if errors:
+        six.reraise(*errors[0])
+    return result
+
+
+def _batches(public_ids, size):
+    batch = []
+    seen = set()
+    for public_id in public_ids:
+        if public_id in seen:
+            continue
+        seen.add(public_id)
+        batch.append(public_id)
+        if len(batch) == size:
+            yield batch
+            batch = []
+            seen = set()
+    if batch:
+        yield batch
@@ -0,0 +1,80 @@
+# Copyright Cloudinary
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache(object):
+    """
+    A thread-safe, size bounded LRU cache whose entries expire after a time to live.
+    """
+    def __init__(self, max_size=1024, ttl=None):
+        """
+        :param max_size: the maximal number of entries, the least recently used entry is evicted first
+        :param ttl: time to live of an entry, in seconds. None means entries do not expire
+        """
+        if max_size <= 0:
+            raise ValueError("max_size must be a positive integer")
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """
+        :return: the cached value for ``key``, or ``default`` if it is missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.time():
+                    self._move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        expires_at = time.time() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (value, expires_at)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and (entry[1] is None or entry[1] > time.time())
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            return entry[0] if entry is not None else default
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        :return: dictionary with the number of cache ``hits``, ``misses`` and current ``size``
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def _move_to_end(self, key):
+        if hasattr(self._entries, "move_to_end"):
+            self._entries.move_to_end(key)
+        else:
+            self._entries[key] = self._entries.pop(key)
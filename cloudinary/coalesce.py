@@ -0,0 +1,432 @@
+# Copyright Cloudinary
+import itertools
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import six
+from six.moves import queue
+
+import cloudinary
+from cloudinary import utils
+
+
+class _InFlightCall(object):
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.exc_info = None
+
+
+class SingleFlight(object):
+    """
+    Coalesces concurrent calls that share the same key into a single call.
+
+    The first caller for a key (the leader) runs the function. Callers arriving with the same key
+    while the leader is still running wait for it and receive the same result or exception.
+    Once the call completes the key is released, so later callers start a new call.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._executed = 0
+        self._coalesced = 0
+
+    def do(self, key, func, *args, **kwargs):
+        """
+        Run ``func(*args, **kwargs)`` unless an identical call (same ``key``) is already in flight.
+
+        :param key: hashable key identifying identical calls
+        :param func: the function to call
+
+        :return: the result of the (possibly shared) call
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _InFlightCall()
+                self._calls[key] = call
+                self._executed += 1
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.exc_info is not None:
+                six.reraise(*call.exc_info)
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+        except Exception:
+            call.exc_info = sys.exc_info()
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def stats(self):
+        """
+        :return: dictionary with the number of ``executed`` calls, ``coalesced`` calls that shared
+                 an in-flight call, and calls currently ``in_flight``
+        """
+        with self._lock:
+            return {"executed": self._executed, "coalesced": self._coalesced, "in_flight": len(self._calls)}
+
+    def reset_stats(self):
+        with self._lock:
+            self._executed = 0
+            self._coalesced = 0
+
+
+
+# The maximal number of public IDs the tags and context APIs accept per request
+MAX_PUBLIC_IDS = 1000
+DEFAULT_WINDOW = 0.05
+DEFAULT_WORKERS = 4
+
+# Account parameters resolved when a command is buffered, so it is sent to the account of the caller
+_ACCOUNT_OPTIONS = ("cloud_name", "api_key", "api_secret", "upload_prefix")
+
+# Tag commands that can run in any order relative to the same command on another tag
+_COMMUTING_TAG_COMMANDS = frozenset(("add", "remove"))
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+class Future(object):
+    """The result of a buffered command, available once the requests that include it complete."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._result = None
+        self._exc_info = None
+        self._callbacks = []
+
+    def done(self):
+        return self._done.is_set()
+
+    def result(self, timeout=None):
+        """
+        :return: the result of the command, or raises the error of its request
+
+        :raises RuntimeError: if the result is not available within ``timeout`` seconds
+        """
+        if not self._done.wait(timeout):
+            raise RuntimeError("Timed out waiting for a buffered command")
+        if self._exc_info is not None:
+            six.reraise(*self._exc_info)
+        return self._result
+
+    def add_done_callback(self, callback):
+        """Call ``callback`` with this future once it is done, right away if it is done already."""
+        with self._lock:
+            if not self._done.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def _set(self, result=None, exc_info=None):
+        with self._lock:
+            self._result = result
+            self._exc_info = exc_info
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception:
+                cloudinary.logger.exception("Future callback failed")
+
+
+class _Caller(object):
+    """A buffered command of one caller, answered once all requests including its public IDs complete."""
+    __slots__ = ("public_ids", "future", "remaining", "updated", "response", "exc_info")
+
+    def __init__(self, public_ids, future):
+        self.public_ids = public_ids
+        self.future = future
+        self.remaining = 0
+        self.updated = set()
+        self.response = None
+        self.exc_info = None
+
+
+class _Batch(object):
+    """
+    Buffered commands that only differ by public IDs, merged into requests. Created in the scope of the callers,
+    whose configuration and client the requests are sent with.
+    """
+    def __init__(self, api, value, command, options):
+        self.api = api
+        self.value = value
+        self.command = command
+        self.options = options
+        self.public_ids = []
+        self.callers = []
+        self._seen = set()
+        self._lock = threading.Lock()
+        self._request = cloudinary.client.bind(_request)
+
+    def send(self, public_ids):
+        """Send the request for ``public_ids``, and answer the callers it completes."""
+        self._request(self, public_ids)
+
+    def add(self, public_ids, future):
+        for public_id in public_ids:
+            if public_id not in self._seen:
+                self._seen.add(public_id)
+                self.public_ids.append(public_id)
+        self.callers.append(_Caller(public_ids, future))
+
+    def split(self, max_ids):
+        """
+        :return: the public IDs of each request
+        """
+        chunks = [self.public_ids[start:start + max_ids] for start in range(0, len(self.public_ids), max_ids)]
+        chunk_of = dict((public_id, index // max_ids) for index, public_id in enumerate(self.public_ids))
+        for caller in self.callers:
+            caller.remaining = len(set(chunk_of[public_id] for public_id in caller.public_ids))
+        return chunks
+
+    def complete(self, public_ids, response=None, exc_info=None):
+        """Record the response or error of the request for ``public_ids``, and answer the callers it completes."""
+        sent = set(public_ids)
+        updated = set(response.get("public_ids") or ()) if response is not None else set()
+        finished = []
+        with self._lock:
+            for caller in self.callers:
+                if not caller.remaining or sent.isdisjoint(caller.public_ids):
+                    continue
+                caller.remaining -= 1
+                if exc_info is not None:
+                    caller.exc_info = caller.exc_info or exc_info
+                else:
+                    caller.response = response
+                    caller.updated.update(updated.intersection(caller.public_ids))
+                if not caller.remaining:
+                    finished.append(caller)
+        for caller in finished:
+            if caller.exc_info is not None:
+                caller.future._set(exc_info=caller.exc_info)
+            else:
+                result = dict(caller.response)
+                result["public_ids"] = [public_id for public_id in caller.public_ids if public_id in caller.updated]
+                caller.future._set(result)
+
+
+class WriteBehindBuffer(object):
+    """
+    Buffers tag and context commands for a short window, and sends the commands that only differ by public IDs
+    as one request per :data:`MAX_PUBLIC_IDS` public IDs.
+
+    Commands with the same ``(tag, command, type)``, or the same context and command, the same options and the
+    same :func:`cloudinary.using` scope are merged, and sent within that scope. Commands on a resource that must
+    run in order, for example adding and then removing the same tag, are sent in that order, requests that can run
+    in any order are sent concurrently by ``workers`` threads. Each caller receives a :class:`Future` of the
+    response, with the ``public_ids`` limited to its own. Exclusive tags are not merged.
+
+    :param window: seconds a command waits for other commands to merge with
+    :param max_ids: the maximal number of public IDs per request
+    :param workers: the maximal number of concurrent requests
+    """
+    def __init__(self, window=DEFAULT_WINDOW, max_ids=MAX_PUBLIC_IDS, workers=DEFAULT_WORKERS):
+        if max_ids <= 0 or workers <= 0:
+            raise ValueError("max_ids and workers must be positive integers")
+        self.window = window
+        self.max_ids = max_ids
+        self.workers = workers
+        self._condition = threading.Condition(threading.Lock())
+        # The batches of a generation are sent after those of the previous generation
+        self._generations = []
+        self._deadline = None
+        self._flushing = False
+        self._closed = False
+        self._exclusive = itertools.count()
+        self._commands = 0
+        self._requests = 0
+        self._thread = threading.Thread(target=self._work)
+        self._thread.daemon = True
+        self._thread.start()
+        self._tasks = queue.Queue()
+        self._workers = []
+        for _ in range(workers):
+            worker = threading.Thread(target=self._run_requests)
+            worker.daemon = True
+            worker.start()
+            self._workers.append(worker)
+
+    def tags(self, tag, command, public_ids, **options):
+        """
+        Buffer a command of :func:`cloudinary.uploader.call_tags_api`.
+
+        :rtype: Future
+        """
+        return self._add("tags", tag, command, public_ids, options)
+
+    def context(self, context, command, public_ids, **options):
+        """
+        Buffer a command of :func:`cloudinary.uploader.call_context_api`.
+
+        :rtype: Future
+        """
+        return self._add("context", utils.encode_context(context), command, public_ids, options)
+
+    def flush(self, timeout=None):
+        """
+        Send the buffered commands now, and wait until their requests complete.
+
+        :return: False if the requests did not complete within ``timeout`` seconds
+        """
+        deadline = time.time() + timeout if timeout is not None else None
+        with self._condition:
+            if self._generations:
+                self._deadline = 0
+                self._condition.notify_all()
+            while self._generations or self._flushing:
+                remaining = deadline - time.time() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def close(self):
+        """Send the buffered commands and stop."""
+        with self._condition:
+            self._closed = True
+            if self._generations:
+                self._deadline = 0
+            self._condition.notify_all()
+        self._thread.join()
+        for _ in self._workers:
+            self._tasks.put(None)
+        for worker in self._workers:
+            worker.join()
+
+    def stats(self):
+        """
+        :return: dictionary with the number of buffered ``commands`` and of the ``requests`` sent for them
+        """
+        with self._condition:
+            return {"commands": self._commands, "requests": self._requests}
+
+    def _add(self, api, value, command, public_ids, options):
+        public_ids = utils.build_array(public_ids)
+        if not public_ids:
+            raise ValueError("Buffered commands require public IDs")
+        options = dict(options)
+        config = cloudinary.config()
+        for name in _ACCOUNT_OPTIONS:
+            if options.get(name) is None and getattr(config, name) is not None:
+                options[name] = getattr(config, name)
+        scope = (api, utils.freeze(options))
+        future = Future()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("The buffer is closed")
+            self._commands += 1
+            generation = self._generations[-1] if self._generations else None
+            if generation is None or generation["sealed"] or self._conflicts(generation, scope, value, command,
+                                                                               public_ids):
+                generation = {"batches": OrderedDict(), "ids": {}, "sealed": False}
+                self._generations.append(generation)
+            # Commands of different scopes may use different HTTP pools, timeouts or proxies
+            key = scope + (value, command, cloudinary.client.current_config(), cloudinary.client.current_client())
+            if command == "set_exclusive":
+                # Removes the tag from all other resources, so later commands must not run before it
+                key += (next(self._exclusive),)
+                generation["sealed"] = True
+            batch = generation["batches"].get(key)
+            if batch is None:
+                batch = generation["batches"][key] = _Batch(api, value, command, options)
+            batch.add(public_ids, future)
+            for public_id in public_ids:
+                generation["ids"].setdefault(scope + (public_id,), set()).add((value, command))
+            if len(batch.public_ids) >= self.max_ids:
+                self._deadline = 0
+            elif self._deadline is None:
+                self._deadline = time.time() + self.window
+            self._condition.notify_all()
+        return future
+
+    @staticmethod
+    def _conflicts(generation, scope, value, command, public_ids):
+        for public_id in public_ids:
+            for other_value, other_command in generation["ids"].get(scope + (public_id,), ()):
+                if (other_value, other_command) == (value, command):
+                    continue
+                if scope[0] == "tags" and other_value != value and \
+                        command in _COMMUTING_TAG_COMMANDS and other_command in _COMMUTING_TAG_COMMANDS:
+                    continue
+                return True
+        return False
+
+    def _work(self):
+        while True:
+            with self._condition:
+                while not self._generations or self._deadline is None or self._deadline > time.time():
+                    if self._closed and not self._generations:
+                        return
+                    timeout = None
+                    if self._generations and self._deadline is not None:
+                        timeout = max(0, self._deadline - time.time())
+                    self._condition.wait(timeout)
+                generations, self._generations = self._generations, []
+                self._deadline = None
+                self._flushing = True
+            try:
+                for generation in generations:
+                    self._send(list(generation["batches"].values()))
+            finally:
+                with self._condition:
+                    self._flushing = False
+                    self._condition.notify_all()
+
+    def _send(self, batches):
+        requests = [(batch, public_ids) for batch in batches for public_ids in batch.split(self.max_ids)]
+        with self._condition:
+            self._requests += len(requests)
+        for request in requests:
+            self._tasks.put(request)
+        self._tasks.join()
+
+    def _run_requests(self):
+        while True:
+            request = self._tasks.get()
+            try:
+                if request is None:
+                    return
+                batch, public_ids = request
+                batch.send(public_ids)
+            finally:
+                self._tasks.task_done()
+
+
+def _request(batch, public_ids):
+    from cloudinary import uploader
+
+    call = uploader.call_tags_api if batch.api == "tags" else uploader.call_context_api
+    try:
+        response = call(batch.value, batch.command, public_ids, coalesce=False, **batch.options)
+    except Exception:
+        batch.complete(public_ids, exc_info=sys.exc_info())
+    else:
+        batch.complete(public_ids, response)
+
+
+def get_write_behind_buffer():
+    """
+    :return: the shared buffer, with the window set by the ``coalesce_tags_window`` configuration parameter
+    :rtype: WriteBehindBuffer
+    """
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None:
+            window = cloudinary.config().coalesce_tags_window
+            _buffer = WriteBehindBuffer(float(window) if window is not None else DEFAULT_WINDOW)
+        return _buffer
@@ -0,0 +1,78 @@
+# Copyright Cloudinary
+"""
+Decoding of JSON API responses.
+
+The fastest available decoder is used: ``orjson`` or ``ujson`` when installed, the standard library ``json``
+module otherwise. Response bodies are decoded straight from bytes, without decoding them to a string first.
+"""
+import json
+import sys
+
+CODECS = ("orjson", "ujson", "json")
+
+_name = None
+_loads = None
+
+
+def _stdlib_loads():
+    if sys.version_info[0] == 3 and sys.version_info < (3, 6):
+        # json.loads accepts bytes since Python 3.6
+        return lambda data: json.loads(data.decode("utf-8") if isinstance(data, bytes) else data)
+    return json.loads
+
+
+def _load_codec(name):
+    if name == "orjson":
+        import orjson
+        return orjson.loads
+    if name == "ujson":
+        import ujson
+        return ujson.loads
+    if name == "json":
+        return _stdlib_loads()
+    raise ValueError("Unknown JSON codec {0}, expected one of {1}".format(name, ", ".join(CODECS)))
+
+
+def set_codec(name=None):
+    """
+    Select the JSON decoder.
+
+    :param name: one of ``orjson``, ``ujson`` or ``json``, the first installed one by default
+
+    :raises ImportError: if the requested codec is not installed
+    """
+    global _name, _loads
+    if name is not None:
+        _loads = _load_codec(name)
+        _name = name
+        return
+    for name in CODECS:
+        try:
+            _loads = _load_codec(name)
+        except ImportError:
+            continue
+        _name = name
+        return
+
+
+def get_codec():
+    """
+    :return: the name of the JSON decoder in use
+    :rtype: str
+    """
+    return _name
+
+
+def loads(data):
+    """
+    Decode a JSON document.
+
+    :param data: the JSON document, UTF-8 encoded
+    :type data: bytes
+
+    :raises ValueError: if the document is not valid JSON
+    """
+    return _loads(data)
+
+
+set_codec()
@@ -1,4 +1,6 @@
 # Copyright Cloudinary
+import sys
+
 import six.moves.urllib.parse
 from six import PY3, string_types, StringIO, BytesIO
 
@@ -7,10 +9,26 @@ unquote = six.moves.urllib.parse.unquote
 urlparse = six.moves.urllib.parse.urlparse
 parse_qs = six.moves.urllib.parse.parse_qs
 parse_qsl = six.moves.urllib.parse.parse_qsl
+quote = six.moves.urllib.parse.quote
 quote_plus = six.moves.urllib.parse.quote_plus
-httplib = six.moves.http_client
-urllib2 = six.moves.urllib.request
-NotConnected = six.moves.http_client.NotConnected
+
+# The HTTP client modules are slow to import and only used for streaming uploads, so they are imported on first
+# access where module level __getattr__ is supported
+_LAZY_ATTRIBUTES = {
+    "httplib": lambda: six.moves.http_client,
+    "urllib2": lambda: six.moves.urllib.request,
+    "NotConnected": lambda: six.moves.http_client.NotConnected,
+}
+
+if sys.version_info >= (3, 7):
+    def __getattr__(name):
+        if name in _LAZY_ATTRIBUTES:
+            return _LAZY_ATTRIBUTES[name]()
+        raise AttributeError("module 'cloudinary.compat' has no attribute '{0}'".format(name))
+else:
+    httplib = _LAZY_ATTRIBUTES["httplib"]()
+    urllib2 = _LAZY_ATTRIBUTES["urllib2"]()
+    NotConnected = _LAZY_ATTRIBUTES["NotConnected"]()
 
 if PY3:
     to_bytes = lambda s: s.encode('utf8')
@@ -0,0 +1,212 @@
+# Copyright Cloudinary
+"""
+Deferred uploads, which run on a background worker pool instead of the calling thread.
+
+A deferred upload copies the file to a local spool directory and assigns its public ID up front, so a placeholder
+:class:`cloudinary.CloudinaryResource` referencing the final resource is available immediately. The placeholder
+is filled in with the version, format and metadata of the uploaded resource when the upload completes.
+
+When the server names the resource, with the ``use_filename``, ``unique_filename`` or ``upload_preset`` options,
+no public ID is assigned up front and the placeholder has no public ID until the upload completes.
+"""
+import os
+import shutil
+import sys
+import tempfile
+import threading
+
+from six import string_types
+from six.moves import queue
+
+import cloudinary
+from cloudinary import CloudinaryResource, uploader, utils
+from cloudinary.client import bind
+
+logger = cloudinary.logger
+
+DEFAULT_WORKERS = 4
+
+# Upload options with which the server names the resource
+NAMING_OPTIONS = ("use_filename", "unique_filename", "upload_preset")
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class DeferredUploadPool(object):
+    """
+    A pool of daemon worker threads that run submitted calls in order of submission.
+
+    Any object with a ``submit(func)`` method, for example a ``concurrent.futures`` executor, can be used
+    in its place.
+    """
+    def __init__(self, workers=DEFAULT_WORKERS):
+        if workers <= 0:
+            raise ValueError("workers must be a positive integer")
+        self._queue = queue.Queue()
+        self._threads = []
+        for _ in range(workers):
+            thread = threading.Thread(target=self._work)
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, func, *args, **kwargs):
+        self._queue.put((func, args, kwargs))
+
+    def join(self):
+        """Wait until all submitted calls are done."""
+        self._queue.join()
+
+    def _work(self):
+        while True:
+            func, args, kwargs = self._queue.get()
+            try:
+                func(*args, **kwargs)
+            except Exception:
+                logger.exception("Deferred call failed")
+            finally:
+                self._queue.task_done()
+
+
+def get_pool():
+    """
+    :return: the shared pool, with the number of workers set by the ``deferred_upload_workers`` configuration
+             parameter
+    :rtype: DeferredUploadPool
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = DeferredUploadPool(cloudinary.config().deferred_upload_workers or DEFAULT_WORKERS)
+        return _pool
+
+
+class DeferredUpload(object):
+    """
+    An upload prepared to run later.
+
+    :param file: the file to upload, a path or a file-like object, which is copied to a spool directory
+    :param on_complete: called with the filled in ``resource`` when the upload succeeds
+    :param on_error: called with the exception info when the upload fails
+    :param spool: copy the file right away, otherwise when :meth:`spool` or :meth:`run` is called
+    :param options: the upload options. A random ``public_id`` is assigned if none is given, unless the server
+                    names the resource.
+    """
+    def __init__(self, file, on_complete=None, on_error=None, spool=True, **options):
+        self.options = dict(options)
+        if "public_id" not in self.options and not any(self.options.get(name) for name in NAMING_OPTIONS):
+            self.options["public_id"] = utils.random_public_id()
+        self.on_complete = on_complete
+        self.on_error = on_error
+        self.file = file
+        self.path = None
+        self.resource = CloudinaryResource(self.options.get("public_id"), type=self.options.get("type", "upload"),
+                                           resource_type=self.options.get("resource_type", "image"))
+        self.done = False
+        # Upload with the configuration and client of the scope the upload was prepared in
+        self.run = bind(self.run)
+        if spool:
+            self.path = _spool(file)
+            self.file = None
+
+    def spool(self):
+        """
+        Copy the file to the spool directory, unless it was copied already.
+
+        :return: True if the file is spooled, False if copying failed. Errors are passed to ``on_error`` or logged.
+        """
+        if self.file is not None:
+            try:
+                self.path = _spool(self.file)
+            except Exception:
+                self._failed(sys.exc_info())
+            finally:
+                self.file = None
+        return self.path is not None
+
+    def run(self):
+        """Upload the spooled file and fill in ``resource``. Errors are passed to ``on_error`` or logged."""
+        if not self.spool():
+            return
+        try:
+            result = uploader.upload(self.path, **self.options)
+            self.resource.public_id = result["public_id"]
+            self.resource.version = str(result["version"])
+            self.resource.format = result.get("format")
+            self.resource.type = result.get("type", self.resource.type)
+            self.resource.resource_type = result.get("resource_type", self.resource.resource_type)
+            self.resource.metadata = result
+            self.done = True
+            if self.on_complete is not None:
+                self.on_complete(self.resource)
+        except Exception:
+            self._failed(sys.exc_info())
+        finally:
+            self.discard()
+
+    def discard(self):
+        """Remove the spooled file."""
+        self.file = None
+        if self.path is not None:
+            shutil.rmtree(os.path.dirname(self.path), ignore_errors=True)
+            self.path = None
+
+    def _failed(self, exc_info):
+        if self.on_error is None:
+            logger.error("Deferred upload of %s failed", self.options.get("public_id") or self.path, exc_info=exc_info)
+        else:
+            self.on_error(exc_info)
+
+
+def submit_on_commit(upload, pool=None, using=None):
+    """
+    Submit a deferred upload to a pool once the current Django transaction commits.
+
+    Without Django, or outside of a transaction, the upload is submitted immediately. If the transaction
+    is rolled back the upload never runs. An upload created with ``spool=False`` is spooled when the transaction
+    commits, so nothing is left in the spool directory after a rollback.
+
+    :param upload: the upload to run
+    :type upload: DeferredUpload
+    :param pool: the pool that runs the upload, the shared pool by default
+    :param using: the alias of the database whose transaction to wait for
+    """
+    pool = pool or get_pool()
+    try:
+        from django.conf import settings
+        from django.db import transaction
+        on_commit = transaction.on_commit if settings.configured else None
+    except (ImportError, AttributeError):
+        on_commit = None
+
+    def submit():
+        # Copy the file before the request that handed it over ends
+        if upload.spool():
+            pool.submit(upload.run)
+
+    if on_commit is None:
+        submit()
+    else:
+        on_commit(submit, using=using)
+
+
+def _spool(file):
+    directory = tempfile.mkdtemp(prefix="cloudinary-", dir=cloudinary.config().deferred_upload_dir)
+    name = file if isinstance(file, string_types) else getattr(file, "name", None)
+    path = os.path.join(directory, os.path.basename(name or "file") or "file")
+    try:
+        if hasattr(file, "chunks"):
+            # Django File
+            with open(path, "wb") as spooled:
+                for chunk in file.chunks():
+                    spooled.write(chunk)
+        elif hasattr(file, "read"):
+            with open(path, "wb") as spooled:
+                shutil.copyfileobj(file, spooled)
+        else:
+            shutil.copyfile(file, path)
+    except Exception:
+        shutil.rmtree(directory, ignore_errors=True)
+        raise
+    return path
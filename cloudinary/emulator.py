@@ -0,0 +1,1142 @@
+# Copyright Cloudinary
+"""
+A local emulator of the Cloudinary upload and Admin APIs, for tests and load tests without network access.
+
+Implements the upload API actions used by :mod:`cloudinary.uploader` (``upload``, including chunked uploads,
+``explicit``, ``destroy``, ``rename``, ``tags``, ``context``, ``text``, ``sprite``, ``multi``, ``explode`` and
+``generate_archive``), the Admin API endpoints used by :mod:`cloudinary.api` for resources, tags, folders,
+transformations, upload presets, upload mappings and streaming profiles, and the Search API.
+
+Upload API requests must be signed the way :func:`cloudinary.utils.api_sign_request` signs them, unless they use
+an unsigned upload preset, and Admin API requests must authenticate with the API key and secret. The state is kept
+in memory. Files are not stored or processed: uploads report their size and fixed dimensions.
+
+In process::
+
+    with Emulator(cloud_name="demo", api_key="key", api_secret="secret") as emulator:
+        cloudinary.config(cloud_name="demo", api_key="key", api_secret="secret", upload_prefix=emulator.url)
+        cloudinary.uploader.upload(path)
+
+As a separate process, which prints the ``CLOUDINARY_URL`` to use::
+
+    python -m cloudinary.emulator --port 8090 --api-key key --api-secret secret
+
+The library's own tests run against an in-process emulator when the ``CLOUDINARY_EMULATOR`` environment variable
+is set.
+"""
+from __future__ import print_function
+
+import argparse
+import base64
+import copy
+import hmac
+import io
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import zipfile
+from email.utils import formatdate
+
+from six import string_types
+from six.moves import BaseHTTPServer, socketserver
+from six.moves.urllib.parse import parse_qsl, unquote, urlparse
+
+import cloudinary
+from cloudinary import local_search, utils
+
+DEFAULT_CLOUD_NAME = "demo"
+DEFAULT_API_KEY = "key"
+DEFAULT_API_SECRET = "secret"
+DEFAULT_RATE_LIMIT = 5000
+DEFAULT_MAX_RESULTS = 10
+MAX_RESULTS = 500
+# Seconds a signed upload API request remains valid
+SIGNATURE_VALID_FOR = 3600
+WIDTH = 100
+HEIGHT = 100
+
+UPLOAD_ACTIONS = ("upload", "explicit", "destroy", "rename", "tags", "context", "text", "sprite", "multi", "explode",
+                  "generate_archive")
+# Upload API parameters that are not signed
+UNSIGNED_PARAMS = ("file", "cloud_name", "resource_type", "api_key", "signature")
+# Parameters of add-ons, which are not emulated
+ADD_ON_PARAMS = ("raw_convert", "categorization", "detection", "background_removal", "ocr", "auto_tagging")
+
+# Transformation parameter abbreviations, for reporting transformations as dicts
+TRANSFORMATION_PARAMS = {
+    "a": "angle", "ac": "audio_codec", "ar": "aspect_ratio", "b": "background", "bo": "border", "br": "bit_rate",
+    "c": "crop", "co": "color", "d": "default_image", "dpr": "dpr", "du": "duration", "e": "effect",
+    "eo": "end_offset", "f": "fetch_format", "fl": "flags", "g": "gravity", "h": "height", "l": "overlay",
+    "o": "opacity", "pg": "page", "q": "quality", "r": "radius", "so": "start_offset", "sp": "streaming_profile",
+    "t": "transformation", "u": "underlay", "vc": "video_codec", "w": "width", "x": "x", "y": "y", "z": "zoom",
+}
+
+# Predefined streaming profiles, as name: (display name, representations as (width, height, bit rate))
+PREDEFINED_STREAMING_PROFILES = {
+    "4k": ("4K (2160p)", [(3840, 2160, "18m"), (2560, 1440, "12m"), (1920, 1080, "6.5m"), (1280, 720, "3.5m"),
+                          (960, 540, "2m"), (640, 360, "0.9m")]),
+    "full_hd": ("Full HD (1080p)", [(1920, 1080, "6.5m"), (1280, 720, "3.5m"), (960, 540, "2m"),
+                                    (640, 360, "0.9m"), (480, 270, "0.5m")]),
+    "hd": ("HD (720p)", [(1280, 720, "3.5m"), (960, 540, "2m"), (640, 360, "0.9m"), (480, 270, "0.5m")]),
+    "sd": ("SD (480p)", [(854, 480, "1.5m"), (640, 360, "0.9m"), (480, 270, "0.5m")]),
+    "full_hd_wifi": ("Full HD WiFi (1080p)", [(1920, 1080, "5.5m"), (1280, 720, "3m"), (960, 540, "1.5m")]),
+    "full_hd_lean": ("Full HD Lean (1080p)", [(1920, 1080, "4.5m"), (1280, 720, "2.5m"), (640, 360, "0.8m")]),
+    "hd_lean": ("HD Lean (720p)", [(1280, 720, "2.5m"), (960, 540, "1.5m"), (640, 360, "0.8m")]),
+}
+
+_BOUNDARY_RE = re.compile(r'boundary="?([^";]+)"?')
+_DISPOSITION_RE = re.compile(r'(\w+)="([^"]*)"')
+_ARRAY_PARAM_RE = re.compile(r'^(\w+)\[\d*\]$')
+_CONTEXT_SEPARATOR_RE = re.compile(r'(?<!\\)\|')
+_CONTEXT_ASSIGNMENT_RE = re.compile(r'(?<!\\)=')
+
+# Admin API routes, as (method, path pattern relative to the cloud, handler name). The first match applies.
+ADMIN_ROUTES = [
+    ("GET", r"ping", "_ping"),
+    ("GET", r"usage", "_usage"),
+    ("GET", r"resources", "_resource_types"),
+    ("POST", r"resources/search", "_search"),
+    ("GET", r"resources/(?P<resource_type>[^/]+)/tags/(?P<tag>.+)", "_resources_by_tag"),
+    ("DELETE", r"resources/(?P<resource_type>[^/]+)/tags/(?P<tag>.+)", "_delete_resources_by_tag"),
+    ("GET", r"resources/(?P<resource_type>[^/]+)/moderations/(?P<kind>[^/]+)/(?P<status>[^/]+)",
+     "_resources_by_moderation"),
+    ("POST", r"resources/(?P<resource_type>[^/]+)/publish_resources", "_publish_resources"),
+    ("POST", r"resources/(?P<resource_type>[^/]+)/(?P<storage_type>[^/]+)/restore", "_restore"),
+    ("GET", r"resources/(?P<resource_type>[^/]+)(?:/(?P<storage_type>[^/]+))?", "_resources"),
+    ("DELETE", r"resources/(?P<resource_type>[^/]+)/(?P<storage_type>[^/]+)", "_delete_resources"),
+    ("GET", r"resources/(?P<resource_type>[^/]+)/(?P<storage_type>[^/]+)/(?P<public_id>.+)", "_resource"),
+    ("POST", r"resources/(?P<resource_type>[^/]+)/(?P<storage_type>[^/]+)/(?P<public_id>.+)", "_update"),
+    ("DELETE", r"derived_resources", "_delete_derived_resources"),
+    ("GET", r"tags/(?P<resource_type>[^/]+)", "_tag_list"),
+    ("GET", r"folders(?:/(?P<path>.+))?", "_folders"),
+    ("GET", r"transformations", "_transformations"),
+    ("GET", r"transformations/(?P<name>.+)", "_transformation"),
+    ("POST", r"transformations/(?P<name>.+)", "_create_transformation"),
+    ("PUT", r"transformations/(?P<name>.+)", "_update_transformation"),
+    ("DELETE", r"transformations/(?P<name>.+)", "_delete_transformation"),
+    ("GET", r"upload_presets", "_upload_presets"),
+    ("POST", r"upload_presets", "_create_upload_preset"),
+    ("GET", r"upload_presets/(?P<name>.+)", "_upload_preset"),
+    ("PUT", r"upload_presets/(?P<name>.+)", "_update_upload_preset"),
+    ("DELETE", r"upload_presets/(?P<name>.+)", "_delete_upload_preset"),
+    ("GET", r"upload_mappings", "_upload_mappings"),
+    ("POST", r"upload_mappings", "_create_upload_mapping"),
+    ("PUT", r"upload_mappings", "_update_upload_mapping"),
+    ("DELETE", r"upload_mappings", "_delete_upload_mapping"),
+    ("GET", r"streaming_profiles", "_streaming_profiles"),
+    ("POST", r"streaming_profiles", "_create_streaming_profile"),
+    ("GET", r"streaming_profiles/(?P<name>.+)", "_streaming_profile"),
+    ("PUT", r"streaming_profiles/(?P<name>.+)", "_update_streaming_profile"),
+    ("DELETE", r"streaming_profiles/(?P<name>.+)", "_delete_streaming_profile"),
+]
+_ADMIN_ROUTES = [(method, re.compile(pattern + "$"), handler) for method, pattern, handler in ADMIN_ROUTES]
+_ADMIN_ROOTS = set(pattern.split("/")[0].split("(")[0] for _, pattern, _ in ADMIN_ROUTES)
+
+
+class Emulator(object):
+    """
+    The emulated account, served on a local port.
+
+    :param cloud_name: the cloud name, ``cloudinary.config().cloud_name`` by default
+    :param api_key: the API key, ``cloudinary.config().api_key`` by default
+    :param api_secret: the API secret, ``cloudinary.config().api_secret`` by default
+    :param latency: seconds to wait before each response
+    :param error_rate: the probability of failing a request with a 500 error
+    :param rate_limit: the number of Admin API calls allowed per hour, reported in the rate limit headers
+    :param seed: the seed of the generated public IDs and of the error injection
+    """
+    def __init__(self, cloud_name=None, api_key=None, api_secret=None, latency=0.0, error_rate=0.0,
+                 rate_limit=DEFAULT_RATE_LIMIT, seed=None):
+        config = cloudinary.config()
+        self.cloud_name = cloud_name or config.cloud_name or DEFAULT_CLOUD_NAME
+        self.api_key = api_key or config.api_key or DEFAULT_API_KEY
+        self.api_secret = api_secret or config.api_secret or DEFAULT_API_SECRET
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+        self.reset()
+
+    def reset(self):
+        """Remove all resources, transformations, presets, mappings and custom streaming profiles."""
+        self.resources = {}
+        self.transformations = {}
+        self.upload_presets = {}
+        self.upload_mappings = {}
+        self.streaming_profiles = dict((name, {"name": name, "display_name": display_name, "predefined": True,
+                                               "representations": [_representation(*r) for r in representations]})
+                                       for name, (display_name, representations)
+                                       in PREDEFINED_STREAMING_PROFILES.items())
+        self.requests = 0
+        self.rate_limit_remaining = self.rate_limit
+        self._derived = {}
+        self._backups = {}
+        self._chunks = {}
+
+    @property
+    def url(self):
+        """The prefix to pass as ``upload_prefix``."""
+        host, port = self._server.server_address[:2]
+        return "http://{0}:{1}".format(host, port)
+
+    @property
+    def cloudinary_url(self):
+        """The ``CLOUDINARY_URL`` of the emulated account."""
+        return "cloudinary://{0}:{1}@{2}?upload_prefix={3}".format(self.api_key, self.api_secret, self.cloud_name,
+                                                                   self.url)
+
+    def start(self, host="127.0.0.1", port=0):
+        """
+        Serve the emulator on a background thread.
+
+        :param port: the port to listen on, a free port by default
+        """
+        self._server = _Server((host, port), _Handler)
+        self._server.emulator = self
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.05})
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def add_resources(self, count, prefix="resource", tags=None, resource_type="image", type="upload"):
+        """Add ``count`` resources named ``<prefix>_<n>`` without uploading them."""
+        with self._lock:
+            for i in range(count):
+                self._store(self._new_resource("{0}_{1}".format(prefix, i), resource_type, type, 1024, "jpg",
+                                               tags or []))
+
+    def handle(self, method, url, headers, body):
+        """
+        :param url: the path and query string of the request
+        :param headers: the request headers
+        :param body: the request body
+        :type body: bytes
+
+        :return: the HTTP status, the response headers and the JSON result of a request
+        """
+        with self._lock:
+            self.requests += 1
+            fail = self.error_rate and self._random.random() < self.error_rate
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            return _error(500, "Injected error") + ({},)
+
+        url = urlparse(url)
+        segments = [segment for segment in url.path.split("/") if segment]
+        if len(segments) < 3 or segments[0] != "v1_1":
+            return _error(404, "Not found") + ({},)
+        if segments[1] != self.cloud_name:
+            return _error(401, "Invalid cloud_name " + segments[1]) + ({},)
+        path = unquote("/".join(segments[2:]))
+        params, files = _parse_params(url.query, headers, body)
+
+        if segments[2] in _ADMIN_ROOTS:
+            status, result = self._admin(method, path, params, headers)
+            return status, result, self._rate_limit_headers()
+        if len(segments) == 4 and segments[3] in UPLOAD_ACTIONS and (
+                method == "POST" or (segments[3] == "generate_archive" and params.get("mode") == "download")):
+            status, result = self._upload_api(segments[2], segments[3], params, files, headers)
+            return status, result, {}
+        return _error(404, "Not found") + ({},)
+
+    def _rate_limit_headers(self):
+        with self._lock:
+            self.rate_limit_remaining = max(0, self.rate_limit_remaining - 1)
+            remaining = self.rate_limit_remaining
+        reset = formatdate((int(time.time()) // 3600 + 1) * 3600, usegmt=True)
+        return {"X-FeatureRateLimit-Limit": str(self.rate_limit),
+                "X-FeatureRateLimit-Remaining": str(remaining),
+                "X-FeatureRateLimit-Reset": reset}
+
+    def _authenticate(self, headers):
+        authorization = headers.get("Authorization") or ""
+        scheme, _, credentials = authorization.partition(" ")
+        if scheme.lower() != "basic":
+            return _error(401, "Must supply api_key")
+        try:
+            api_key, _, api_secret = base64.b64decode(credentials).decode("utf-8").partition(":")
+        except (TypeError, ValueError):
+            return _error(401, "Invalid credentials")
+        if api_key != self.api_key:
+            return _error(401, "Unknown API key " + api_key)
+        if not hmac.compare_digest(api_secret.encode("utf-8"), self.api_secret.encode("utf-8")):
+            return _error(401, "Invalid credentials")
+        return None
+
+    def _verify_signature(self, params):
+        if "signature" not in params:
+            preset = self.upload_presets.get(params.get("upload_preset"))
+            if preset is not None and preset["unsigned"]:
+                return None
+            return _error(400, "Missing required parameter - signature")
+        if params.get("api_key") != self.api_key:
+            return _error(401, "Unknown API key {0}".format(params.get("api_key")))
+        try:
+            timestamp = int(params.get("timestamp"))
+        except (TypeError, ValueError):
+            return _error(400, "Missing required parameter - timestamp")
+        if timestamp < time.time() - SIGNATURE_VALID_FOR:
+            return _error(400, "Stale request - reported time is {0} which is more than 1 hour ago".format(
+                timestamp))
+        signed = dict((key, value) for key, value in params.items() if key not in UNSIGNED_PARAMS)
+        expected = utils.api_sign_request(signed, self.api_secret)
+        if not hmac.compare_digest(expected.encode("utf-8"), params["signature"].encode("utf-8")):
+            to_sign = "&".join(sorted(key + "=" + (",".join(value) if isinstance(value, list) else value)
+                                      for key, value in signed.items() if value))
+            return _error(401, "Invalid Signature {0}. String to sign - '{1}'.".format(params["signature"],
+                                                                                      to_sign))
+        return None
+
+    def _admin(self, method, path, params, headers):
+        error = self._authenticate(headers)
+        if error:
+            return error
+        method = method.upper()
+        for route_method, pattern, handler in _ADMIN_ROUTES:
+            match = pattern.match(path)
+            if match and route_method == method:
+                arguments = dict((key, value) for key, value in match.groupdict().items() if value is not None)
+                with self._lock:
+                    return getattr(self, handler)(params, **arguments)
+        return _error(404, "Not found")
+
+    def _upload_api(self, resource_type, action, params, files, headers):
+        error = self._verify_signature(params)
+        if error:
+            return error
+        if resource_type == "auto":
+            resource_type = "image"
+        if action == "upload":
+            return self._upload(resource_type, params, files, headers)
+        with self._lock:
+            return getattr(self, "_action_" + action)(resource_type, params)
+
+    # Upload API
+
+    def _upload(self, resource_type, params, files, headers):
+        error = _check_add_ons(params)
+        if error:
+            return error
+        if params.get("upload_preset"):
+            preset = self.upload_presets.get(params["upload_preset"])
+            if preset is None:
+                return _error(400, "Upload preset not found")
+            params = dict(preset["settings"], **params)
+
+        filename, data = files.get("file", (None, params.get("file", "")))
+        if not isinstance(data, bytes):
+            data = data.encode("utf-8")
+        size = len(data)
+        content_range = headers.get("Content-Range")
+        if content_range:
+            match = re.match(r"bytes (\d+)-(\d+)/(\d+)", content_range)
+            if not match:
+                return _error(400, "Invalid Content-Range")
+            start, end, total = (int(value) for value in match.groups())
+            upload_id = headers.get("X-Unique-Upload-Id")
+            with self._lock:
+                received = self._chunks.get(upload_id, 0)
+                if start != received or end - start + 1 != len(data):
+                    return _error(400, "Unexpected chunk")
+                received = self._chunks[upload_id] = end + 1
+                if received < total:
+                    return 200, {"done": False, "public_id": params.get("public_id"), "bytes": received}
+                del self._chunks[upload_id]
+            size = total
+
+        source = filename or (params.get("file") if _is_url(params.get("file")) else None)
+        name, extension = os.path.splitext(os.path.basename(urlparse(source).path)) if source else (None, "")
+        public_id = params.get("public_id")
+        if not public_id:
+            if name and _true(params.get("use_filename")):
+                public_id = name
+                if _true(params.get("unique_filename", "1")):
+                    public_id += "_" + self._random_id(6)
+            else:
+                public_id = self._random_id()
+        if params.get("folder"):
+            public_id = params["folder"].rstrip("/") + "/" + public_id
+        storage_type = params.get("type") or "upload"
+        format = params.get("format") or extension.lstrip(".").lower() or ("jpg" if resource_type == "image" else "")
+
+        with self._lock:
+            existing = self.resources.get((resource_type, storage_type, public_id))
+            if existing is not None and not _true(params.get("overwrite", "1")):
+                return 200, dict(_view(existing), existing=True)
+            resource = self._new_resource(public_id, resource_type, storage_type, size, format,
+                                          _split_tags(params.get("tags")), _decode_context(params.get("context")))
+            if name:
+                resource["original_filename"] = name
+            if params.get("moderation"):
+                resource["moderation"] = [{"kind": params["moderation"], "status": "pending"}]
+            if _true(params.get("backup")):
+                self._backups[_key(resource)] = None
+            self._store(resource)
+            result = _view(resource)
+            if params.get("eager"):
+                result["eager"] = self._derive(resource, params["eager"])
+            return 200, result
+
+    def _action_explicit(self, resource_type, params):
+        resource = self.resources.get((resource_type, params.get("type") or "upload", params.get("public_id")))
+        if resource is None:
+            return _not_found(params.get("public_id"))
+        if params.get("tags"):
+            resource["tags"] = _split_tags(params["tags"])
+        if params.get("context"):
+            resource["context"] = {"custom": _decode_context(params["context"])}
+        result = _view(resource)
+        if params.get("eager"):
+            result["eager"] = self._derive(resource, params["eager"])
+        return 200, result
+
+    def _action_destroy(self, resource_type, params):
+        key = (resource_type, params.get("type") or "upload", params.get("public_id"))
+        if key not in self.resources or self.resources[key]["placeholder"]:
+            return 200, {"result": "not found"}
+        self._remove(key)
+        return 200, {"result": "ok"}
+
+    def _action_rename(self, resource_type, params):
+        storage_type = params.get("type") or "upload"
+        source = (resource_type, storage_type, params.get("from_public_id"))
+        target = (resource_type, params.get("to_type") or storage_type, params.get("to_public_id"))
+        if source not in self.resources:
+            return _not_found(params.get("from_public_id"))
+        if target in self.resources and target != source and not _true(params.get("overwrite")):
+            return _error(400, "to_public_id {0} already exists".format(params.get("to_public_id")))
+        resource = self.resources.pop(source)
+        self._derived[target] = self._derived.pop(source, [])
+        if source in self._backups:
+            self._backups[target] = self._backups.pop(source)
+        resource.update(public_id=target[2], type=target[1])
+        resource.update(self._urls(resource))
+        self._store(resource)
+        return 200, _view(resource)
+
+    def _action_tags(self, resource_type, params):
+        command = params.get("command")
+        tag = params.get("tag")
+        storage_type = params.get("type") or "upload"
+        public_ids = params.get("public_ids") or []
+        if command not in ("add", "remove", "replace", "remove_all", "set_exclusive"):
+            return _error(400, "Invalid command " + str(command))
+        if command == "set_exclusive":
+            for resource in self.resources.values():
+                if resource["resource_type"] == resource_type and tag in resource["tags"]:
+                    resource["tags"].remove(tag)
+        updated = []
+        for public_id in public_ids:
+            resource = self.resources.get((resource_type, storage_type, public_id))
+            if resource is None:
+                continue
+            if command in ("add", "set_exclusive") and tag not in resource["tags"]:
+                resource["tags"].append(tag)
+            elif command == "remove" and tag in resource["tags"]:
+                resource["tags"].remove(tag)
+            elif command == "replace":
+                resource["tags"] = _split_tags(tag)
+            elif command == "remove_all":
+                resource["tags"] = []
+            updated.append(public_id)
+        return 200, {"public_ids": updated}
+
+    def _action_context(self, resource_type, params):
+        command = params.get("command")
+        if command not in ("add", "remove_all"):
+            return _error(400, "Invalid command " + str(command))
+        context = _decode_context(params.get("context"))
+        updated = []
+        for public_id in params.get("public_ids") or []:
+            resource = self.resources.get((resource_type, params.get("type") or "upload", public_id))
+            if resource is None:
+                continue
+            if command == "add":
+                resource.setdefault("context", {"custom": {}})["custom"].update(context)
+            else:
+                resource.pop("context", None)
+            updated.append(public_id)
+        return 200, {"public_ids": updated}
+
+    def _action_text(self, resource_type, params):
+        if not params.get("text"):
+            return _error(400, "Missing required parameter - text")
+        public_id = params.get("public_id") or self._random_id()
+        resource = self._new_resource(public_id, "image", "text", len(params["text"]), "png", [])
+        self._store(resource)
+        return 200, _view(resource)
+
+    def _action_sprite(self, resource_type, params):
+        members = self._tagged(resource_type, params.get("tag"))
+        if not members:
+            return _error(404, "No images found with tag " + str(params.get("tag")))
+        resource = self._new_resource(params["tag"], resource_type, "sprite", 0, "png", [])
+        self._store(resource)
+        base = resource["url"].rsplit(".", 1)[0]
+        image_infos = dict((member["public_id"], {"width": member["width"], "height": member["height"], "x": 0,
+                                                  "y": i * HEIGHT})
+                           for i, member in enumerate(members))
+        return 200, {"public_id": resource["public_id"], "version": resource["version"],
+                     "image_url": resource["url"], "secure_image_url": resource["secure_url"],
+                     "css_url": base + ".css", "secure_css_url": base.replace("http:", "https:", 1) + ".css",
+                     "json_url": base + ".json", "secure_json_url": base.replace("http:", "https:", 1) + ".json",
+                     "image_infos": image_infos}
+
+    def _action_multi(self, resource_type, params):
+        if not self._tagged(resource_type, params.get("tag")):
+            return _error(404, "No images found with tag " + str(params.get("tag")))
+        resource = self._new_resource(params["tag"], resource_type, "multi", 0, params.get("format") or "gif", [])
+        self._store(resource)
+        return 200, {"public_id": resource["public_id"], "version": resource["version"], "url": resource["url"],
+                     "secure_url": resource["secure_url"]}
+
+    def _action_explode(self, resource_type, params):
+        if (resource_type, params.get("type") or "upload", params.get("public_id")) not in self.resources:
+            return _not_found(params.get("public_id"))
+        return 200, {"status": "processing", "batch_id": self._random_id()}
+
+    def _action_generate_archive(self, resource_type, params):
+        public_ids = params.get("public_ids") or []
+        prefixes = params.get("prefixes") or []
+        tags = params.get("tags") or []
+        storage_type = params.get("type") or "upload"
+        members = [resource for resource in self.resources.values()
+                   if resource["resource_type"] == resource_type and resource["type"] == storage_type and
+                   (resource["public_id"] in public_ids or
+                    any(resource["public_id"].startswith(prefix) for prefix in prefixes) or
+                    any(tag in resource["tags"] for tag in tags))]
+        if not members and not _true(params.get("allow_missing")):
+            return _error(404, "No resources found")
+        format = params.get("target_format") or "zip"
+        public_id = params.get("target_public_id") or self._random_id()
+        if not public_id.endswith("." + format):
+            public_id += "." + format
+        transformations = [t for t in (params.get("transformations") or "").split("|") if t] or [None]
+        files = [(transformation, member) for transformation in transformations for member in members]
+        if params.get("mode") == "download":
+            return 200, _zip(files)
+        archive = self._new_resource(public_id, "raw", "upload", sum(member["bytes"] for _, member in files), "",
+                                     _split_tags(params.get("target_tags")))
+        self._store(archive)
+        return 200, dict(_view(archive), file_count=len(files), resource_count=len(members))
+
+    # Admin API
+
+    def _ping(self, params):
+        return 200, {"status": "ok"}
+
+    def _usage(self, params):
+        return 200, {"plan": "Emulator", "last_updated": time.strftime("%Y-%m-%d", time.gmtime()),
+                     "resources": len(self.resources),
+                     "derived_resources": sum(len(derived) for derived in self._derived.values()), "requests": self.requests,
+                     "storage": {"usage": sum(resource["bytes"] for resource in self.resources.values())}}
+
+    def _resource_types(self, params):
+        return 200, {"resource_types": sorted(set(key[0] for key in self.resources))}
+
+    def _search(self, params):
+        resources = [_view(resource) for resource in self.resources.values()]
+        try:
+            return 200, local_search.execute(params, local_search.ResourceIndex(resources))
+        except local_search.UnsupportedQuery as e:
+            return _error(400, str(e))
+
+    def _resources(self, params, resource_type, storage_type=None):
+        resources = [resource for resource in self.resources.values() if resource["resource_type"] == resource_type
+                     and (storage_type is None or resource["type"] == storage_type)]
+        if params.get("public_ids"):
+            public_ids = params["public_ids"]
+            if isinstance(public_ids, string_types):
+                public_ids = [public_ids]
+            return 200, {"resources": [_view(resource) for resource in resources
+                                       if resource["public_id"] in public_ids]}
+        if params.get("prefix"):
+            resources = [resource for resource in resources if resource["public_id"].startswith(params["prefix"])]
+        return 200, self._page(resources, params)
+
+    def _resources_by_tag(self, params, resource_type, tag):
+        return 200, self._page(self._tagged(resource_type, tag), params)
+
+    def _resources_by_moderation(self, params, resource_type, kind, status):
+        resources = [resource for resource in self.resources.values() if resource["resource_type"] == resource_type
+                     and {"kind": kind, "status": status} in resource.get("moderation", [])]
+        return 200, self._page(resources, params)
+
+    def _resource(self, params, resource_type, storage_type, public_id):
+        resource = self.resources.get((resource_type, storage_type, public_id))
+        if resource is None:
+            return _not_found(public_id)
+        return 200, dict(_view(resource), derived=copy.deepcopy(self._derived.get(_key(resource), [])))
+
+    def _update(self, params, resource_type, storage_type, public_id):
+        resource = self.resources.get((resource_type, storage_type, public_id))
+        if resource is None:
+            return _not_found(public_id)
+        error = _check_add_ons(params)
+        if error:
+            return error
+        if "tags" in params:
+            resource["tags"] = _split_tags(params["tags"])
+        if "context" in params:
+            resource["context"] = {"custom": _decode_context(params["context"])}
+        if params.get("moderation_status"):
+            for moderation in resource.get("moderation", []):
+                moderation["status"] = params["moderation_status"]
+        return 200, _view(resource)
+
+    def _delete_resources(self, params, resource_type, storage_type):
+        keys = [key for key in self.resources if key[:2] == (resource_type, storage_type)]
+        if params.get("public_ids"):
+            public_ids = params["public_ids"]
+            keys = [(resource_type, storage_type, public_id) for public_id in public_ids]
+        elif params.get("prefix"):
+            keys = [key for key in keys if key[2].startswith(params["prefix"])]
+        elif not _true(params.get("all")):
+            return _error(400, "Must supply public_ids, prefix or all")
+        return 200, self._delete(keys, params)
+
+    def _delete_resources_by_tag(self, params, resource_type, tag):
+        return 200, self._delete([key for key, resource in self.resources.items()
+                                  if key[0] == resource_type and tag in resource["tags"]], params)
+
+    def _delete(self, keys, params):
+        deleted = {}
+        for key in keys:
+            if key not in self.resources or self.resources[key]["placeholder"]:
+                deleted[key[2]] = "not_found"
+                continue
+            if not _true(params.get("keep_original")):
+                self._remove(key)
+            elif params.get("transformations"):
+                transformations = params["transformations"].split("|")
+                self._derived[key] = [derived for derived in self._derived.get(key, [])
+                                      if derived["transformation"] not in transformations]
+            else:
+                self._derived.pop(key, None)
+            deleted[key[2]] = "deleted"
+        return {"deleted": deleted, "partial": False}
+
+    def _delete_derived_resources(self, params):
+        derived_ids = params.get("derived_resource_ids") or []
+        deleted = dict((derived_id, "not_found") for derived_id in derived_ids)
+        for key, derived in self._derived.items():
+            self._derived[key] = [item for item in derived if item["id"] not in derived_ids]
+            deleted.update((item["id"], "deleted") for item in derived if item["id"] in derived_ids)
+        return 200, {"deleted": deleted}
+
+    def _publish_resources(self, params, resource_type):
+        storage_type = params.get("type") or "authenticated"
+        candidates = [resource for resource in self.resources.values()
+                      if resource["resource_type"] == resource_type and resource["type"] == storage_type]
+        if params.get("public_ids"):
+            candidates = [resource for resource in candidates if resource["public_id"] in params["public_ids"]]
+        elif params.get("prefix"):
+            candidates = [resource for resource in candidates if resource["public_id"].startswith(params["prefix"])]
+        elif params.get("tag"):
+            candidates = [resource for resource in candidates if params["tag"] in resource["tags"]]
+        published = []
+        for resource in candidates:
+            del self.resources[(resource_type, storage_type, resource["public_id"])]
+            resource["type"] = "upload"
+            resource.update(self._urls(resource))
+            self._store(resource)
+            published.append(_view(resource))
+        return 200, {"published": published, "failed": []}
+
+    def _restore(self, params, resource_type, storage_type):
+        result = {}
+        for public_id in params.get("public_ids") or []:
+            key = (resource_type, storage_type, public_id)
+            backup = self._backups.get(key)
+            if backup is None or not self.resources[key]["placeholder"]:
+                result[public_id] = {"error": "no_backup"}
+                continue
+            self._store(copy.deepcopy(backup))
+            result[public_id] = _view(backup)
+        return 200, result
+
+    def _tag_list(self, params, resource_type):
+        tags = sorted(set(tag for resource in self.resources.values() if resource["resource_type"] == resource_type
+                          for tag in resource["tags"] if tag.startswith(params.get("prefix") or "")))
+        return 200, _paginate(tags, params, "tags", lambda tag: tag)
+
+    def _folders(self, params, path=None):
+        prefix = path.rstrip("/") + "/" if path else ""
+        folders = set()
+        for public_id in (key[2] for key in self.resources):
+            if public_id.startswith(prefix) and "/" in public_id[len(prefix):]:
+                folders.add(public_id[len(prefix):].split("/", 1)[0])
+        if path and not folders and not any(key[2].startswith(prefix) for key in self.resources):
+            return _error(404, "Can't find folder with path " + path)
+        return 200, {"folders": [{"name": name, "path": prefix + name} for name in sorted(folders)]}
+
+    def _transformations(self, params):
+        transformations = [_transformation_view(transformation)
+                           for _, transformation in sorted(self.transformations.items())]
+        return 200, _paginate(transformations, params, "transformations", lambda transformation: transformation["name"])
+
+    def _transformation(self, params, name):
+        transformation = self.transformations.get(name)
+        if transformation is None:
+            return _error(404, "Transformation {0} not found".format(name))
+        return 200, dict(_transformation_view(transformation),
+                         info=_parse_transformation(transformation["transformation"]), derived=[])
+
+    def _create_transformation(self, params, name):
+        if name in self.transformations:
+            return _error(409, "Transformation {0} already exists".format(name))
+        if not params.get("transformation"):
+            return _error(400, "Missing required parameter - transformation")
+        self.transformations[name] = {"name": name, "transformation": params["transformation"],
+                                      "allowed_for_strict": False, "used": False, "named": True}
+        return 200, {"message": "created"}
+
+    def _update_transformation(self, params, name):
+        transformation = self.transformations.get(name)
+        if transformation is None:
+            return _error(404, "Transformation {0} not found".format(name))
+        if "allowed_for_strict" in params:
+            transformation["allowed_for_strict"] = _true(params["allowed_for_strict"])
+        if params.get("unsafe_update"):
+            transformation["transformation"] = params["unsafe_update"]
+        return 200, {"message": "updated"}
+
+    def _delete_transformation(self, params, name):
+        if self.transformations.pop(name, None) is None:
+            return _error(404, "Transformation {0} not found".format(name))
+        return 200, {"message": "deleted"}
+
+    def _upload_presets(self, params):
+        presets = [_preset_view(preset) for _, preset in sorted(self.upload_presets.items())]
+        return 200, _paginate(presets, params, "presets", lambda preset: preset["name"])
+
+    def _upload_preset(self, params, name):
+        preset = self.upload_presets.get(name)
+        if preset is None:
+            return _error(404, "Upload preset {0} not found".format(name))
+        return 200, _preset_view(preset)
+
+    def _create_upload_preset(self, params):
+        name = params.get("name") or self._random_id(8)
+        if name in self.upload_presets:
+            return _error(409, "Upload preset {0} already exists".format(name))
+        self.upload_presets[name] = {"name": name, "unsigned": False, "settings": {}}
+        self._set_preset(self.upload_presets[name], params)
+        return 200, {"message": "created", "name": name}
+
+    def _update_upload_preset(self, params, name):
+        preset = self.upload_presets.get(name)
+        if preset is None:
+            return _error(404, "Upload preset {0} not found".format(name))
+        self._set_preset(preset, params)
+        return 200, {"message": "updated"}
+
+    def _set_preset(self, preset, params):
+        for key, value in params.items():
+            if key == "unsigned":
+                preset["unsigned"] = _true(value)
+            elif key not in ("name", "timestamp"):
+                preset["settings"][key] = value
+
+    def _delete_upload_preset(self, params, name):
+        if self.upload_presets.pop(name, None) is None:
+            return _error(404, "Upload preset {0} not found".format(name))
+        return 200, {"message": "deleted"}
+
+    def _upload_mappings(self, params):
+        if params.get("folder"):
+            if params["folder"] not in self.upload_mappings:
+                return _error(404, "Mapping {0} not found".format(params["folder"]))
+            return 200, {"folder": params["folder"], "template": self.upload_mappings[params["folder"]]}
+        mappings = [{"folder": folder, "template": template}
+                    for folder, template in sorted(self.upload_mappings.items())]
+        return 200, _paginate(mappings, params, "mappings", lambda mapping: mapping["folder"])
+
+    def _create_upload_mapping(self, params):
+        if params.get("folder") in self.upload_mappings:
+            return _error(409, "Mapping {0} already exists".format(params["folder"]))
+        if not params.get("folder") or not params.get("template"):
+            return _error(400, "Must supply folder and template")
+        self.upload_mappings[params["folder"]] = params["template"]
+        return 200, {"message": "created"}
+
+    def _update_upload_mapping(self, params):
+        if params.get("folder") not in self.upload_mappings:
+            return _error(404, "Mapping {0} not found".format(params.get("folder")))
+        if params.get("template"):
+            self.upload_mappings[params["folder"]] = params["template"]
+        return 200, {"message": "updated"}
+
+    def _delete_upload_mapping(self, params):
+        if self.upload_mappings.pop(params.get("folder"), None) is None:
+            return _error(404, "Mapping {0} not found".format(params.get("folder")))
+        return 200, {"message": "deleted"}
+
+    def _streaming_profiles(self, params):
+        return 200, {"data": [{"name": profile["name"], "display_name": profile["display_name"],
+                               "predefined": profile["predefined"]}
+                              for _, profile in sorted(self.streaming_profiles.items())]}
+
+    def _streaming_profile(self, params, name):
+        profile = self.streaming_profiles.get(name)
+        if profile is None:
+            return _error(404, "Streaming profile {0} not found".format(name))
+        return 200, {"data": _streaming_profile_view(profile)}
+
+    def _create_streaming_profile(self, params):
+        name = params.get("name")
+        if not name:
+            return _error(400, "Missing required parameter - name")
+        if name in self.streaming_profiles:
+            return _error(409, "Streaming profile {0} already exists".format(name))
+        profile = self.streaming_profiles[name] = {"name": name, "display_name": name, "predefined": False,
+                                                   "representations": []}
+        self._set_streaming_profile(profile, params)
+        return 200, {"message": "created", "data": _streaming_profile_view(profile)}
+
+    def _update_streaming_profile(self, params, name):
+        profile = self.streaming_profiles.get(name)
+        if profile is None:
+            return _error(404, "Streaming profile {0} not found".format(name))
+        self._set_streaming_profile(profile, params)
+        return 200, {"message": "updated", "data": _streaming_profile_view(profile)}
+
+    def _set_streaming_profile(self, profile, params):
+        if params.get("display_name"):
+            profile["display_name"] = params["display_name"]
+        if params.get("representations"):
+            profile["representations"] = json.loads(params["representations"])
+
+    def _delete_streaming_profile(self, params, name):
+        profile = self.streaming_profiles.get(name)
+        if profile is None:
+            return _error(404, "Streaming profile {0} not found".format(name))
+        if profile["predefined"]:
+            return _error(400, "Predefined streaming profile {0} cannot be deleted".format(name))
+        del self.streaming_profiles[name]
+        return 200, {"message": "deleted"}
+
+    # State
+
+    def _page(self, resources, params):
+        resources = sorted(resources, key=lambda resource: resource["public_id"])
+        result = _paginate(resources, params, "resources", lambda resource: resource["public_id"])
+        result["resources"] = [_view(resource) for resource in result["resources"]]
+        return result
+
+    def _tagged(self, resource_type, tag):
+        return sorted((resource for resource in self.resources.values()
+                       if resource["resource_type"] == resource_type and tag in resource["tags"]),
+                      key=lambda resource: resource["public_id"])
+
+    def _random_id(self, length=20):
+        return "".join(self._random.choice("abcdefghijklmnopqrstuvwxyz0123456789") for _ in range(length))
+
+    def _new_resource(self, public_id, resource_type, storage_type, size, format, tags, context=None):
+        resource = {
+            "public_id": public_id, "version": int(time.time()), "resource_type": resource_type,
+            "type": storage_type, "format": format, "bytes": size, "tags": list(tags), "placeholder": False,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        }
+        if resource_type != "raw":
+            resource.update(width=WIDTH, height=HEIGHT)
+        if context:
+            resource["context"] = {"custom": context}
+        resource.update(self._urls(resource))
+        resource["signature"] = utils.api_sign_request({"public_id": public_id, "version": resource["version"]},
+                                                       self.api_secret)
+        return resource
+
+    def _urls(self, resource, transformation=None):
+        path = "/".join([self.cloud_name, resource["resource_type"], resource["type"]] +
+                        ([transformation] if transformation else []) +
+                        ["v{0}".format(resource["version"]), resource["public_id"]])
+        if resource["format"]:
+            path += "." + resource["format"]
+        return {"url": "http://res.cloudinary.com/" + path, "secure_url": "https://res.cloudinary.com/" + path}
+
+    def _store(self, resource):
+        self.resources[_key(resource)] = resource
+
+    def _remove(self, key):
+        """Delete a resource, leaving a placeholder if it was uploaded with ``backup``."""
+        resource = self.resources.pop(key)
+        self._derived.pop(key, None)
+        if key in self._backups:
+            self._backups[key] = resource
+            self.resources[key] = dict(copy.deepcopy(resource), bytes=0, placeholder=True)
+
+    def _derive(self, resource, eager):
+        """
+        Record the derived resources of ``eager`` transformations, and the transformations as used.
+
+        :return: the derived resources
+        """
+        derived = []
+        for item in eager.split("|"):
+            transformation, _, format = item.partition("/")
+            format = format or resource["format"]
+            derived.append(dict(self._urls(dict(resource, format=format), transformation),
+                                transformation=transformation, format=format, bytes=resource["bytes"],
+                                id=self._random_id(32)))
+            if transformation not in self.transformations:
+                self.transformations[transformation] = {"name": transformation, "transformation": transformation,
+                                                        "allowed_for_strict": False, "used": True, "named": False}
+            self.transformations[transformation]["used"] = True
+        self._derived.setdefault(_key(resource), []).extend(derived)
+        return copy.deepcopy(derived)
+
+
+def _error(status, message):
+    return status, {"error": {"message": message}}
+
+
+def _key(resource):
+    return resource["resource_type"], resource["type"], resource["public_id"]
+
+
+def _check_add_ons(params):
+    for name in ADD_ON_PARAMS:
+        if params.get(name):
+            return _error(400, "Illegal value {0} for parameter {1} - add-ons are not available in the emulator"
+                          .format(params[name], name))
+    return None
+
+
+def _zip(files):
+    """
+    :param files: the (transformation, resource) pairs of an archive
+
+    :return: a ZIP archive of the files, which are empty since the emulator does not store uploaded files
+    :rtype: bytes
+    """
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, "w") as archive:
+        for transformation, resource in files:
+            name = resource["public_id"] + ("." + resource["format"] if resource["format"] else "")
+            archive.writestr(transformation + "/" + name if transformation else name, b"")
+    return data.getvalue()
+
+
+def _not_found(public_id):
+    return _error(404, "Resource not found - {0}".format(public_id))
+
+
+def _true(value):
+    return str(value).lower() in ("1", "true")
+
+
+def _is_url(value):
+    return isinstance(value, string_types) and utils.is_remote_url(value) and not value.startswith("data:")
+
+
+def _split_tags(tags):
+    if isinstance(tags, list):
+        return list(tags)
+    return [tag for tag in (tags or "").split(",") if tag]
+
+
+def _decode_context(context):
+    """
+    :return: the dict encoded by :func:`cloudinary.utils.encode_context`
+    """
+    if not context:
+        return {}
+    result = {}
+    for pair in _CONTEXT_SEPARATOR_RE.split(context):
+        parts = _CONTEXT_ASSIGNMENT_RE.split(pair, 1)
+        value = parts[1] if len(parts) > 1 else ""
+        result[parts[0]] = value.replace("\\=", "=").replace("\\|", "|")
+    return result
+
+
+def _parse_transformation(transformation):
+    """
+    :return: a transformation string as a list of dicts, one per chained transformation
+    """
+    result = []
+    for component in transformation.split("/"):
+        params = {}
+        for item in component.split(","):
+            key, _, value = item.partition("_")
+            if value:
+                params[TRANSFORMATION_PARAMS.get(key, key)] = int(value) if value.isdigit() else value
+        result.append(params)
+    return result
+
+
+def _representation(width, height, bit_rate):
+    return {"transformation": "br_{0},c_limit,h_{1},w_{2}".format(bit_rate, height, width)}
+
+
+def _view(resource):
+    return copy.deepcopy(resource)
+
+
+def _transformation_view(transformation):
+    return dict((key, transformation[key]) for key in ("name", "allowed_for_strict", "used", "named"))
+
+
+def _preset_view(preset):
+    settings = dict(preset["settings"])
+    if settings.get("transformation"):
+        settings["transformation"] = _parse_transformation(settings["transformation"])
+    if settings.get("context"):
+        settings["context"] = _decode_context(settings["context"])
+    if settings.get("tags"):
+        settings["tags"] = _split_tags(settings["tags"])
+    return {"name": preset["name"], "unsigned": preset["unsigned"], "settings": settings}
+
+
+def _streaming_profile_view(profile):
+    return {"name": profile["name"], "display_name": profile["display_name"], "predefined": profile["predefined"],
+            "representations": [{"transformation": _parse_transformation(representation["transformation"])}
+                                for representation in profile["representations"]]}
+
+
+def _paginate(items, params, name, key):
+    """
+    :param items: the items, sorted by ``key``
+
+    :return: the page of ``items`` after the ``next_cursor`` parameter, as ``name``, and the ``next_cursor`` of the
+             following page
+    """
+    max_results = min(int(params.get("max_results") or DEFAULT_MAX_RESULTS), MAX_RESULTS)
+    start = 0
+    if params.get("next_cursor"):
+        start = next((i for i, item in enumerate(items) if key(item) > params["next_cursor"]), len(items))
+    page = items[start:start + max_results]
+    result = {name: page}
+    if start + max_results < len(items):
+        result["next_cursor"] = key(page[-1])
+    return result
+
+
+def _parse_params(query, headers, body):
+    """
+    :return: the parameters of a request from its query string and its form, multipart or JSON body, with
+             ``key[]`` parameters collected into lists, and the contents of the file fields, as (filename, data)
+    """
+    pairs = parse_qsl(query, keep_blank_values=True)
+    files = {}
+    content_type = headers.get("Content-Type") or ""
+    if body and content_type.startswith("application/json"):
+        return json.loads(body.decode("utf-8")), files
+    if body and content_type.startswith("application/x-www-form-urlencoded"):
+        pairs += parse_qsl(body.decode("utf-8"), keep_blank_values=True)
+    elif body:
+        fields, files = _parse_multipart(content_type, body)
+        pairs += fields
+
+    params = {}
+    for name, value in pairs:
+        array = _ARRAY_PARAM_RE.match(name)
+        if array:
+            params.setdefault(array.group(1), []).append(value)
+        else:
+            params[name] = value
+    return params, files
+
+
+def _parse_multipart(content_type, body):
+    """
+    :return: the fields of a multipart/form-data body as (name, value) pairs, and the file fields
+    """
+    fields = []
+    files = {}
+    match = _BOUNDARY_RE.search(content_type)
+    if not match:
+        return fields, files
+    delimiter = b"--" + match.group(1).encode("utf-8")
+    for part in body.split(delimiter)[1:]:
+        if part.startswith(b"--"):
+            break
+        head, _, content = part[2:].partition(b"\r\n\r\n")
+        content = content[:-2] if content.endswith(b"\r\n") else content
+        disposition = dict(_DISPOSITION_RE.findall(head.decode("utf-8", "replace")))
+        name = disposition.get("name")
+        if name is None:
+            continue
+        if "filename" in disposition:
+            files[name] = (unquote(disposition["filename"]), content)
+        else:
+            fields.append((name, content.decode("utf-8")))
+    return fields, files
+
+
+class _Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Avoid the delayed ACK wait between the headers and the body of responses
+    disable_nagle_algorithm = True
+
+    def _respond(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        status, result, headers = self.server.emulator.handle(self.command, self.path, self.headers, body)
+        if isinstance(result, bytes):
+            data, content_type = result, "application/zip"
+        else:
+            data, content_type = json.dumps(result).encode("utf-8"), "application/json"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _respond
+
+    def log_message(self, *args):
+        pass
+
+
+class _Server(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Emulate the Cloudinary upload and Admin APIs locally")
+    parser.add_argument("--host", default="127.0.0.1", help="the address to listen on")
+    parser.add_argument("--port", type=int, default=0, help="the port to listen on, a free port by default")
+    parser.add_argument("--cloud-name", help="the cloud name")
+    parser.add_argument("--api-key", help="the API key")
+    parser.add_argument("--api-secret", help="the API secret")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to wait before each response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="probability of server errors")
+    args = parser.parse_args(argv)
+
+    emulator = Emulator(args.cloud_name, args.api_key, args.api_secret, args.latency, args.error_rate)
+    emulator.start(args.host, args.port)
+    print("CLOUDINARY_URL=" + emulator.cloudinary_url)
+    sys.stdout.flush()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        emulator.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
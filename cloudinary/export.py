@@ -0,0 +1,255 @@
+# Copyright Cloudinary
+"""
+Streaming export of search and listing results to NDJSON, CSV or Parquet files.
+
+Results are written page by page, so memory use does not depend on the number of exported resources.
+After every page of an ndjson or csv export the output is flushed and a checkpoint with the next cursor is
+written next to the output file (``<path>.checkpoint``). Running the same export again resumes from the
+checkpoint. Parquet files can not be appended to, so parquet exports start over.
+
+Example::
+
+    export_search(Search().expression("resource_type:image"), "images.ndjson")
+    export_resources("videos.csv", format="csv", resource_type="video")
+"""
+import csv
+import hashlib
+import json
+import os
+
+import six
+
+from cloudinary import api
+from cloudinary.search import DEFAULT_PAGE_SIZE
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+FORMATS = ("ndjson", "csv", "parquet")
+
+DEFAULT_FIELDS = ("public_id", "resource_type", "type", "format", "version", "bytes", "width", "height",
+                  "created_at", "tags", "context")
+
+PARQUET_INTEGER_FIELDS = ("version", "bytes", "width", "height")
+
+CHECKPOINT_SUFFIX = ".checkpoint"
+
+# Overwrites the destination on all platforms. Python 2 only has os.rename, which does so on POSIX systems.
+_replace = getattr(os, "replace", os.rename)
+
+
+class ResourceListing(object):
+    """
+    Iterates over the pages of an Admin API ``resources`` listing.
+
+    Provides the same ``pages()``, ``next_cursor`` and ``exhausted`` interface as
+    :class:`cloudinary.search.SearchIterator`.
+    """
+    def __init__(self, page_size=DEFAULT_PAGE_SIZE, **options):
+        self._options = dict(options, max_results=page_size)
+        self.next_cursor = self._options.pop("next_cursor", None)
+        self.exhausted = False
+
+    def __iter__(self):
+        for page in self.pages():
+            for resource in page.get("resources", []):
+                yield resource
+
+    def pages(self):
+        while not self.exhausted:
+            options = dict(self._options)
+            if self.next_cursor:
+                options["next_cursor"] = self.next_cursor
+            page = api.resources(**options)
+            cursor = page.get("next_cursor")
+            yield page
+            self.next_cursor = cursor
+            self.exhausted = not cursor
+
+
+def export_search(search, path, format="ndjson", fields=None, page_size=DEFAULT_PAGE_SIZE, resume=True,
+                  **options):
+    """
+    Export all results of a search to a file.
+
+    :param search: the search to export
+    :type search: cloudinary.search.Search
+    :param path: the output file path
+    :param format: one of ``ndjson``, ``csv`` or ``parquet`` (requires pyarrow)
+    :param fields: the resource fields to export as columns (csv and parquet only)
+    :param page_size: the number of resources to request per page
+    :param resume: resume from an existing checkpoint of the same export, ndjson and csv only
+    :param options: additional options passed to the request
+
+    :return: the total number of exported resources
+    """
+    return _export(search.iterate(page_size=page_size, **options), path, format, fields, resume,
+                   [search.canonical_key(), page_size,
+                    dict((name, value) for name, value in options.items() if name != "prefetch")])
+
+
+def export_resources(path, format="ndjson", fields=None, page_size=DEFAULT_PAGE_SIZE, resume=True, **options):
+    """
+    Export a ``resources`` listing to a file.
+
+    Accepts the same options as :func:`cloudinary.api.resources`. The other parameters are the same
+    as in :func:`export_search`.
+
+    :return: the total number of exported resources
+    """
+    return _export(ResourceListing(page_size=page_size, **options), path, format, fields, resume,
+                   [page_size, options])
+
+
+def _export(pages, path, format, fields, resume, query):
+    if format not in FORMATS:
+        raise ValueError("format must be one of {0}".format(", ".join(FORMATS)))
+    if format == "parquet" and pyarrow is None:
+        raise ImportError("pyarrow is required to export to parquet")
+    fields = list(fields or DEFAULT_FIELDS)
+
+    checkpoint_path = path + CHECKPOINT_SUFFIX
+    resumable = format != "parquet"
+    # Identifies the export, hashed as the options may contain credentials
+    export_key = hashlib.sha256(json.dumps([query, format, fields], sort_keys=True, default=str).encode(
+        "utf-8")).hexdigest()
+    checkpoint = _read_checkpoint(checkpoint_path) if resume and resumable else None
+    if checkpoint and checkpoint.get("export") != export_key:
+        raise ValueError("The checkpoint {0} belongs to another export, pass resume=False to start over".format(
+            checkpoint_path))
+
+    if checkpoint:
+        output = open(path, "r+b")
+        output.truncate(checkpoint["offset"])
+        output.seek(checkpoint["offset"])
+        count = checkpoint["count"]
+    else:
+        output = open(path, "wb")
+        count = 0
+
+    writer = {"ndjson": _NdjsonWriter, "csv": _CsvWriter, "parquet": _ParquetWriter}[format](output, fields)
+    try:
+        if checkpoint:
+            pages.next_cursor = checkpoint["next_cursor"]
+        else:
+            writer.write_header()
+        for page in pages.pages():
+            resources = page.get("resources", [])
+            writer.write(resources)
+            count += len(resources)
+            output.flush()
+            os.fsync(output.fileno())
+            if resumable and page.get("next_cursor"):
+                _write_checkpoint(checkpoint_path, export_key, page["next_cursor"], count, output.tell())
+        writer.close()
+    except Exception:
+        writer.discard()
+        raise
+    finally:
+        output.close()
+
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return count
+
+
+def _read_checkpoint(checkpoint_path):
+    if not os.path.exists(checkpoint_path):
+        return None
+    with open(checkpoint_path) as checkpoint_file:
+        return json.load(checkpoint_file)
+
+
+def _write_checkpoint(checkpoint_path, export_key, next_cursor, count, offset):
+    temp_path = checkpoint_path + ".tmp"
+    with open(temp_path, "w") as checkpoint_file:
+        json.dump({"export": export_key, "next_cursor": next_cursor, "count": count, "offset": offset},
+                  checkpoint_file)
+    _replace(temp_path, checkpoint_path)
+
+
+def _field_value(resource, field):
+    value = resource.get(field)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, sort_keys=True)
+    return value
+
+
+class _NdjsonWriter(object):
+    def __init__(self, output, fields):
+        self._output = output
+
+    def write_header(self):
+        pass
+
+    def write(self, resources):
+        self._output.write(b"".join(json.dumps(resource).encode("utf-8") + b"\n" for resource in resources))
+
+    def close(self):
+        pass
+
+    def discard(self):
+        pass
+
+
+class _CsvWriter(object):
+    def __init__(self, output, fields):
+        self._output = output
+        self._fields = fields
+
+    def write_header(self):
+        self._write_rows([self._fields])
+
+    def write(self, resources):
+        self._write_rows([[_field_value(resource, field) for field in self._fields] for resource in resources])
+
+    def _write_rows(self, rows):
+        buf = six.StringIO()
+        writer = csv.writer(buf)
+        for row in rows:
+            if six.PY2:
+                row = [value.encode("utf-8") if isinstance(value, six.text_type) else value for value in row]
+            writer.writerow(row)
+        value = buf.getvalue()
+        self._output.write(value.encode("utf-8") if isinstance(value, six.text_type) else value)
+
+    def close(self):
+        pass
+
+    def discard(self):
+        pass
+
+
+class _ParquetWriter(object):
+    def __init__(self, output, fields):
+        self._fields = fields
+        self._schema = pyarrow.schema(
+            [(field, pyarrow.int64() if field in PARQUET_INTEGER_FIELDS else pyarrow.string()) for field in fields])
+        self._writer = pyarrow.parquet.ParquetWriter(output, self._schema)
+
+    def write_header(self):
+        pass
+
+    def write(self, resources):
+        if not resources:
+            return
+        columns = {}
+        for field in self._fields:
+            values = [_field_value(resource, field) for resource in resources]
+            if field not in PARQUET_INTEGER_FIELDS:
+                values = [six.text_type(value) if value is not None else None for value in values]
+            columns[field] = values
+        self._writer.write_table(pyarrow.Table.from_pydict(columns, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+    def discard(self):
+        # Release the writer of an interrupted export, the file is written again from the start
+        try:
+            self._writer.close()
+        except Exception:
+            pass
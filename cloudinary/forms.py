@@ -1,6 +1,6 @@
-import json
 import re
 
+import cloudinary.deferred
 import cloudinary.uploader
 import cloudinary.utils
 from cloudinary import CloudinaryResource
@@ -23,18 +23,14 @@ class CloudinaryInput(forms.TextInput):
         options = attrs.get('options', {})
         attrs["options"] = ''
 
-        params = cloudinary.utils.build_upload_params(**options)
-        if options.get("unsigned"):
-            params = cloudinary.utils.cleanup_params(params)
-        else:
-            params = cloudinary.utils.sign_request(params, options)
+        form_data = cloudinary.utils.signed_upload_form_data(**options)
 
         if 'resource_type' not in options:
             options['resource_type'] = 'auto'
         cloudinary_upload_url = cloudinary.utils.cloudinary_api_url("upload", **options)
 
         attrs["data-url"] = cloudinary_upload_url
-        attrs["data-form-data"] = json.dumps(params)
+        attrs["data-form-data"] = form_data
         attrs["data-cloudinary-field"] = name
         chunk_size = options.get("chunk_size", None)
         if chunk_size:
@@ -127,8 +123,25 @@ class CloudinaryFileField(forms.FileField):
     default_error_messages = forms.FileField.default_error_messages.copy()
     default_error_messages.update(my_default_error_messages)
 
-    def __init__(self, options=None, autosave=True, *args, **kwargs):
+    def __init__(self, options=None, autosave=True, deferred=False, deferred_pool=None, on_complete=None,
+                 on_error=None, *args, **kwargs):
+        """
+        :param options: the upload options
+        :param autosave: upload the file during validation and return a CloudinaryResource
+        :param deferred: with ``autosave``, return a placeholder CloudinaryResource right away and upload the file
+                         in the background once the current transaction commits
+        :param deferred_pool: the pool running deferred uploads, :func:`cloudinary.deferred.get_pool` by default
+        :param on_complete: required with ``deferred``, called with the filled in resource when the upload succeeds,
+                            e.g. to store it in place of the placeholder
+        :param on_error: called with the exception info when a deferred upload fails
+        """
+        if autosave and deferred and on_complete is None:
+            raise ValueError("Deferred uploads require an on_complete callback that stores the uploaded resource")
         self.autosave = autosave
+        self.deferred = deferred
+        self.deferred_pool = deferred_pool
+        self.on_complete = on_complete
+        self.on_error = on_error
         self.options = options or {}
         super(CloudinaryFileField, self).__init__(*args, **kwargs)
 
@@ -138,7 +151,12 @@ class CloudinaryFileField(forms.FileField):
         if not value:
             return None
         value.name = django.utils.encoding.escape_uri_path(value.name)
-        if self.autosave:
+        if self.autosave and self.deferred:
+            upload = cloudinary.deferred.DeferredUpload(value, on_complete=self.on_complete, on_error=self.on_error,
+                                                        spool=False, **self.options)
+            cloudinary.deferred.submit_on_commit(upload, self.deferred_pool)
+            return upload.resource
+        elif self.autosave:
             return cloudinary.uploader.upload_image(value, **self.options)
         else:
             return value
@@ -0,0 +1,404 @@
+# Copyright Cloudinary
+"""
+Instrumentation of the HTTP calls of the upload and Admin APIs.
+
+Hooks registered with :func:`register` are called with a :class:`RequestEvent` for each of these events:
+
+* ``request_start`` - before a request is sent
+* ``request_end`` - after the response is received, or the request failed
+* ``retry`` - for each retry urllib3 made of the request, reported when the request ends
+* ``rate_limited`` - when the request was rejected for exceeding the rate limit
+
+Events identify the call by its URI template, e.g. ``resources/image/upload/{id}``, without the host, cloud name,
+query string or parameters. When no hook is registered the calls are made as before, at the cost of a single check.
+Calls made by a :class:`cloudinary.Cloudinary` client are also reported to the ``metrics`` of the client.
+
+:class:`MetricsRegistry` is a hook that collects histograms of the calls, and exports them in the Prometheus text
+format::
+
+    metrics = MetricsRegistry()
+    instrumentation.register(metrics)
+    ...
+    metrics.to_prometheus()
+"""
+import bisect
+import threading
+import timeit
+
+from six.moves.urllib.parse import urlparse
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+import cloudinary
+from cloudinary.client import current_client
+
+logger = cloudinary.logger
+
+REQUEST_START = "request_start"
+REQUEST_END = "request_end"
+RETRY = "retry"
+RATE_LIMITED = "rate_limited"
+
+RATE_LIMITED_STATUSES = (420, 429)
+
+# Path segments kept in URI templates, other segments are identifiers, e.g. public IDs and tags
+URI_TEMPLATE_SEGMENTS = frozenset((
+    "image", "video", "raw", "auto", "all",
+    "upload", "private", "authenticated", "fetch", "facebook", "twitter", "twitter_name", "gravatar", "youtube",
+    "hulu", "vimeo", "animoto", "worldstarhiphop", "dailymotion", "text", "sprite", "multi", "list",
+    "ping", "usage", "resources", "derived_resources", "tags", "context", "moderations", "publish_resources",
+    "restore", "transformations", "upload_presets", "upload_mappings", "folders", "streaming_profiles", "search",
+    "explicit", "destroy", "rename", "explode", "generate_archive", "upload_large", "upload_chunked",
+))
+IDENTIFIER = "{id}"
+
+_hooks = []
+_hooks_lock = threading.Lock()
+_local = threading.local()
+_timer = timeit.default_timer
+
+
+class RequestEvent(object):
+    """
+    An event of an HTTP call.
+
+    :ivar name: the event, ``request_start``, ``request_end``, ``retry`` or ``rate_limited``
+    :ivar api: ``upload`` or ``admin``
+    :ivar method: the HTTP method
+    :ivar uri_template: the path of the call, with identifiers replaced by ``{id}``
+    :ivar status: the HTTP status, None before the response is received or if the request failed
+    :ivar error: the exception raised by the request, or the reason of a retry
+    :ivar bytes_sent: the size of the request, including headers
+    :ivar bytes_received: the size of the response body
+    :ivar timings: the seconds spent in each stage, ``connect``, ``send``, ``wait`` for the response headers,
+                   ``receive`` of the body, and ``total``. Empty before the request ends.
+    :ivar retries: the number of retries made
+    """
+    __slots__ = ("name", "api", "method", "uri_template", "status", "error", "bytes_sent", "bytes_received",
+                 "timings", "retries")
+
+    def __init__(self, name, api, method, uri_template, status=None, error=None, bytes_sent=0, bytes_received=0,
+                 timings=None, retries=0):
+        self.name = name
+        self.api = api
+        self.method = method
+        self.uri_template = uri_template
+        self.status = status
+        self.error = error
+        self.bytes_sent = bytes_sent
+        self.bytes_received = bytes_received
+        self.timings = timings or {}
+        self.retries = retries
+
+    def __repr__(self):
+        return "<RequestEvent {0} {1} {2} {3}>".format(self.name, self.method, self.uri_template, self.status)
+
+
+def register(hook):
+    """
+    Register a hook, called with a :class:`RequestEvent` for each event of each call.
+
+    Hooks are called in the thread making the call. Exceptions raised by hooks are logged.
+    """
+    global _hooks
+    with _hooks_lock:
+        _hooks = _hooks + [hook]
+
+
+def unregister(hook):
+    global _hooks
+    with _hooks_lock:
+        _hooks = [registered for registered in _hooks if registered is not hook]
+
+
+def uri_template(url):
+    """
+    :param url: the URL of an API call
+    :return: the path of the URL after the cloud name, with identifiers replaced by ``{id}``
+    :rtype: str
+    """
+    segments = urlparse(url).path.split("/")
+    # /v1_1/<cloud_name>/...
+    segments = segments[3:] if len(segments) > 3 and segments[1] == "v1_1" else segments[1:]
+    template = []
+    for segment in segments:
+        if segment in URI_TEMPLATE_SEGMENTS:
+            template.append(segment)
+        elif not template or template[-1] != IDENTIFIER:
+            # Public IDs may contain slashes
+            template.append(IDENTIFIER)
+    return "/".join(template)
+
+
+def request(http, api, method, url, fields=None, headers=None, **kw):
+    """
+    Make a request with ``http.request``, reporting it to the registered hooks.
+
+    :param http: the urllib3 pool manager
+    :param api: ``upload`` or ``admin``
+    """
+    hooks = _hooks
+    client = current_client()
+    if client is not None:
+        hooks = hooks + [client.metrics]
+    if not hooks:
+        return http.request(method, url, fields, headers, **kw)
+
+    template = uri_template(url)
+    _emit(hooks, RequestEvent(REQUEST_START, api, method, template))
+    timing = _local.timing = {"connect": 0.0, "send": 0.0, "wait": 0.0, "bytes_sent": 0}
+    start = _timer()
+    try:
+        response = http.request(method, url, fields, headers, **kw)
+    except Exception as e:
+        _local.timing = None
+        timings = _timings(timing, _timer() - start)
+        _emit(hooks, RequestEvent(REQUEST_END, api, method, template, error=e, bytes_sent=timing["bytes_sent"],
+                                  timings=timings))
+        raise
+    _local.timing = None
+    timings = _timings(timing, _timer() - start)
+
+    retries = getattr(response, "retries", None)
+    history = retries.history if retries is not None else ()
+    for attempt in history:
+        _emit(hooks, RequestEvent(RETRY, api, method, template, status=attempt.status, error=attempt.error))
+    if response.status in RATE_LIMITED_STATUSES:
+        _emit(hooks, RequestEvent(RATE_LIMITED, api, method, template, status=response.status))
+    _emit(hooks, RequestEvent(REQUEST_END, api, method, template, status=response.status,
+                              bytes_sent=timing["bytes_sent"], bytes_received=len(response.data or b""),
+                              timings=timings, retries=len(history)))
+    return response
+
+
+def _timings(timing, total):
+    stages = dict(connect=timing["connect"], send=timing["send"], wait=timing["wait"], total=total)
+    stages["receive"] = max(0.0, total - timing["connect"] - timing["send"] - timing["wait"])
+    return stages
+
+
+def _emit(hooks, event):
+    for hook in hooks:
+        try:
+            hook(event)
+        except Exception:
+            logger.exception("Instrumentation hook failed")
+
+
+def instrument(http):
+    """
+    Make a urllib3 pool manager report the stages and the bytes sent of its requests.
+
+    Pool managers without connection pools, e.g. the AppEngine manager, are left unchanged.
+    """
+    if hasattr(http, "pool_classes_by_scheme"):
+        http.pool_classes_by_scheme = {"http": _HTTPConnectionPool, "https": _HTTPSConnectionPool}
+
+
+class _TimingConnectionMixin(object):
+    """Adds the time spent in each stage of requests made with :func:`request` to the timing of the thread."""
+    def connect(self):
+        timing = getattr(_local, "timing", None)
+        if timing is None:
+            return super(_TimingConnectionMixin, self).connect()
+        start = _timer()
+        try:
+            return super(_TimingConnectionMixin, self).connect()
+        finally:
+            timing["connect"] += _timer() - start
+
+    def request(self, *args, **kwargs):
+        return self._timed_send(super(_TimingConnectionMixin, self).request, args, kwargs)
+
+    def request_chunked(self, *args, **kwargs):
+        return self._timed_send(super(_TimingConnectionMixin, self).request_chunked, args, kwargs)
+
+    def _timed_send(self, send, args, kwargs):
+        timing = getattr(_local, "timing", None)
+        if timing is None:
+            return send(*args, **kwargs)
+        connect = timing["connect"]
+        start = _timer()
+        try:
+            return send(*args, **kwargs)
+        finally:
+            # Plain HTTP connections are opened while sending
+            timing["send"] += _timer() - start - (timing["connect"] - connect)
+
+    def send(self, data):
+        timing = getattr(_local, "timing", None)
+        if timing is not None and hasattr(data, "__len__"):
+            timing["bytes_sent"] += len(data)
+        return super(_TimingConnectionMixin, self).send(data)
+
+    def getresponse(self, *args, **kwargs):
+        timing = getattr(_local, "timing", None)
+        if timing is None:
+            return super(_TimingConnectionMixin, self).getresponse(*args, **kwargs)
+        start = _timer()
+        try:
+            return super(_TimingConnectionMixin, self).getresponse(*args, **kwargs)
+        finally:
+            timing["wait"] += _timer() - start
+
+
+class _HTTPConnection(_TimingConnectionMixin, HTTPConnection):
+    pass
+
+
+class _HTTPSConnection(_TimingConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _HTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _HTTPConnection
+
+
+class _HTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _HTTPSConnection
+
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (1024, 10240, 102400, 1048576, 10485760, 104857600)
+
+
+class Histogram(object):
+    """
+    A histogram of observed values, counted in cumulative buckets like Prometheus histograms.
+
+    :param buckets: the upper bounds of the buckets, in increasing order
+    """
+    def __init__(self, buckets=DURATION_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self):
+        """
+        :return: the number of values less than or equal to each bucket bound, and in total
+        :rtype: list
+        """
+        result = []
+        total = 0
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+
+class MetricsRegistry(object):
+    """
+    A hook collecting metrics of the API calls.
+
+    * ``cloudinary_request_duration_seconds`` - histogram of call durations by api, method, uri and status
+    * ``cloudinary_request_stage_seconds`` - histogram of the time spent in each stage by api and stage
+    * ``cloudinary_request_sent_bytes`` and ``cloudinary_response_received_bytes`` - histograms of the payload
+      sizes by api and uri
+    * ``cloudinary_request_retries_total`` and ``cloudinary_rate_limited_total`` - counters by api and uri
+    * ``cloudinary_request_errors_total`` - counter of failed requests by api and uri
+    """
+    STAGES = ("connect", "send", "wait", "receive")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+
+    def __call__(self, event):
+        labels = (("api", event.api), ("uri", event.uri_template))
+        if event.name == REQUEST_END:
+            with self._lock:
+                if event.status is None:
+                    self._inc("cloudinary_request_errors_total", labels)
+                    return
+                self._observe("cloudinary_request_duration_seconds",
+                              labels + (("method", event.method), ("status", str(event.status))),
+                              event.timings["total"], DURATION_BUCKETS)
+                for stage in self.STAGES:
+                    self._observe("cloudinary_request_stage_seconds", (("api", event.api), ("stage", stage)),
+                                  event.timings[stage], DURATION_BUCKETS)
+                self._observe("cloudinary_request_sent_bytes", labels, event.bytes_sent, SIZE_BUCKETS)
+                self._observe("cloudinary_response_received_bytes", labels, event.bytes_received, SIZE_BUCKETS)
+        elif event.name == RETRY:
+            with self._lock:
+                self._inc("cloudinary_request_retries_total", labels)
+        elif event.name == RATE_LIMITED:
+            with self._lock:
+                self._inc("cloudinary_rate_limited_total", labels)
+
+    def _observe(self, name, labels, value, buckets):
+        histogram = self._histograms.get((name, labels))
+        if histogram is None:
+            histogram = self._histograms[(name, labels)] = Histogram(buckets)
+        histogram.observe(value)
+
+    def _inc(self, name, labels):
+        self._counters[(name, labels)] = self._counters.get((name, labels), 0) + 1
+
+    def histogram(self, name, **labels):
+        """
+        :return: the histogram with the given name and labels, or None if nothing was observed
+        :rtype: Histogram
+        """
+        with self._lock:
+            for (histogram_name, histogram_labels), histogram in self._histograms.items():
+                if histogram_name == name and dict(histogram_labels) == labels:
+                    return histogram
+
+    def counter(self, name, **labels):
+        """
+        :return: the sum of the counters with the given name matching the given labels
+        :rtype: int
+        """
+        with self._lock:
+            return sum(value for (counter_name, counter_labels), value in self._counters.items()
+                       if counter_name == name and set(labels.items()) <= set(counter_labels))
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def to_prometheus(self):
+        """
+        :return: the metrics in the Prometheus text exposition format
+        :rtype: str
+        """
+        with self._lock:
+            histograms = sorted(self._histograms.items(), key=lambda item: item[0])
+            counters = sorted(self._counters.items(), key=lambda item: item[0])
+            lines = []
+            last_name = None
+            for (name, labels), histogram in histograms:
+                if name != last_name:
+                    lines.append("# TYPE {0} histogram".format(name))
+                    last_name = name
+                bounds = [_format_value(bound) for bound in histogram.buckets] + ["+Inf"]
+                for bound, count in zip(bounds, histogram.cumulative_counts()):
+                    lines.append("{0}_bucket{1} {2}".format(name, _format_labels(labels + (("le", bound),)), count))
+                lines.append("{0}_sum{1} {2}".format(name, _format_labels(labels), _format_value(histogram.sum)))
+                lines.append("{0}_count{1} {2}".format(name, _format_labels(labels), histogram.count))
+            for (name, labels), value in counters:
+                if name != last_name:
+                    lines.append("# TYPE {0} counter".format(name))
+                    last_name = name
+                lines.append("{0}{1} {2}".format(name, _format_labels(labels), value))
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels):
+    return "{" + ",".join('{0}="{1}"'.format(key, _escape_label(value)) for key, value in labels) + "}"
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value):
+    return repr(float(value)) if not isinstance(value, int) else str(value)
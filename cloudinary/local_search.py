@@ -0,0 +1,444 @@
+# Copyright Cloudinary
+"""
+Local evaluation of Search API queries.
+
+Parses the Search expression language and evaluates queries built with :class:`cloudinary.search.Search`
+against a local resource index, returning results in the same shape as ``Search.execute()``.
+An index is either a :class:`ResourceIndex` built from a list of resources, or a
+:class:`cloudinary.mirror.Mirror`.
+
+Supported syntax: ``field:value`` (case insensitive token match, ``*`` suffix for prefix match),
+``field=value`` (exact match), ``!=``, ``<``, ``<=``, ``>``, ``>=``, quoted values, ``AND``, ``OR``,
+``NOT`` / ``-``, parentheses and bare terms. Size values accept ``kb``/``mb``/``gb`` suffixes, and date fields
+accept ISO dates or relative values such as ``1d``, ``2w``, ``3m``, ``1y``. Fields are limited to
+:const:`FIELDS`, ``context.<key>`` and their aliases. Anything else, e.g. structured metadata or moderation fields,
+raises :class:`UnsupportedQuery`.
+"""
+import base64
+import calendar
+import re
+import time
+from datetime import datetime
+
+from six import string_types
+
+DEFAULT_MAX_RESULTS = 50
+MAX_RESULTS = 500
+
+DATE_FIELDS = ("created_at", "uploaded_at")
+AGGREGATE_FIELDS = ("resource_type", "type", "format")
+FIELD_ALIASES = {"uploaded_at": "created_at", "size": "bytes"}
+# The fields of resources that are searched locally like the Search API does
+FIELDS = ("asset_id", "public_id", "folder", "filename", "resource_type", "type", "format", "version", "bytes",
+          "width", "height", "pixels", "aspect_ratio", "duration", "access_mode", "status", "tags", "context",
+          "created_at")
+
+_TOKEN_RE = re.compile(r'\s*(?:(\()|(\))|("(?:[^"\\]|\\.)*")|([^\s()"]+))')
+_TERM_RE = re.compile(r'^(-?)([\w.]+?)(!=|>=|<=|:|=|<|>)(.*)$')
+_SIZE_RE = re.compile(r'^(\d+(?:\.\d+)?)(kb|mb|gb)?$', re.IGNORECASE)
+_RELATIVE_DATE_RE = re.compile(r'^(\d+)([hdwmy])$')
+_SPLIT_RE = re.compile(r'[^\w]+', re.UNICODE)
+
+_SIZE_UNITS = {"kb": 1024, "mb": 1024 ** 2, "gb": 1024 ** 3}
+_DATE_UNITS = {"h": 3600, "d": 86400, "w": 7 * 86400, "m": 30 * 86400, "y": 365 * 86400}
+_CURSOR_PREFIX = "local:"
+
+_compiled_cache = {}
+_COMPILED_CACHE_SIZE = 1024
+
+
+class UnsupportedQuery(ValueError):
+    """Raised when a query uses syntax or options that cannot be evaluated locally."""
+    pass
+
+
+class ResourceIndex(object):
+    """An in-memory index of resources with lookups by tag and public ID prefix."""
+
+    def __init__(self, resources):
+        """
+        :param resources: resources in the shape returned by the Admin API
+        :type resources: list of dict
+        """
+        self._resources = sorted(resources, key=lambda r: r.get("public_id"))
+        self._by_tag = {}
+        for resource in self._resources:
+            for tag in resource.get("tags") or []:
+                self._by_tag.setdefault(tag, []).append(resource)
+
+    def resources(self):
+        return self._resources
+
+    def resources_by_tag(self, tag):
+        return self._by_tag.get(tag, [])
+
+    def resources_by_prefix(self, prefix):
+        return [resource for resource in self._resources if resource.get("public_id", "").startswith(prefix)]
+
+
+def parse(expression):
+    """
+    Parse a Search expression.
+
+    :param expression: the search expression
+    :type expression: str
+
+    :return: the syntax tree, made of ``("and", [nodes])``, ``("or", [nodes])``, ``("not", node)``,
+             ``("term", field, operator, value)`` and ``("text", value)`` tuples, or None for an empty expression
+
+    :raises UnsupportedQuery: if the expression cannot be parsed
+    """
+    tokens = _tokenize(expression or "")
+    if not tokens:
+        return None
+    node, position = _parse_or(tokens, 0)
+    if position != len(tokens):
+        raise UnsupportedQuery("Unexpected '{0}' in search expression".format(tokens[position][1]))
+    return node
+
+
+def compile_expression(expression):
+    """
+    :return: a predicate function that returns True for resources matching ``expression``
+    """
+    predicate = _compiled_cache.get(expression)
+    if predicate is None:
+        node = parse(expression)
+        predicate = _compile(node) if node is not None else (lambda resource: True)
+        if len(_compiled_cache) >= _COMPILED_CACHE_SIZE:
+            _compiled_cache.clear()
+        _compiled_cache[expression] = predicate
+    return predicate
+
+
+def execute(query, index):
+    """
+    Evaluate a search query against a local index.
+
+    :param query: the query, as returned by ``Search.as_dict()``
+    :type query: dict
+    :param index: a :class:`ResourceIndex` or :class:`cloudinary.mirror.Mirror`
+
+    :return: the search results, in the same shape as ``Search.execute()``
+    :rtype: dict
+
+    :raises UnsupportedQuery: if the query cannot be evaluated locally
+    """
+    start = time.time()
+    expression = query.get("expression")
+    predicate = compile_expression(expression)
+    candidates = _plan(parse(expression), index)
+    matches = [resource for resource in candidates if predicate(resource)]
+
+    for sort_field in reversed(query.get("sort_by", [])):
+        for field, direction in sort_field.items():
+            _sort(matches, field, direction)
+
+    max_results = int(query.get("max_results") or DEFAULT_MAX_RESULTS)
+    if not 0 < max_results <= MAX_RESULTS:
+        raise UnsupportedQuery("max_results must be between 1 and {0}".format(MAX_RESULTS))
+    offset = _decode_cursor(query.get("next_cursor"))
+    page = matches[offset:offset + max_results]
+
+    with_fields = set(query.get("with_field", []))
+    result = {
+        "total_count": len(matches),
+        "resources": [_project(resource, with_fields) for resource in page],
+    }
+    if offset + max_results < len(matches):
+        result["next_cursor"] = _encode_cursor(offset + max_results)
+    if query.get("aggregate"):
+        result["aggregations"] = _aggregate(matches, query["aggregate"])
+    result["time"] = int((time.time() - start) * 1000)
+    return result
+
+
+def _tokenize(expression):
+    tokens = []
+    position = 0
+    expression = expression.strip()
+    while position < len(expression):
+        match = _TOKEN_RE.match(expression, position)
+        if not match or match.end() == position:
+            raise UnsupportedQuery("Cannot parse search expression '{0}'".format(expression))
+        position = match.end()
+        if match.group(1):
+            tokens.append(("(", "("))
+        elif match.group(2):
+            tokens.append((")", ")"))
+        elif match.group(3):
+            value = re.sub(r'\\(.)', r'\1', match.group(3)[1:-1])
+            if tokens and tokens[-1][0] == "partial":
+                tokens[-1] = ("word", tokens[-1][1] + '"' + value)
+            else:
+                tokens.append(("quoted", value))
+        else:
+            word = match.group(4)
+            if word in ("AND", "&&"):
+                tokens.append(("and", word))
+            elif word in ("OR", "||"):
+                tokens.append(("or", word))
+            elif word == "NOT":
+                tokens.append(("not", word))
+            elif re.search(r'(!=|>=|<=|[:=<>])$', word) and position < len(expression) \
+                    and expression[position] == '"':
+                tokens.append(("partial", word))
+            else:
+                tokens.append(("word", word))
+    return tokens
+
+
+def _parse_or(tokens, position):
+    nodes = []
+    node, position = _parse_and(tokens, position)
+    nodes.append(node)
+    while position < len(tokens) and tokens[position][0] == "or":
+        node, position = _parse_and(tokens, position + 1)
+        nodes.append(node)
+    return (nodes[0] if len(nodes) == 1 else ("or", nodes)), position
+
+
+def _parse_and(tokens, position):
+    nodes = []
+    node, position = _parse_not(tokens, position)
+    nodes.append(node)
+    while position < len(tokens) and tokens[position][0] not in ("or", ")"):
+        if tokens[position][0] == "and":
+            position += 1
+        node, position = _parse_not(tokens, position)
+        nodes.append(node)
+    return (nodes[0] if len(nodes) == 1 else ("and", nodes)), position
+
+
+def _parse_not(tokens, position):
+    if position >= len(tokens):
+        raise UnsupportedQuery("Unexpected end of search expression")
+    kind, value = tokens[position]
+    if kind == "not":
+        node, position = _parse_not(tokens, position + 1)
+        return ("not", node), position
+    if kind == "(":
+        node, position = _parse_or(tokens, position + 1)
+        if position >= len(tokens) or tokens[position][0] != ")":
+            raise UnsupportedQuery("Missing ')' in search expression")
+        return node, position + 1
+    if kind == "quoted":
+        return ("text", value), position + 1
+    if kind == "word":
+        return _parse_term(value), position + 1
+    raise UnsupportedQuery("Unexpected '{0}' in search expression".format(value))
+
+
+def _parse_term(word):
+    match = _TERM_RE.match(word)
+    if not match:
+        if word.startswith("-") and len(word) > 1:
+            return "not", ("text", word[1:])
+        return "text", word
+    negate, field, operator, value = match.groups()
+    if value.startswith('"'):
+        value = value[1:]
+    if not value:
+        raise UnsupportedQuery("Missing value for '{0}' in search expression".format(field))
+    node = ("term", FIELD_ALIASES.get(field, field), operator, value)
+    return ("not", node) if negate else node
+
+
+def _compile(node):
+    kind = node[0]
+    if kind == "and":
+        predicates = [_compile(child) for child in node[1]]
+        return lambda resource: all(predicate(resource) for predicate in predicates)
+    if kind == "or":
+        predicates = [_compile(child) for child in node[1]]
+        return lambda resource: any(predicate(resource) for predicate in predicates)
+    if kind == "not":
+        predicate = _compile(node[1])
+        return lambda resource: not predicate(resource)
+    if kind == "text":
+        return _compile_text(node[1])
+    return _compile_term(*node[1:])
+
+
+def _compile_text(value):
+    matches = _token_matcher(value)
+
+    def predicate(resource):
+        values = [resource.get("public_id")] + list(resource.get("tags") or []) + list(_context(resource).values())
+        return any(matches(v) for v in values)
+    return predicate
+
+
+def _compile_term(field, operator, value):
+    getter = _field_getter(field)
+    if operator in (":", "=", "!="):
+        if operator == ":":
+            matches = _token_matcher(value)
+        else:
+            matches = _exact_matcher(value)
+
+        def predicate(resource):
+            field_value = getter(resource)
+            values = field_value if isinstance(field_value, list) else [field_value]
+            return any(matches(v) for v in values)
+        return (lambda resource: not predicate(resource)) if operator == "!=" else predicate
+
+    bound = _parse_bound(field, value)
+    compare = {"<": lambda a, b: a < b, "<=": lambda a, b: a <= b,
+               ">": lambda a, b: a > b, ">=": lambda a, b: a >= b}[operator]
+    if field in DATE_FIELDS:
+        getter = _date_getter(getter)
+
+    def range_predicate(resource):
+        field_value = getter(resource)
+        if field_value is None:
+            return False
+        try:
+            return compare(float(field_value), bound)
+        except (TypeError, ValueError):
+            return False
+    return range_predicate
+
+
+def _token_matcher(value):
+    value = value.lower()
+    if value.endswith("*"):
+        prefix = value[:-1]
+        return lambda v: v is not None and any(
+            token.startswith(prefix) for token in [_str(v).lower()] + _SPLIT_RE.split(_str(v).lower()))
+
+    def matches(v):
+        if v is None:
+            return False
+        v = _str(v).lower()
+        return v == value or value in _SPLIT_RE.split(v)
+    return matches
+
+
+def _exact_matcher(value):
+    if value.endswith("*"):
+        prefix = value[:-1]
+        return lambda v: v is not None and _str(v).startswith(prefix)
+    return lambda v: v is not None and _str(v) == value
+
+
+def _str(value):
+    return value if isinstance(value, string_types) else str(value)
+
+
+def _field_getter(field):
+    if field.startswith("context."):
+        key = field[len("context."):]
+        return lambda resource: _context(resource).get(key)
+    if field == "folder":
+        return lambda resource: resource.get("public_id", "").rpartition("/")[0]
+    if field == "filename":
+        return lambda resource: resource.get("public_id", "").rpartition("/")[2]
+    if field == "pixels":
+        return lambda resource: resource["width"] * resource["height"] \
+            if resource.get("width") and resource.get("height") else None
+    if field == "aspect_ratio":
+        return lambda resource: float(resource["width"]) / resource["height"] \
+            if resource.get("width") and resource.get("height") else None
+    if field == "context":
+        return lambda resource: list(_context(resource).keys())
+    if field not in FIELDS:
+        raise UnsupportedQuery("Field '{0}' is not supported locally".format(field))
+    return lambda resource: resource.get(field)
+
+
+def _date_getter(getter):
+    return lambda resource: _parse_date(getter(resource))
+
+
+def _context(resource):
+    context = resource.get("context") or {}
+    return context.get("custom", context)
+
+
+def _parse_bound(field, value):
+    if field in DATE_FIELDS:
+        relative = _RELATIVE_DATE_RE.match(value)
+        if relative:
+            return time.time() - int(relative.group(1)) * _DATE_UNITS[relative.group(2)]
+        bound = _parse_date(value)
+        if bound is None:
+            raise UnsupportedQuery("Invalid date '{0}' in search expression".format(value))
+        return bound
+    size = _SIZE_RE.match(value)
+    if not size:
+        raise UnsupportedQuery("Invalid number '{0}' in search expression".format(value))
+    return float(size.group(1)) * _SIZE_UNITS.get((size.group(2) or "").lower(), 1)
+
+
+def _parse_date(value):
+    if value is None:
+        return None
+    for date_format in ("%Y-%m-%dT%H:%M:%SZ", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d"):
+        try:
+            return calendar.timegm(datetime.strptime(value, date_format).timetuple())
+        except ValueError:
+            pass
+    return None
+
+
+def _plan(node, index):
+    """Narrow down the candidate resources using the index, based on the top level conjunction."""
+    terms = node[1] if node is not None and node[0] == "and" else [node]
+    for term in terms:
+        if term is not None and term[0] == "term" and term[2] == "=" and not term[3].endswith("*"):
+            if term[1] == "tags" and hasattr(index, "resources_by_tag"):
+                return index.resources_by_tag(term[3])
+            if term[1] == "public_id" and hasattr(index, "resources_by_prefix"):
+                return index.resources_by_prefix(term[3])
+    for term in terms:
+        if term is not None and term[0] == "term" and term[1] == "public_id" and term[2] in ("=", ":") \
+                and term[3].endswith("*") and hasattr(index, "resources_by_prefix"):
+            return index.resources_by_prefix(term[3][:-1])
+    return index.resources()
+
+
+def _sort(resources, field, direction):
+    getter = _field_getter(FIELD_ALIASES.get(field, field))
+    present = [resource for resource in resources if getter(resource) is not None]
+    missing = [resource for resource in resources if getter(resource) is None]
+    present.sort(key=getter, reverse=direction == "desc")
+    resources[:] = present + missing
+
+
+def _aggregate(resources, fields):
+    aggregations = {}
+    for field in fields:
+        if field not in AGGREGATE_FIELDS:
+            raise UnsupportedQuery("Aggregation on '{0}' is not supported locally".format(field))
+        counts = {}
+        for resource in resources:
+            value = resource.get(field)
+            if value is not None:
+                counts[value] = counts.get(value, 0) + 1
+        aggregations[field] = counts
+    return aggregations
+
+
+def _project(resource, with_fields):
+    resource = dict(resource)
+    for field in ("tags", "context"):
+        if field not in with_fields:
+            resource.pop(field, None)
+    return resource
+
+
+def _encode_cursor(offset):
+    return base64.urlsafe_b64encode((_CURSOR_PREFIX + str(offset)).encode("ascii")).decode("ascii")
+
+
+def _decode_cursor(cursor):
+    if not cursor:
+        return 0
+    try:
+        decoded = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("ascii")
+    except Exception:
+        decoded = ""
+    if not decoded.startswith(_CURSOR_PREFIX):
+        raise UnsupportedQuery("next_cursor was not issued by a local search")
+    return int(decoded[len(_CURSOR_PREFIX):])
@@ -0,0 +1,282 @@
+# Copyright Cloudinary
+"""
+Local SQLite mirror of the account's resource inventory.
+
+The mirror is filled from the Admin API ``resources`` listing and kept up to date incrementally, so
+reporting queries such as "all assets tagged X" or "total bytes under folder Y" run locally instead of
+spending rate-limited Admin API calls.
+
+Example::
+
+    mirror = Mirror("inventory.db")
+    mirror.load()                       # initial full load of image/upload
+    mirror.refresh()                    # later: fetch only resources created since the last sync
+    mirror.apply_notification(payload)  # or feed it upload notifications as they arrive
+    mirror.total_bytes(prefix="products/")
+"""
+import json
+import sqlite3
+import threading
+
+from cloudinary import api
+
+MAX_RESULTS = 500
+
+_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS resources (
+        resource_type TEXT NOT NULL,
+        type TEXT NOT NULL,
+        public_id TEXT NOT NULL,
+        format TEXT,
+        version INTEGER,
+        bytes INTEGER,
+        width INTEGER,
+        height INTEGER,
+        created_at TEXT,
+        tags TEXT,
+        context TEXT,
+        PRIMARY KEY (resource_type, type, public_id))""",
+    """CREATE TABLE IF NOT EXISTS resource_tags (
+        resource_type TEXT NOT NULL,
+        type TEXT NOT NULL,
+        public_id TEXT NOT NULL,
+        tag TEXT NOT NULL,
+        PRIMARY KEY (resource_type, type, public_id, tag))""",
+    """CREATE TABLE IF NOT EXISTS sync_state (
+        resource_type TEXT NOT NULL,
+        type TEXT NOT NULL,
+        last_created_at TEXT,
+        PRIMARY KEY (resource_type, type))""",
+    "CREATE INDEX IF NOT EXISTS resource_tags_tag ON resource_tags (tag)",
+    "CREATE INDEX IF NOT EXISTS resources_public_id ON resources (public_id)",
+    "CREATE INDEX IF NOT EXISTS resources_created_at ON resources (created_at)",
+]
+
+_COLUMNS = ("resource_type", "type", "public_id", "format", "version", "bytes", "width", "height",
+            "created_at", "tags", "context")
+
+# Highest code point, used as an exclusive upper bound for prefix range scans that can use the index
+_PREFIX_END = u"\U0010ffff"
+
+
+class Mirror(object):
+    """A local SQLite index of resources, synchronized from the Admin API."""
+
+    def __init__(self, path=":memory:"):
+        """
+        :param path: path of the SQLite database file, defaults to an in-memory database
+        """
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._db:
+            for statement in _SCHEMA:
+                self._db.execute(statement)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def load(self, resource_type="image", type="upload", **options):
+        """
+        Replace the mirrored resources of the given resource type and type with a full listing.
+
+        :param resource_type: the resource type to load
+        :param type: the storage type to load
+        :param options: additional options passed to :func:`cloudinary.api.resources`
+
+        :return: the number of resources loaded
+        """
+        resources = list(self._list(resource_type, type, **options))
+        with self._lock, self._db:
+            where = "resource_type = ? AND type = ?"
+            self._db.execute("DELETE FROM resources WHERE " + where, (resource_type, type))
+            self._db.execute("DELETE FROM resource_tags WHERE " + where, (resource_type, type))
+            self._upsert(resources, resource_type, type)
+            self._set_last_created_at(resource_type, type, resources, reset=True)
+        return len(resources)
+
+    def refresh(self, resource_type="image", type="upload", **options):
+        """
+        Add resources created since the last sync, using the ``start_at`` and ``direction`` listing options.
+
+        Falls back to a full :meth:`load` if the resource type was never synced.
+
+        :return: the number of resources added or updated
+        """
+        last_created_at = self.last_created_at(resource_type, type)
+        if last_created_at is None:
+            return self.load(resource_type, type, **options)
+
+        resources = list(self._list(resource_type, type, start_at=last_created_at, direction="asc", **options))
+        with self._lock, self._db:
+            self._upsert(resources, resource_type, type)
+            self._set_last_created_at(resource_type, type, resources)
+        return len(resources)
+
+    def apply_notification(self, notification):
+        """
+        Update the mirror from a notification sent to ``notification_url``.
+
+        Supports upload, delete and rename notifications; other notification types are ignored.
+
+        :param notification: the decoded JSON body of the notification
+        :type notification: dict
+
+        :return: True if the notification changed the mirror
+        """
+        notification_type = notification.get("notification_type")
+        with self._lock, self._db:
+            if notification_type == "upload":
+                resource_type = notification.get("resource_type", "image")
+                type = notification.get("type", "upload")
+                self._upsert([notification], resource_type, type)
+                return True
+            if notification_type == "delete":
+                for resource in notification.get("resources", []):
+                    self._delete(resource.get("resource_type", "image"), resource.get("type", "upload"),
+                                 resource["public_id"])
+                return True
+            if notification_type == "rename":
+                key = (notification.get("resource_type", "image"), notification.get("type", "upload"))
+                for table in ("resources", "resource_tags"):
+                    self._db.execute(
+                        "UPDATE OR REPLACE {0} SET public_id = ? "
+                        "WHERE resource_type = ? AND type = ? AND public_id = ?".format(table),
+                        (notification["to_public_id"],) + key + (notification["from_public_id"],))
+                return True
+        return False
+
+    def last_created_at(self, resource_type="image", type="upload"):
+        row = self._query_one("SELECT last_created_at FROM sync_state WHERE resource_type = ? AND type = ?",
+                              (resource_type, type))
+        return row[0] if row else None
+
+    def get(self, public_id, resource_type="image", type="upload"):
+        """
+        :return: the mirrored resource, in the same shape as the Admin API, or None
+        """
+        rows = self._query("SELECT {0} FROM resources WHERE resource_type = ? AND type = ? AND public_id = ?"
+                           .format(", ".join(_COLUMNS)), (resource_type, type, public_id))
+        return _to_resource(rows[0]) if rows else None
+
+    def resources(self, resource_type=None, type=None):
+        """
+        :return: list of all mirrored resources, optionally limited to a resource type and type
+        """
+        where, args = _filters(resource_type=resource_type, type=type)
+        return [_to_resource(row) for row in
+                self._query("SELECT {0} FROM resources{1} ORDER BY public_id".format(", ".join(_COLUMNS), where),
+                            args)]
+
+    def resources_by_tag(self, tag, resource_type=None, type=None):
+        """
+        :return: list of mirrored resources that have the given tag
+        """
+        where, args = _filters("r.", resource_type=resource_type, type=type)
+        columns = ", ".join("r." + column for column in _COLUMNS)
+        return [_to_resource(row) for row in self._query(
+            "SELECT {0} FROM resource_tags t JOIN resources r "
+            "ON r.resource_type = t.resource_type AND r.type = t.type AND r.public_id = t.public_id "
+            "WHERE t.tag = ?{1} ORDER BY r.public_id".format(columns, where.replace(" WHERE", " AND")),
+            (tag,) + args)]
+
+    def resources_by_prefix(self, prefix, resource_type=None, type=None):
+        """
+        :return: list of mirrored resources whose public ID starts with ``prefix``
+        """
+        where, args = _filters(prefix=prefix, resource_type=resource_type, type=type)
+        return [_to_resource(row) for row in
+                self._query("SELECT {0} FROM resources{1} ORDER BY public_id".format(", ".join(_COLUMNS), where),
+                            args)]
+
+    def count(self, prefix=None, tag=None, resource_type=None, type=None):
+        return self._aggregate("COUNT(*)", prefix, tag, resource_type, type)
+
+    def total_bytes(self, prefix=None, tag=None, resource_type=None, type=None):
+        """
+        :return: the total size in bytes of the mirrored resources matching the given filters
+        """
+        return self._aggregate("COALESCE(SUM(bytes), 0)", prefix, tag, resource_type, type)
+
+    def _aggregate(self, expression, prefix, tag, resource_type, type):
+        where, args = _filters(prefix=prefix, resource_type=resource_type, type=type)
+        if tag is not None:
+            where += " AND " if where else " WHERE "
+            where += "EXISTS (SELECT 1 FROM resource_tags t WHERE t.tag = ? AND t.resource_type = " \
+                     "resources.resource_type AND t.type = resources.type AND t.public_id = resources.public_id)"
+            args += (tag,)
+        return self._query_one("SELECT {0} FROM resources{1}".format(expression, where), args)[0]
+
+    @staticmethod
+    def _list(resource_type, type, **options):
+        options = dict(options, tags=True, context=True)
+        options.setdefault("max_results", MAX_RESULTS)
+        while True:
+            result = api.resources(resource_type=resource_type, type=type, **options)
+            for resource in result.get("resources", []):
+                yield resource
+            next_cursor = result.get("next_cursor")
+            if not next_cursor:
+                break
+            options["next_cursor"] = next_cursor
+
+    def _upsert(self, resources, resource_type, type):
+        for resource in resources:
+            key = (resource.get("resource_type", resource_type), resource.get("type", type), resource["public_id"])
+            tags = resource.get("tags") or []
+            context = resource.get("context")
+            self._db.execute(
+                "INSERT OR REPLACE INTO resources ({0}) VALUES ({1})".format(
+                    ", ".join(_COLUMNS), ", ".join("?" * len(_COLUMNS))),
+                key + (resource.get("format"), resource.get("version"), resource.get("bytes"),
+                       resource.get("width"), resource.get("height"), resource.get("created_at"),
+                       json.dumps(tags), json.dumps(context) if context is not None else None))
+            self._db.execute("DELETE FROM resource_tags WHERE resource_type = ? AND type = ? AND public_id = ?", key)
+            self._db.executemany("INSERT OR IGNORE INTO resource_tags VALUES (?, ?, ?, ?)",
+                                 [key + (tag,) for tag in tags])
+
+    def _delete(self, resource_type, type, public_id):
+        for table in ("resources", "resource_tags"):
+            self._db.execute("DELETE FROM {0} WHERE resource_type = ? AND type = ? AND public_id = ?".format(table),
+                             (resource_type, type, public_id))
+
+    def _set_last_created_at(self, resource_type, type, resources, reset=False):
+        created = [resource["created_at"] for resource in resources if resource.get("created_at")]
+        last_created_at = None if reset else self.last_created_at(resource_type, type)
+        if created:
+            last_created_at = max(created + ([last_created_at] if last_created_at else []))
+        self._db.execute("INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?)",
+                         (resource_type, type, last_created_at))
+
+    def _query(self, sql, args=()):
+        with self._lock:
+            return self._db.execute(sql, args).fetchall()
+
+    def _query_one(self, sql, args=()):
+        with self._lock:
+            return self._db.execute(sql, args).fetchone()
+
+
+def _filters(table_prefix="", prefix=None, resource_type=None, type=None):
+    conditions = []
+    args = ()
+    if prefix is not None:
+        conditions.append("{0}public_id >= ? AND {0}public_id < ?".format(table_prefix))
+        args += (prefix, prefix + _PREFIX_END)
+    if resource_type is not None:
+        conditions.append("{0}resource_type = ?".format(table_prefix))
+        args += (resource_type,)
+    if type is not None:
+        conditions.append("{0}type = ?".format(table_prefix))
+        args += (type,)
+    return (" WHERE " + " AND ".join(conditions) if conditions else ""), args
+
+
+def _to_resource(row):
+    resource = dict(zip(_COLUMNS, row))
+    resource["tags"] = json.loads(resource["tags"]) if resource["tags"] else []
+    if resource["context"] is None:
+        del resource["context"]
+    else:
+        resource["context"] = json.loads(resource["context"])
+    return resource
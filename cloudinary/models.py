@@ -1,8 +1,9 @@
 import re
 
-from cloudinary import CloudinaryResource, forms, uploader
+from cloudinary import CloudinaryResource, deferred, forms, uploader
 from django.core.files.uploadedfile import UploadedFile
-from django.db import models
+from django.db import models, router, transaction
+from django.db.models import signals
 
 # Add introspection rules for South, if it's installed.
 try:
@@ -17,6 +18,10 @@ CLOUDINARY_FIELD_DB_RE = r'(?:(?P<resource_type>image|raw|video)/' \
                          r'(?P<public_id>.*?)' \
                          r'(\.(?P<format>[^.]+))?$'
 
+CLOUDINARY_FIELD_DB_PATTERN = re.compile(CLOUDINARY_FIELD_DB_RE)
+
+_PARSED_ATTRIBUTES = frozenset(CloudinaryResource.__slots__) - {"__dict__", "__weakref__"}
+
 
 def with_metaclass(meta, *bases):
     """
@@ -34,6 +39,50 @@ def with_metaclass(meta, *bases):
     return type.__new__(metaclass, 'temporary_class', (), {})
 
 
+class LazyCloudinaryResource(CloudinaryResource):
+    """
+    A CloudinaryResource that keeps the database value and parses it on first attribute access.
+
+    Rows loaded from the database whose resource is never used do not pay for parsing.
+    """
+    __slots__ = ("_raw", "_default_type", "_default_resource_type")
+
+    def __init__(self, value, type="upload", resource_type="image"):
+        self._raw = value
+        self._default_type = type
+        self._default_resource_type = resource_type
+
+    def __getattr__(self, name):
+        # Only called while the attributes parsed from the raw value are still unset
+        if name in _PARSED_ATTRIBUTES and self._parse():
+            return getattr(self, name)
+        raise AttributeError(name)
+
+    def _parse(self):
+        try:
+            raw = object.__getattribute__(self, "_raw")
+        except AttributeError:
+            return False
+        if raw is None:
+            return False
+        self._raw = None
+
+        m = CLOUDINARY_FIELD_DB_PATTERN.match(raw)
+        parsed = dict(metadata=None, signature=None, url_options={},
+                      type=m.group('type') or self._default_type,
+                      resource_type=m.group('resource_type') or self._default_resource_type,
+                      version=m.group('version'),
+                      public_id=m.group('public_id'),
+                      format=m.group('format'))
+        for name, value in parsed.items():
+            try:
+                # Keep attributes that were assigned before parsing
+                object.__getattribute__(self, name)
+            except AttributeError:
+                setattr(self, name, value)
+        return True
+
+
 class CloudinaryField(models.Field):
     description = "A resource stored in Cloudinary"
 
@@ -45,8 +94,15 @@ class CloudinaryField(models.Field):
         self.resource_type = options.pop("resource_type", "image")
         self.width_field = options.pop("width_field", None)
         self.height_field = options.pop("height_field", None)
+        self.deferred = options.pop("deferred", False)
+        self.deferred_pool = options.pop("deferred_pool", None)
         super(CloudinaryField, self).__init__(*args, **options)
 
+    def contribute_to_class(self, cls, name, *args, **kwargs):
+        super(CloudinaryField, self).contribute_to_class(cls, name, *args, **kwargs)
+        if not cls._meta.abstract:
+            signals.post_save.connect(self._submit_deferred_upload, sender=cls)
+
     def get_internal_type(self):
         return 'CharField'
 
@@ -70,7 +126,7 @@ class CloudinaryField(models.Field):
         return self.get_prep_value(value)
 
     def parse_cloudinary_resource(self, value):
-        m = re.match(CLOUDINARY_FIELD_DB_RE, value)
+        m = CLOUDINARY_FIELD_DB_PATTERN.match(value)
         resource_type = m.group('resource_type') or self.resource_type
         upload_type = m.group('type') or self.type
         return CloudinaryResource(
@@ -81,10 +137,10 @@ class CloudinaryField(models.Field):
             format=m.group('format')
         )
 
-    def from_db_value(self, value, expression, connection, context):
+    def from_db_value(self, value, expression, connection, context=None):
         if value is None:
             return value
-        return self.parse_cloudinary_resource(value)
+        return LazyCloudinaryResource(value, self.type, self.resource_type)
 
     def to_python(self, value):
         if isinstance(value, CloudinaryResource):
@@ -107,6 +163,8 @@ class CloudinaryField(models.Field):
         if isinstance(value, UploadedFile):
             options = {"type": self.type, "resource_type": self.resource_type}
             options.update(self.upload_options_with_filename(model_instance, value.name))
+            if self.deferred:
+                return self.get_prep_value(self._defer_upload(model_instance, value, options))
             instance_value = uploader.upload_resource(value, **options)
             setattr(model_instance, self.attname, instance_value)
             if self.width_field:
@@ -117,6 +175,45 @@ class CloudinaryField(models.Field):
         else:
             return value
 
+    def _defer_upload(self, model_instance, value, options):
+        """
+        Store a placeholder resource and upload the file in the background after the transaction commits.
+
+        When the upload completes, the resource, ``width_field`` and ``height_field`` are updated on the instance
+        and in its database row, until then ``width_field`` and ``height_field`` keep their values.
+        """
+        using = router.db_for_write(model_instance.__class__, instance=model_instance)
+        upload = deferred.DeferredUpload(
+            value, on_complete=lambda resource: self._deferred_upload_completed(model_instance, resource, using),
+            spool=False, **options)
+        setattr(model_instance, self.attname, upload.resource)
+        if transaction.get_connection(using).in_atomic_block:
+            deferred.submit_on_commit(upload, self.deferred_pool, using)
+        else:
+            # In autocommit mode on_commit callbacks run right away, before the row is written
+            model_instance.__dict__[self._deferred_upload_key] = upload
+        return upload.resource
+
+    @property
+    def _deferred_upload_key(self):
+        return "_cloudinary_deferred_upload_{0}".format(self.attname)
+
+    def _submit_deferred_upload(self, sender, instance, using=None, **kwargs):
+        upload = instance.__dict__.pop(self._deferred_upload_key, None)
+        if upload is not None:
+            deferred.submit_on_commit(upload, self.deferred_pool, using)
+
+    def _deferred_upload_completed(self, model_instance, resource, using):
+        values = {self.attname: self.get_prep_value(resource)}
+        if self.width_field:
+            values[self.width_field] = resource.metadata.get('width')
+        if self.height_field:
+            values[self.height_field] = resource.metadata.get('height')
+        for name, value in values.items():
+            if name != self.attname:
+                setattr(model_instance, name, value)
+        model_instance.__class__._default_manager.using(using).filter(pk=model_instance.pk).update(**values)
+
     def get_prep_value(self, value):
         if not value:
             return self.get_default()
@@ -0,0 +1,278 @@
+# Copyright Cloudinary
+"""
+Receiving of upload and eager notifications sent to a ``notification_url``.
+
+Notifications are signed with the ``X-Cld-Signature`` and ``X-Cld-Timestamp`` headers. The receiver verifies the
+signature in constant time against each of the configured API secrets, so secrets can be rotated without dropping
+notifications, and rejects notifications whose timestamp is outside of the validity window.
+
+Cloudinary redelivers notifications that were not acknowledged in time. Redelivered notifications are dropped
+using a bounded set of recently seen notifications. Verified notifications are passed to the callback in batches,
+so downstream work like cache invalidation is done in bulk.
+
+Example::
+
+    def invalidate(notifications):
+        cache.delete_many([n["public_id"] for n in notifications if "public_id" in n])
+
+    receiver = NotificationReceiver(invalidate, secrets=(new_api_secret, old_api_secret))
+    application = NotificationApp(receiver)  # WSGI application
+"""
+import hashlib
+import hmac
+import json
+import threading
+import time
+
+from six import string_types
+
+import cloudinary
+from cloudinary import codec
+from cloudinary.cache import TTLCache
+from cloudinary.signing import MAX_BODY_SIZE, _wsgi_response
+
+logger = cloudinary.logger
+
+SIGNATURE_HEADER = "X-Cld-Signature"
+TIMESTAMP_HEADER = "X-Cld-Timestamp"
+
+DEFAULT_VALID_FOR = 7200
+DEFAULT_DEDUP_SIZE = 100000
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_BATCH_INTERVAL = 1.0
+
+
+class NotificationError(ValueError):
+    """The notification cannot be parsed."""
+    pass
+
+
+class InvalidSignature(NotificationError):
+    """The notification signature does not match or has expired."""
+    pass
+
+
+def verify_notification_signature(body, timestamp, signature, valid_for=DEFAULT_VALID_FOR, secrets=None):
+    """
+    Verify the signature of a notification.
+
+    :param body: the request body
+    :type body: bytes
+    :param timestamp: the value of the ``X-Cld-Timestamp`` header
+    :param signature: the value of the ``X-Cld-Signature`` header
+    :param valid_for: the maximal age of the notification in seconds
+    :param secrets: an API secret or a list of API secrets to accept, the configured ``api_secret`` by default
+
+    :return: whether the signature matches one of the secrets and the timestamp is within the validity window
+    :rtype: bool
+    """
+    if not signature or not timestamp:
+        return False
+    try:
+        timestamp_value = int(timestamp)
+    except (TypeError, ValueError):
+        return False
+    if abs(time.time() - timestamp_value) > valid_for:
+        return False
+
+    secrets = _secrets(secrets)
+    signature = _to_bytes(signature)
+    signed = _to_bytes(body) + _to_bytes(str(timestamp_value))
+    valid = False
+    for secret in secrets:
+        expected = _to_bytes(hashlib.sha1(signed + _to_bytes(secret)).hexdigest())
+        # Check all secrets, so the time taken does not depend on which one matches
+        valid |= hmac.compare_digest(expected, signature)
+    return valid
+
+
+def _to_bytes(value):
+    return value if isinstance(value, bytes) else value.encode("utf-8")
+
+
+def _secrets(secrets):
+    if secrets is None:
+        secrets = cloudinary.config().api_secret
+    if isinstance(secrets, string_types):
+        secrets = [secrets]
+    secrets = [secret for secret in secrets if secret]
+    if not secrets:
+        raise ValueError("Must supply api_secret")
+    return secrets
+
+
+class NotificationReceiver(object):
+    """
+    Verifies notifications and passes them to a callback in batches.
+
+    The callback is called from a background thread with a list of notifications once ``batch_size``
+    notifications are pending or the oldest pending notification has waited ``batch_interval`` seconds.
+    Callback calls do not overlap. Exceptions raised by the callback are logged.
+
+    :param callback: called with a list of the parsed notifications
+    :param secrets: an API secret or a list of API secrets to accept, the configured ``api_secret`` by default
+    :param valid_for: the maximal age of notifications in seconds
+    :param dedup_size: the maximal number of recently seen notifications remembered for deduplication
+    :param batch_size: the maximal number of notifications passed to the callback at once
+    :param batch_interval: the maximal time in seconds a notification waits for its batch to fill
+    """
+    def __init__(self, callback, secrets=None, valid_for=DEFAULT_VALID_FOR, dedup_size=DEFAULT_DEDUP_SIZE,
+                 batch_size=DEFAULT_BATCH_SIZE, batch_interval=DEFAULT_BATCH_INTERVAL):
+        if batch_size <= 0:
+            raise ValueError("batch_size must be a positive integer")
+        self.callback = callback
+        self.secrets = _secrets(secrets)
+        self.valid_for = valid_for
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        # Older notifications are rejected by their timestamp, so they do not need to be remembered
+        self._seen = TTLCache(dedup_size, valid_for * 2)
+        self._pending = []
+        self._pending_since = None
+        self._condition = threading.Condition()
+        self._callback_lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+        self.received = 0
+        self.duplicates = 0
+
+    def receive(self, body, timestamp, signature):
+        """
+        Verify a notification and queue it for the callback.
+
+        :param body: the request body
+        :type body: bytes
+        :param timestamp: the value of the ``X-Cld-Timestamp`` header
+        :param signature: the value of the ``X-Cld-Signature`` header
+
+        :return: False if the notification was already received, True otherwise
+        :rtype: bool
+
+        :raises InvalidSignature: if the signature is invalid
+        :raises NotificationError: if the body is not a JSON object
+        """
+        if not verify_notification_signature(body, timestamp, signature, self.valid_for, self.secrets):
+            raise InvalidSignature("Invalid notification signature")
+        try:
+            notification = codec.loads(_to_bytes(body))
+        except ValueError:
+            raise NotificationError("Invalid notification body")
+        if not isinstance(notification, dict):
+            raise NotificationError("Invalid notification body")
+
+        key = hashlib.sha1(_to_bytes(body)).digest()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("The receiver is closed")
+            if key in self._seen:
+                self.duplicates += 1
+                return False
+            self._seen.set(key, True)
+            self.received += 1
+            if not self._pending:
+                self._pending_since = time.time()
+            self._pending.append(notification)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._work)
+                self._thread.daemon = True
+                self._thread.start()
+            if len(self._pending) == 1 or len(self._pending) >= self.batch_size:
+                self._condition.notify()
+        return True
+
+    def handle(self, body, timestamp, signature):
+        """
+        Receive a notification request.
+
+        :return: the HTTP status and the JSON response body
+        :rtype: tuple
+        """
+        try:
+            self.receive(body, timestamp, signature)
+        except NotificationError as e:
+            status = 401 if isinstance(e, InvalidSignature) else 400
+            return status, json.dumps({"error": {"message": str(e)}}).encode("utf-8")
+        # Duplicates are acknowledged too, so they are not delivered again
+        return 200, b'{"status": "ok"}'
+
+    def flush(self):
+        """Pass all pending notifications to the callback in the calling thread."""
+        while True:
+            with self._condition:
+                batch = self._take_batch()
+            if not batch:
+                return
+            self._deliver(batch)
+
+    def close(self):
+        """Stop the background thread and pass the pending notifications to the callback."""
+        with self._condition:
+            self._closed = True
+            thread, self._thread = self._thread, None
+            self._condition.notify()
+        if thread is not None:
+            thread.join()
+        self.flush()
+
+    def stats(self):
+        """
+        :return: dictionary with the number of ``received`` and ``duplicate`` notifications and the number of
+                 notifications ``pending`` delivery
+        """
+        with self._condition:
+            return {"received": self.received, "duplicates": self.duplicates, "pending": len(self._pending)}
+
+    def _take_batch(self):
+        batch = self._pending[:self.batch_size]
+        del self._pending[:self.batch_size]
+        self._pending_since = time.time() if self._pending else None
+        return batch
+
+    def _deliver(self, batch):
+        with self._callback_lock:
+            try:
+                self.callback(batch)
+            except Exception:
+                logger.exception("Notification callback failed")
+
+    def _work(self):
+        while True:
+            with self._condition:
+                while not self._closed:
+                    if len(self._pending) >= self.batch_size:
+                        break
+                    timeout = None
+                    if self._pending:
+                        timeout = self._pending_since + self.batch_interval - time.time()
+                        if timeout <= 0:
+                            break
+                    self._condition.wait(timeout)
+                if self._closed:
+                    return
+                batch = self._take_batch()
+            self._deliver(batch)
+
+
+class NotificationApp(object):
+    """
+    A WSGI application that receives the notifications POSTed to it.
+
+    :param receiver: the receiver
+    :type receiver: NotificationReceiver
+    """
+    def __init__(self, receiver):
+        self.receiver = receiver
+
+    def __call__(self, environ, start_response):
+        if environ.get("REQUEST_METHOD") != "POST":
+            return _wsgi_response(start_response, 405, b'{"error": {"message": "Method not allowed"}}')
+        try:
+            length = int(environ.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            length = 0
+        if length > MAX_BODY_SIZE:
+            return _wsgi_response(start_response, 413, b'{"error": {"message": "Request too large"}}')
+        body = environ["wsgi.input"].read(length) if length else b""
+        status, body = self.receiver.handle(body, environ.get("HTTP_X_CLD_TIMESTAMP"),
+                                            environ.get("HTTP_X_CLD_SIGNATURE"))
+        return _wsgi_response(start_response, status, body)
@@ -0,0 +1,110 @@
+# Copyright Cloudinary
+"""
+Batch generation of delivery URLs and image tags for lists of objects.
+
+Rendering a list of resources with the same options repeats the same transformation work for each resource.
+:func:`prefetch_cloudinary_urls` generates the transformation once per list and only builds the per resource
+parts of the URLs.
+
+Example::
+
+    products = prefetch_cloudinary_urls(Product.objects.all(), "image", width=200, crop="fill")
+    products[0].image_urls.url
+    products[0].image_urls.image
+"""
+from cloudinary import CloudinaryResource, utils
+
+ROW_OPTIONS = ("format", "version", "resource_type")
+
+
+class CloudinaryUrls(object):
+    """
+    The prefetched ``url``, ``srcset`` and ``image`` tag of a resource.
+
+    Renders as the image tag in templates.
+    """
+    __slots__ = ("url", "srcset", "image")
+
+    def __init__(self, url, srcset, image):
+        self.url = url
+        self.srcset = srcset
+        self.image = image
+
+    def __str__(self):
+        return self.image
+
+    def __html__(self):
+        return self.image
+
+
+def prefetch_cloudinary_urls(objects, field_name, attribute=None, **options):
+    """
+    Generate the delivery URLs and image tags of a resource field for a list of objects.
+
+    The results are the same as ``resource.build_url(**options)`` and ``resource.image(**options)``, and are
+    attached to each object as a :class:`CloudinaryUrls`, or None if the field is empty.
+
+    :param objects: a queryset or an iterable of objects
+    :param field_name: the name of the attribute holding the resource, a CloudinaryResource or a public ID
+    :param attribute: the name of the attribute to attach the results to, ``<field_name>_urls`` by default
+    :param options: the URL and image tag options
+
+    :return: the objects
+    :rtype: list
+    """
+    objects = list(objects)
+    attribute = attribute or field_name + "_urls"
+    batch = UrlBatch(**options)
+    for obj in objects:
+        resource = getattr(obj, field_name, None)
+        setattr(obj, attribute, batch.render(resource) if resource else None)
+    return objects
+
+
+class UrlBatch(object):
+    """
+    Renders many resources with the same options, sharing the transformation strings between them.
+    """
+    def __init__(self, **options):
+        self.options = options
+        self._parts = {}
+        self._srcset_templates = {}
+
+    def render(self, resource):
+        """
+        :param resource: a CloudinaryResource or a public ID
+        :rtype: CloudinaryUrls
+        """
+        if not isinstance(resource, CloudinaryResource):
+            resource = CloudinaryResource(resource)
+
+        url = self._build_url(resource, "url", dict(self.options))[0]
+
+        image_options = dict(self.options)
+        is_video = image_options.get("resource_type", resource.resource_type) == "video"
+        if is_video:
+            resource.default_poster_options(image_options)
+        kind = "video" if is_video else "image"
+        src, attrs = self._build_url(resource, kind, image_options)
+        if "srcset" in image_options and kind not in self._srcset_templates:
+            self._srcset_templates[kind] = resource._srcset_templates(image_options["srcset"], **image_options)
+        image = resource._image_tag(src, attrs, image_options, self._srcset_templates.get(kind))
+        return CloudinaryUrls(url, attrs.get("srcset"), image)
+
+    def _build_url(self, resource, kind, options):
+        combined_options = dict(format=resource.format, version=resource.version, type=resource.type,
+                                resource_type=resource.resource_type or "image")
+        combined_options.update(options)
+        public_id = combined_options.get('public_id') or resource.public_id
+        storage_type = combined_options.pop("type", "upload")
+        if storage_type == "fetch":
+            # The transformation depends on the format of each resource
+            return utils.cloudinary_url(public_id, type=storage_type, **combined_options)
+
+        row_options = dict((key, combined_options.pop(key)) for key in ROW_OPTIONS if key in combined_options)
+        if kind not in self._parts:
+            # The remaining options are the same for all resources
+            self._parts[kind] = utils.generate_transformation_string(**combined_options)
+        transformation, options = self._parts[kind]
+        return utils.cloudinary_url_with_transformation(public_id, storage_type, transformation,
+                                                        dict(options, **row_options))
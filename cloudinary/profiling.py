@@ -0,0 +1,278 @@
+# Copyright Cloudinary
+"""
+Profiling of delivery URL and HTML tag generation.
+
+Records the cumulative time and the number of calls of each stage of :func:`cloudinary.utils.cloudinary_url`
+and of :meth:`cloudinary.CloudinaryResource.image` and :meth:`cloudinary.CloudinaryResource.video`, and the cost
+of each set of options they were called with.
+
+The :func:`profile_urls` context manager records the URLs and tags generated in the current thread or asyncio
+task into a profile of its own, so concurrent blocks do not mix their measurements::
+
+    with profile_urls() as profile:
+        render_page()
+    print(profile.format())
+
+Profiling of all threads is enabled with ``cloudinary.config(profile_urls=True)`` and read with
+:func:`get_profile`.
+
+The stages are profiled by replacing the functions with timed wrappers while any profile is recorded, so
+disabled profiling adds no overhead. Stage times are inclusive, e.g. the time of ``generate_transformation_string``
+includes the time of ``process_layer``.
+"""
+import functools
+import threading
+import timeit
+from contextlib import contextmanager
+
+import cloudinary
+from cloudinary import auth_token, utils
+from cloudinary.client import _ThreadLocalVar
+
+try:
+    from contextvars import ContextVar
+except ImportError:
+    # Python < 3.7
+    ContextVar = None
+
+# Stages of URL generation, as (module or class, function name, stage name)
+STAGES = (
+    (utils, "generate_transformation_string", "generate_transformation_string"),
+    (utils, "process_layer", "process_layer"),
+    (utils, "process_conditional", "process_conditional"),
+    (utils, "finalize_source", "finalize_source"),
+    (utils, "smart_escape", "smart_escape"),
+    (utils, "unsigned_download_url_prefix", "unsigned_download_url_prefix"),
+    (utils, "url_signature", "signing"),
+    (auth_token, "generate", "auth_token"),
+    (utils, "html_attrs", "html_attrs"),
+)
+
+# Entry points whose options are recorded, as (module or class, function name, stage name)
+ENTRY_POINTS = (
+    (utils, "cloudinary_url", "cloudinary_url"),
+    (cloudinary.CloudinaryResource, "image", "image"),
+    (cloudinary.CloudinaryResource, "video", "video"),
+)
+
+# Options left out of the reported option sets
+SECRET_OPTIONS = ("api_secret", "api_key", "auth_token")
+
+_timer = timeit.default_timer
+_lock = threading.Lock()
+_local = threading.local()
+_originals = {}
+# The number of profile_urls() blocks and of the global profile using the wrappers
+_users = 0
+# The profile recorded in all threads, set with enable()
+_profile = None
+# The profiles of the profile_urls() blocks of the current thread or asyncio task, innermost last
+_profiles = ContextVar("cloudinary_url_profiles", default=()) if ContextVar is not None else _ThreadLocalVar()
+
+
+class UrlProfile(object):
+    """
+    The time spent generating URLs and tags, per stage and per set of options.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages = {}
+        self.option_sets = {}
+
+    def add_stage(self, stage, seconds):
+        with self._lock:
+            calls, total = self.stages.get(stage, (0, 0.0))
+            self.stages[stage] = (calls + 1, total + seconds)
+
+    def add_option_set(self, key, seconds):
+        with self._lock:
+            calls, total = self.option_sets.get(key, (0, 0.0))
+            self.option_sets[key] = (calls + 1, total + seconds)
+
+    def reset(self):
+        with self._lock:
+            self.stages.clear()
+            self.option_sets.clear()
+
+    def report(self, top=10):
+        """
+        :param top: the number of most costly option sets to report
+
+        :return: ``stages``, a list of (stage, calls, seconds) sorted by time, and ``option_sets``, a list of
+                 (entry point, options, calls, seconds) for the ``top`` most costly option sets
+        :rtype: dict
+        """
+        with self._lock:
+            stages = sorted(((stage, calls, seconds) for stage, (calls, seconds) in self.stages.items()),
+                            key=lambda item: -item[2])
+            option_sets = sorted(((key[0], key[1], calls, seconds)
+                                  for key, (calls, seconds) in self.option_sets.items()),
+                                 key=lambda item: -item[3])[:top]
+        return {"stages": stages, "option_sets": option_sets}
+
+    def format(self, top=10):
+        """
+        :return: the report as a text table
+        :rtype: str
+        """
+        report = self.report(top)
+        lines = ["{0:<32} {1:>10} {2:>12}".format("stage", "calls", "ms")]
+        for stage, calls, seconds in report["stages"]:
+            lines.append("{0:<32} {1:>10} {2:>12.3f}".format(stage, calls, seconds * 1000))
+        lines.append("")
+        lines.append("{0:<10} {1:>10} {2:>12}  {3}".format("entry", "calls", "ms", "options"))
+        for entry_point, options, calls, seconds in report["option_sets"]:
+            lines.append("{0:<10} {1:>10} {2:>12.3f}  {3}".format(entry_point, calls, seconds * 1000, options))
+        return "\n".join(lines)
+
+
+def get_profile():
+    """
+    :return: the profile of the innermost :func:`profile_urls` block of the current thread or asyncio task, else the
+             profile recorded in all threads, or None if profiling is disabled
+    :rtype: UrlProfile
+    """
+    profiles = _profiles.get()
+    return profiles[-1] if profiles else _profile
+
+
+def enable(profile=None):
+    """
+    Start recording the URLs generated in all threads into ``profile``, by default the profile already recorded, or
+    a new profile.
+
+    :return: the profile being recorded
+    :rtype: UrlProfile
+    """
+    global _profile
+    with _lock:
+        if _profile is None:
+            _acquire()
+        _profile = profile or _profile or UrlProfile()
+        return _profile
+
+
+def disable():
+    """Stop recording in all threads. The original functions are restored once no profile_urls() block is left."""
+    global _profile
+    with _lock:
+        if _profile is not None:
+            _profile = None
+            _release()
+
+
+@contextmanager
+def profile_urls(profile=None):
+    """
+    Record the URLs generated in the current thread or asyncio task within the ``with`` block. The URLs are also
+    recorded by the enclosing blocks, and by the profile enabled for all threads.
+
+    :param profile: the profile to record into, a new profile by default
+
+    :return: the profile
+    :rtype: UrlProfile
+    """
+    profile = profile or UrlProfile()
+    with _lock:
+        _acquire()
+    token = _profiles.set((_profiles.get() or ()) + (profile,))
+    try:
+        yield profile
+    finally:
+        _profiles.reset(token)
+        with _lock:
+            _release()
+
+
+def _acquire():
+    # Called with _lock held
+    global _users
+    _users += 1
+    if _users == 1:
+        for owner, name, stage in STAGES:
+            _install(owner, name, _stage_wrapper(stage, getattr(owner, name)))
+        for owner, name, stage in ENTRY_POINTS:
+            _install(owner, name, _entry_point_wrapper(stage, getattr(owner, name)))
+
+
+def _release():
+    # Called with _lock held
+    global _users
+    _users -= 1
+    if _users == 0:
+        for (owner, name), original in _originals.items():
+            setattr(owner, name, original)
+        _originals.clear()
+
+
+def _install(owner, name, wrapper):
+    # Functions defined on a class are stored unbound in its __dict__
+    _originals[(owner, name)] = owner.__dict__[name]
+    setattr(owner, name, wrapper)
+
+
+def _recording():
+    profiles = _profiles.get() or ()
+    profile = _profile
+    if profile is not None and profile not in profiles:
+        profiles += (profile,)
+    return profiles
+
+
+def _active_stages():
+    active = getattr(_local, "active", None)
+    if active is None:
+        active = _local.active = set()
+    return active
+
+
+def _stage_wrapper(stage, func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profiles = _recording()
+        active = _active_stages()
+        if not profiles or stage in active:
+            # Recursive calls are part of the outermost call
+            return func(*args, **kwargs)
+        active.add(stage)
+        start = _timer()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            active.discard(stage)
+            seconds = _timer() - start
+            for profile in profiles:
+                profile.add_stage(stage, seconds)
+    return wrapper
+
+
+def _entry_point_wrapper(stage, func):
+    stage_func = _stage_wrapper(stage, func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profiles = _recording()
+        if not profiles or getattr(_local, "entry_point", None) is not None:
+            # Entry points called by other entry points are stages of the outer call
+            return stage_func(*args, **kwargs)
+        _local.entry_point = stage
+        start = _timer()
+        try:
+            return stage_func(*args, **kwargs)
+        finally:
+            _local.entry_point = None
+            seconds = _timer() - start
+            key = (stage, _options_key(kwargs))
+            for profile in profiles:
+                profile.add_option_set(key, seconds)
+    return wrapper
+
+
+def _options_key(options):
+    options = dict((key, value) for key, value in options.items() if key not in SECRET_OPTIONS)
+    try:
+        key = utils.freeze(options)
+        hash(key)
+        return key
+    except TypeError:
+        return repr(sorted(options.items()))
@@ -0,0 +1,397 @@
+# Copyright Cloudinary
+"""
+A durable queue of upload and mutation jobs, kept in a local SQLite database.
+
+Enqueueing a job is a single local transaction, so a web request can hand off an upload and return. Worker
+threads, in this process or in any other process opening the same database, run the jobs with the functions of
+:mod:`cloudinary.uploader`, retry failures with exponential backoff, and record the status and result of each job.
+
+Example::
+
+    jobs = JobQueue("jobs.db", on_complete=lambda job: logger.info("uploaded %s", job.result["public_id"]))
+    job_id = jobs.enqueue("upload", "/data/incoming/photo.jpg", public_id="photo", idempotency_key="photo-v1")
+    jobs.start(workers=4)
+    ...
+    jobs.get(job_id).status
+
+Jobs that were running when a process crashed are claimed again once their lease expires, or fail if they used up
+their attempts. A worker whose lease expired no longer records the outcome of its job. The arguments of a job
+are stored as JSON, so files must be passed as paths, URLs or data URIs that remain readable until the job runs.
+Credentials should not be passed as options, the workers use the configuration of their process, or the
+:func:`cloudinary.using` scope the workers were started in.
+"""
+import json
+import sqlite3
+import sys
+import threading
+import time
+
+import cloudinary
+from cloudinary import uploader
+from cloudinary.client import bind
+from cloudinary.retry import is_retryable, retry_delay
+
+logger = cloudinary.logger
+
+OPERATIONS = frozenset((
+    "upload", "upload_large", "explicit", "destroy", "rename",
+    "add_tag", "remove_tag", "replace_tag", "remove_all_tags", "add_context", "remove_all_context",
+))
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_LEASE = 600
+POLL_INTERVAL = 1.0
+
+_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        idempotency_key TEXT UNIQUE,
+        operation TEXT NOT NULL,
+        arguments TEXT NOT NULL,
+        status TEXT NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        max_attempts INTEGER NOT NULL,
+        run_at REAL NOT NULL,
+        lease_expires_at REAL,
+        result TEXT,
+        error TEXT,
+        created_at REAL NOT NULL,
+        updated_at REAL NOT NULL)""",
+    "CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, run_at)",
+]
+
+_COLUMNS = ("id", "idempotency_key", "operation", "arguments", "status", "attempts", "max_attempts", "run_at",
+            "result", "error", "created_at", "updated_at")
+
+
+class Job(object):
+    """
+    A queued job.
+
+    :ivar id: the ID of the job
+    :ivar idempotency_key: the key the job was enqueued with, if any
+    :ivar operation: the name of the :mod:`cloudinary.uploader` function the job calls
+    :ivar args: the positional arguments of the call
+    :ivar options: the keyword arguments of the call
+    :ivar status: ``pending``, ``running``, ``done`` or ``failed``
+    :ivar attempts: the number of times the job was started
+    :ivar result: the result of the call once the job is done
+    :ivar error: the error of the last failed attempt
+    """
+    __slots__ = ("id", "idempotency_key", "operation", "args", "options", "status", "attempts", "max_attempts",
+                 "run_at", "result", "error", "created_at", "updated_at")
+
+    def __init__(self, row):
+        values = dict(zip(_COLUMNS, row))
+        arguments = json.loads(values.pop("arguments"))
+        result = values.pop("result")
+        for name, value in values.items():
+            setattr(self, name, value)
+        self.args = arguments["args"]
+        self.options = arguments["options"]
+        self.result = json.loads(result) if result is not None else None
+
+    def __repr__(self):
+        return "<Job {0} {1} {2}>".format(self.id, self.operation, self.status)
+
+
+class JobQueue(object):
+    """
+    A queue of jobs in a SQLite database, which several processes can share.
+
+    :param path: the path of the SQLite database file
+    :param on_complete: called with the :class:`Job` when a job is done
+    :param on_error: called with the :class:`Job` when a job failed for the last time
+    :param max_attempts: the number of attempts of a job before it fails
+    :param lease: seconds after which a running job is considered abandoned by a crashed worker, and is run again.
+                  Should exceed the duration of the longest job.
+    """
+    def __init__(self, path, on_complete=None, on_error=None, max_attempts=DEFAULT_MAX_ATTEMPTS, lease=DEFAULT_LEASE):
+        if max_attempts <= 0:
+            raise ValueError("max_attempts must be a positive integer")
+        self.on_complete = on_complete
+        self.on_error = on_error
+        self.max_attempts = max_attempts
+        self.lease = lease
+        self._lock = threading.RLock()
+        self._ready = threading.Condition(threading.Lock())
+        self._stopping = threading.Event()
+        self._workers = []
+        # Transactions are explicit, BEGIN IMMEDIATE keeps other processes from claiming the same job
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        with self._lock:
+            if path != ":memory:":
+                # Commits append to the write-ahead log without waiting for the database file to be synced
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute("PRAGMA synchronous=NORMAL")
+            for statement in _SCHEMA:
+                self._db.execute(statement)
+
+    def close(self):
+        self.stop()
+        with self._lock:
+            self._db.close()
+
+    def enqueue(self, operation, *args, **options):
+        """
+        Add a job.
+
+        :param operation: the name of the :mod:`cloudinary.uploader` function to call, see :data:`OPERATIONS`
+        :param args: the positional arguments of the call
+        :param options: the keyword arguments of the call. ``idempotency_key`` identifies the job, enqueueing
+                        another job with the same key returns the ID of the existing job instead.
+                        ``delay`` postpones the job by a number of seconds.
+
+        :return: the ID of the job
+        :rtype: int
+        """
+        if operation not in OPERATIONS:
+            raise ValueError("Unsupported operation {0!r}, expected one of {1}".format(
+                operation, ", ".join(sorted(OPERATIONS))))
+        idempotency_key = options.pop("idempotency_key", None)
+        delay = options.pop("delay", 0)
+        arguments = json.dumps({"args": list(args), "options": options})
+        now = time.time()
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT OR IGNORE INTO jobs (idempotency_key, operation, arguments, status, max_attempts, run_at, "
+                "created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (idempotency_key, operation, arguments, PENDING, self.max_attempts, now + delay, now, now))
+            if cursor.rowcount:
+                job_id = cursor.lastrowid
+            else:
+                job_id = self._db.execute("SELECT id FROM jobs WHERE idempotency_key = ?",
+                                          (idempotency_key,)).fetchone()[0]
+        with self._ready:
+            self._ready.notify()
+        return job_id
+
+    def get(self, job_id):
+        """
+        :return: the job with the given ID, or None
+        :rtype: Job
+        """
+        row = self._query_one("SELECT {0} FROM jobs WHERE id = ?".format(", ".join(_COLUMNS)), (job_id,))
+        return Job(row) if row is not None else None
+
+    def get_by_key(self, idempotency_key):
+        """
+        :return: the job enqueued with the given idempotency key, or None
+        :rtype: Job
+        """
+        row = self._query_one("SELECT {0} FROM jobs WHERE idempotency_key = ?".format(", ".join(_COLUMNS)),
+                              (idempotency_key,))
+        return Job(row) if row is not None else None
+
+    def counts(self):
+        """
+        :return: the number of jobs by status
+        :rtype: dict
+        """
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+    def retry(self, job_id):
+        """
+        Run a failed job again, with a new budget of attempts.
+
+        :return: True if the job was failed
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET status = ?, attempts = 0, run_at = ?, updated_at = ? WHERE id = ? AND status = ?",
+                (PENDING, now, now, job_id, FAILED))
+        with self._ready:
+            self._ready.notify()
+        return cursor.rowcount > 0
+
+    def purge(self, older_than=0):
+        """
+        Delete the jobs that are done, and were last updated more than ``older_than`` seconds ago.
+
+        :return: the number of deleted jobs
+        """
+        with self._lock:
+            return self._db.execute("DELETE FROM jobs WHERE status = ? AND updated_at <= ?",
+                                    (DONE, time.time() - older_than)).rowcount
+
+    def run_pending(self):
+        """
+        Run the jobs that are due in the calling thread, until none is left.
+
+        :return: the number of jobs run
+        """
+        count = 0
+        while True:
+            job = self._claim()
+            if job is None:
+                return count
+            self._run(job)
+            count += 1
+
+    def start(self, workers=4, poll_interval=POLL_INTERVAL):
+        """
+        Start daemon worker threads that run jobs as they become due.
+
+        Jobs enqueued by this queue object wake the workers up immediately, jobs enqueued by other processes
+        are picked up within ``poll_interval`` seconds.
+        """
+        if workers <= 0:
+            raise ValueError("workers must be a positive integer")
+        self._stopping.clear()
+        for _ in range(workers):
+            thread = threading.Thread(target=bind(self._work), args=(poll_interval,))
+            thread.daemon = True
+            thread.start()
+            self._workers.append(thread)
+
+    def stop(self, timeout=None):
+        """Stop the workers once they finish their current job."""
+        self._stopping.set()
+        with self._ready:
+            self._ready.notify_all()
+        for thread in self._workers:
+            thread.join(timeout)
+        self._workers = []
+
+    def join(self, timeout=None):
+        """
+        Wait until no job is pending or running.
+
+        :return: True if the queue was drained, False on timeout
+        """
+        deadline = time.time() + timeout if timeout is not None else None
+        while True:
+            counts = self.counts()
+            if not counts.get(PENDING) and not counts.get(RUNNING):
+                return True
+            if deadline is not None and time.time() >= deadline:
+                return False
+            time.sleep(0.01)
+
+    def _work(self, poll_interval):
+        while not self._stopping.is_set():
+            try:
+                job = self._claim()
+            except sqlite3.Error:
+                logger.exception("Claiming a job failed")
+                job = None
+            if job is not None:
+                self._run(job)
+                continue
+            with self._ready:
+                if not self._stopping.is_set():
+                    self._ready.wait(min(poll_interval, self._next_run_in()))
+
+    def _next_run_in(self):
+        row = self._query_one("SELECT MIN(run_at) FROM jobs WHERE status = ?", (PENDING,))
+        if row is None or row[0] is None:
+            return POLL_INTERVAL
+        return max(0.0, row[0] - time.time())
+
+    def _claim(self):
+        now = time.time()
+        job = None
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                expired = self._expire(now)
+                row = self._db.execute(
+                    "SELECT id FROM jobs WHERE (status = ? AND run_at <= ?) OR (status = ? AND lease_expires_at <= ?) "
+                    "ORDER BY run_at, id LIMIT 1", (PENDING, now, RUNNING, now)).fetchone()
+                if row is not None:
+                    self._db.execute(
+                        "UPDATE jobs SET status = ?, attempts = attempts + 1, lease_expires_at = ?, updated_at = ? "
+                        "WHERE id = ?", (RUNNING, now + self.lease, now, row[0]))
+                    job = Job(self._db.execute("SELECT {0} FROM jobs WHERE id = ?".format(", ".join(_COLUMNS)),
+                                               row).fetchone())
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        for failed in expired:
+            logger.error("Job %s failed: %s", failed.id, failed.error)
+            self._callback(self.on_error, failed)
+        return job
+
+    def _expire(self, now):
+        """Fail the abandoned jobs that used up their attempts, within the claim transaction."""
+        rows = self._db.execute(
+            "SELECT {0} FROM jobs WHERE status = ? AND lease_expires_at <= ? AND attempts >= max_attempts".format(
+                ", ".join(_COLUMNS)), (RUNNING, now)).fetchall()
+        expired = []
+        for row in rows:
+            job = Job(row)
+            job.status = FAILED
+            job.error = "LeaseExpired: the job did not complete within {0} seconds".format(self.lease)
+            job.updated_at = now
+            self._db.execute("UPDATE jobs SET status = ?, error = ?, lease_expires_at = NULL, updated_at = ? "
+                             "WHERE id = ?", (job.status, job.error, job.updated_at, job.id))
+            expired.append(job)
+        return expired
+
+    def _run(self, job):
+        try:
+            result = getattr(uploader, job.operation)(*job.args, **job.options)
+        except Exception as e:
+            self._failed(job, e)
+        else:
+            self._done(job, result)
+
+    def _done(self, job, result):
+        job.status = DONE
+        job.result = result
+        job.error = None
+        job.updated_at = time.time()
+        with self._lock:
+            updated = self._db.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = NULL, lease_expires_at = NULL, updated_at = ? "
+                "WHERE id = ? AND status = ? AND attempts = ?",
+                (DONE, json.dumps(result, default=str), job.updated_at, job.id, RUNNING, job.attempts)).rowcount
+        if not updated:
+            logger.warning("Job %s completed after its lease expired", job.id)
+            return
+        self._callback(self.on_complete, job)
+
+    def _failed(self, job, error):
+        job.error = "{0}: {1}".format(type(error).__name__, error)
+        job.updated_at = time.time()
+        if is_retryable(error) and job.attempts < job.max_attempts:
+            job.status = PENDING
+            job.run_at = job.updated_at + retry_delay(job.attempts)
+        else:
+            job.status = FAILED
+        with self._lock:
+            updated = self._db.execute(
+                "UPDATE jobs SET status = ?, run_at = ?, error = ?, lease_expires_at = NULL, updated_at = ? "
+                "WHERE id = ? AND status = ? AND attempts = ?",
+                (job.status, job.run_at, job.error, job.updated_at, job.id, RUNNING, job.attempts)).rowcount
+        if not updated:
+            logger.warning("Job %s failed after its lease expired: %s", job.id, job.error)
+        elif job.status == PENDING:
+            logger.warning("Job %s failed, retrying in %.1f seconds: %s", job.id, job.run_at - job.updated_at,
+                           job.error)
+        else:
+            logger.error("Job %s failed: %s", job.id, job.error)
+            self._callback(self.on_error, job)
+
+    @staticmethod
+    def _callback(callback, job):
+        if callback is None:
+            return
+        try:
+            callback(job)
+        except Exception:
+            logger.error("Job callback failed", exc_info=sys.exc_info())
+
+    def _query_one(self, sql, args=()):
+        with self._lock:
+            return self._db.execute(sql, args).fetchone()
+
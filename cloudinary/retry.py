@@ -0,0 +1,34 @@
+# Copyright Cloudinary
+"""
+Classification of API errors as temporary or permanent, and the backoff between attempts, shared by the modules
+that retry failed requests.
+"""
+import random
+
+from cloudinary import api
+
+RETRY_BASE_DELAY = 1.0
+MAX_RETRY_DELAY = 300.0
+
+# Errors that fail the same way when retried
+PERMANENT_ERRORS = (api.BadRequest, api.AuthorizationRequired, api.NotAllowed, api.NotFound, api.AlreadyExists)
+
+
+def is_retryable(error):
+    """
+    :param error: the exception raised by a call of :mod:`cloudinary.uploader` or :mod:`cloudinary.api`
+    :return: True if the call may succeed when retried, e.g. when rate limited, on server and network errors
+    :rtype: bool
+    """
+    return isinstance(error, api.Error) and not isinstance(error, PERMANENT_ERRORS)
+
+
+def retry_delay(attempts, base=RETRY_BASE_DELAY, maximum=MAX_RETRY_DELAY):
+    """
+    :param attempts: the number of failed attempts
+    :param base: the seconds to wait after the first attempt
+    :param maximum: the maximal seconds to wait
+    :return: the seconds to wait before the next attempt, doubling with each attempt, with random jitter
+    """
+    delay = min(maximum, base * 2 ** (attempts - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
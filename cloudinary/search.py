@@ -1,60 +1,291 @@
 import json
+import sys
+import threading
 from copy import deepcopy
 
-from . import api
+import six
+
+import cloudinary
+from . import local_search
+from .cache import TTLCache
+
+DEFAULT_PAGE_SIZE = 500
+
+DEFAULT_RESULT_CACHE_TTL = 60
+DEFAULT_RESULT_CACHE_SIZE = 1024
+
+# Fields whose values are order independent, so they are sorted in the canonical form of a query
+UNORDERED_FIELDS = ("aggregate", "with_field")
+
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+
+def _serialize(value):
+    return json.dumps(value, sort_keys=True, separators=(',', ':'))
 
 
 class Search:
     """Build and execute a search query."""
     def __init__(self):
         self.query = {}
+        self._key = None
 
     def expression(self, value):
         """Specify the search query expression."""
-        self.query["expression"] = value
-        return self
+        return self._set("expression", value)
 
     def max_results(self, value):
         """Set the max results to return"""
-        self.query["max_results"] = value
-        return self
+        return self._set("max_results", value)
 
     def next_cursor(self, value):
         """Get next page in the query using the ``next_cursor`` value from a previous invocation."""
-        self.query["next_cursor"] = value
-        return self
+        return self._set("next_cursor", value)
 
     def sort_by(self, field_name, direction=None):
         """Add a field to sort results by. If not provided, direction is ``desc``."""
         if direction is None:
             direction = 'desc'
-        self._add("sort_by", {field_name: direction})
-        return self
+        return self._add("sort_by", {field_name: direction})
 
     def aggregate(self, value):
         """Aggregate field."""
-        self._add("aggregate", value)
-        return self
+        return self._add("aggregate", value)
 
     def with_field(self, value):
         """Request an additional field in the result set."""
-        self._add("with_field", value)
-        return self
+        return self._add("with_field", value)
 
     def to_json(self):
         return json.dumps(self.query)
 
+    def canonical_key(self):
+        """
+        A canonical serialization of the query, which is the same for equivalent queries.
+
+        Keys are sorted, and so are the order independent ``aggregate`` and ``with_field`` values, by their
+        serialization, as they may be dicts. The order of ``sort_by`` fields is significant and kept.
+        """
+        if self._key is None:
+            query = dict(self.query)
+            for name in UNORDERED_FIELDS:
+                if name in query:
+                    query[name] = sorted(query[name], key=_serialize)
+            if "max_results" in query:
+                try:
+                    query["max_results"] = int(query["max_results"])
+                except (TypeError, ValueError):
+                    pass
+            self._key = _serialize(query)
+        return self._key
+
+    def freeze(self):
+        """
+        :return: an immutable, hashable copy of this search
+        :rtype: FrozenSearch
+        """
+        return FrozenSearch(self.query)
+
     def execute(self, **options):
-        """Execute the search and return results."""
+        """
+        Execute the search and return results.
+
+        Results are cached when the ``search_cache_ttl`` configuration parameter is set, or when the ``cache``
+        option is True or a :class:`cloudinary.cache.TTLCache`. ``cache=False`` bypasses the cache.
+        Cached results are shared between callers and should not be modified.
+        """
+        cache = _get_result_cache(options.pop("cache", None))
+        if cache is None:
+            return self._execute(self.query, **options)
+
+        key = (options.get("cloud_name", cloudinary.config().cloud_name),
+               options.get("api_key", cloudinary.config().api_key),
+               self.canonical_key())
+        result = cache.get(key)
+        if result is None:
+            result = self._execute(self.query, **options)
+            cache.set(key, result)
+        return result
+
+    def iterate(self, page_size=DEFAULT_PAGE_SIZE, prefetch=True, **options):
+        """
+        Iterate over the resources of all result pages, starting at the current ``next_cursor``.
+
+        :param page_size: the number of resources to request per page
+        :param prefetch: fetch the next page in the background while the current page is consumed
+        :param options: additional options passed to the request
+
+        :return: an iterator over the matching resources
+        :rtype: SearchIterator
+        """
+        return SearchIterator(self, page_size, prefetch, **options)
+
+    def execute_local(self, index, remote_fallback=False, **options):
+        """
+        Evaluate the search against a local resource index instead of the Search API.
+
+        :param index: a :class:`cloudinary.local_search.ResourceIndex` or :class:`cloudinary.mirror.Mirror`
+        :param remote_fallback: if True, run the search remotely when it cannot be evaluated locally.
+                                Otherwise :class:`cloudinary.local_search.UnsupportedQuery` is raised.
+        :param options: options passed to :meth:`execute` on remote fallback
+
+        :return: the search results, in the same shape as :meth:`execute`
+        """
+        try:
+            return local_search.execute(self.query, index)
+        except local_search.UnsupportedQuery:
+            if not remote_fallback:
+                raise
+        return self.execute(**options)
+
+    def _execute(self, query, **options):
         options["content_type"] = 'application/json'
         uri = ['resources', 'search']
-        return api.call_json_api('post', uri, self.as_dict(), **options)
+        # Imported here so that building URLs does not import the HTTP client
+        from cloudinary import api
+        return api.call_json_api('post', uri, query, **options)
+
+    def _set(self, name, value):
+        self.query[name] = value
+        self._key = None
+        return self
 
     def _add(self, name, value):
         if name not in self.query:
             self.query[name] = []
         self.query[name].append(value)
+        self._key = None
         return self
 
     def as_dict(self):
         return deepcopy(self.query)
+
+
+class FrozenSearch(Search):
+    """
+    An immutable, hashable search query.
+
+    Builder methods return a new ``FrozenSearch`` instead of modifying the query, and the canonical key used
+    for hashing, equality and result caching is computed once.
+    """
+    def __init__(self, query=None):
+        Search.__init__(self)
+        self.query = deepcopy(query or {})
+        self.canonical_key()
+
+    def freeze(self):
+        return self
+
+    def _set(self, name, value):
+        query = dict(self.query)
+        query[name] = value
+        return FrozenSearch(query)
+
+    def _add(self, name, value):
+        query = dict(self.query)
+        query[name] = query.get(name, []) + [value]
+        return FrozenSearch(query)
+
+    def __hash__(self):
+        return hash(self._key)
+
+    def __eq__(self, other):
+        return isinstance(other, FrozenSearch) and self._key == other._key
+
+    def __ne__(self, other):
+        return not self == other
+
+
+def _get_result_cache(cache):
+    global _result_cache
+    if cache is False:
+        return None
+    if isinstance(cache, TTLCache):
+        return cache
+    ttl = cloudinary.config().search_cache_ttl
+    if not ttl and cache is not True:
+        return None
+    ttl = ttl or DEFAULT_RESULT_CACHE_TTL
+    max_size = cloudinary.config().search_cache_size or DEFAULT_RESULT_CACHE_SIZE
+    client = cloudinary.client.current_client()
+    if client is not None:
+        return client.get_cache("search_results", max_size, ttl)
+    with _result_cache_lock:
+        if _result_cache is None or _result_cache.ttl != ttl or _result_cache.max_size != max_size:
+            _result_cache = TTLCache(max_size, ttl)
+        return _result_cache
+
+
+def clear_result_cache():
+    """Remove all cached search results."""
+    if _result_cache is not None:
+        _result_cache.clear()
+
+
+class SearchIterator(object):
+    """
+    Iterates over the resources of all pages of a search.
+
+    At most one page is fetched ahead of the page being consumed, so memory stays bounded.
+    ``next_cursor`` is the cursor of the first page that was not fully consumed. Pass it to
+    ``Search.next_cursor()`` to resume an interrupted iteration.
+    """
+    def __init__(self, search, page_size=DEFAULT_PAGE_SIZE, prefetch=True, **options):
+        self._search = search
+        self._query = dict(search.query, max_results=page_size)
+        self._prefetch = prefetch
+        self._options = options
+        self.next_cursor = search.query.get("next_cursor")
+        self.exhausted = False
+
+    def __iter__(self):
+        for page in self.pages():
+            for resource in page.get("resources", []):
+                yield resource
+
+    def pages(self):
+        """
+        :return: a generator of the search responses, one per page
+        """
+        cursor = self.next_cursor
+        pending = self._fetch_in_background(cursor) if self._prefetch else None
+        while not self.exhausted:
+            page = pending.result() if pending else self._fetch(cursor)
+            cursor = page.get("next_cursor")
+            pending = self._fetch_in_background(cursor) if cursor and self._prefetch else None
+            yield page
+            self.next_cursor = cursor
+            self.exhausted = not cursor
+
+    def _fetch(self, cursor):
+        query = dict(self._query, next_cursor=cursor) if cursor else self._query
+        return self._search._execute(query, **dict(self._options))
+
+    def _fetch_in_background(self, cursor):
+        # The fetching thread uses the configuration of the scope the iteration runs in
+        call = _BackgroundCall(cloudinary.client.bind(self._fetch), cursor)
+        call.start()
+        return call
+
+
+class _BackgroundCall(threading.Thread):
+    def __init__(self, func, *args):
+        super(_BackgroundCall, self).__init__()
+        self.daemon = True
+        self._func = func
+        self._args = args
+        self._value = None
+        self._exc_info = None
+
+    def run(self):
+        try:
+            self._value = self._func(*self._args)
+        except Exception:
+            self._exc_info = sys.exc_info()
+
+    def result(self):
+        self.join()
+        if self._exc_info is not None:
+            six.reraise(*self._exc_info)
+        return self._value
@@ -0,0 +1,273 @@
+# Copyright Cloudinary
+"""
+Signing of upload requests for direct uploads from browsers.
+
+The browser asks the application for signed upload parameters, then uploads the file directly to Cloudinary,
+so upload traffic never reaches the application servers.
+
+Signed parameters are cached per account and set of options for a freshness window, and their timestamp is rounded
+down to the start of the window, like :func:`cloudinary.utils.signed_upload_params`. With ``pregenerate=True`` a
+background thread signs the recently requested option sets for the next window before it starts, in the
+:func:`cloudinary.using` scope they were requested in, so requests are served from the cache.
+
+A signature lets anyone who holds it upload with the signed parameters, so the endpoint must only serve
+authenticated users, and only the options they may set. :class:`SignatureApp` and
+:func:`cloudinary.views.signature_view` require an ``authorize`` callback for each request.
+
+Example::
+
+    issuer = SignatureIssuer(allowed_options=("public_id", "tags"), fixed_options={"folder": "user_uploads"})
+    issuer.sign({"public_id": "avatar"})
+    application = SignatureApp(lambda environ, params: is_logged_in(environ), issuer)  # WSGI application
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+
+import cloudinary
+from cloudinary import client, utils
+from cloudinary.cache import TTLCache
+
+# Options that do not choose where the resource is stored or what it costs to process
+DEFAULT_ALLOWED_OPTIONS = ("tags", "context")
+
+MAX_BATCH_SIZE = 100
+MAX_BODY_SIZE = 1024 * 1024
+
+DEFAULT_CACHE_SIZE = 4096
+DEFAULT_RECENT_SIZE = 256
+
+# The next window is pre-signed this many seconds before it starts
+PREGENERATE_LEAD_TIME = 5
+
+ACCOUNT_OPTIONS = ("cloud_name", "api_key", "api_secret")
+
+
+class SignatureError(ValueError):
+    """The requested options cannot be signed."""
+    pass
+
+
+class SignatureIssuer(object):
+    """
+    Signs upload parameters requested by browsers.
+
+    Subclasses can override :meth:`check_options` to apply their own rules.
+
+    :param allowed_options: the options a request may set, only ``tags`` and ``context`` by default. Other options
+                            are rejected. Allowing e.g. ``public_id``, ``folder`` or ``eager`` lets the holder
+                            of a signature overwrite resources or trigger transformations.
+    :param fixed_options: options added to every request, overriding requested values, e.g. ``folder``
+    :param window: the freshness window of signatures in seconds, the ``upload_params_cache_ttl`` configuration
+                   parameter or 60 by default. At most :const:`cloudinary.utils.MAX_UPLOAD_PARAMS_CACHE_TTL`.
+    :param cache_size: the maximal number of cached signatures
+    :param pregenerate: sign the recently requested option sets for the next window in a background thread
+    :param options: account options, ``api_key`` and ``api_secret``
+    """
+    def __init__(self, allowed_options=DEFAULT_ALLOWED_OPTIONS, fixed_options=None, window=None,
+                 cache_size=DEFAULT_CACHE_SIZE, pregenerate=False, **options):
+        if window is None:
+            window = cloudinary.config().upload_params_cache_ttl or utils.UPLOAD_PARAMS_CACHE_TTL
+        window = int(window)
+        if not 0 < window <= utils.MAX_UPLOAD_PARAMS_CACHE_TTL:
+            raise ValueError("window must be between 1 and {0} seconds".format(utils.MAX_UPLOAD_PARAMS_CACHE_TTL))
+        self.allowed_options = frozenset(allowed_options)
+        self.fixed_options = dict(fixed_options or {})
+        self.window = window
+        self.account_options = options
+        self._cache = TTLCache(cache_size, window * 2)
+        self._recent = OrderedDict()
+        self._recent_lock = threading.Lock()
+        self._pregenerator = None
+        if pregenerate:
+            self._pregenerator = threading.Thread(target=client.bind(self._pregenerate))
+            self._pregenerator.daemon = True
+            self._stopped = threading.Event()
+            self._pregenerator.start()
+
+    def check_options(self, options):
+        """
+        Validate the requested options.
+
+        :param options: the options of a request
+        :type options: dict
+
+        :raises SignatureError: if the options are not allowed
+        """
+        if not isinstance(options, dict):
+            raise SignatureError("Expected an object of upload options")
+        disallowed = sorted(set(options) - self.allowed_options)
+        if disallowed:
+            raise SignatureError("Options not allowed: {0}".format(", ".join(disallowed)))
+
+    def sign(self, options=None):
+        """
+        :param options: the upload options requested by the browser
+        :type options: dict
+
+        :return: the signed upload parameters, including ``timestamp``, ``signature`` and ``api_key``
+        :rtype: dict
+
+        :raises SignatureError: if the options are not allowed
+        """
+        options = options or {}
+        self.check_options(options)
+        options = dict(options, **self.fixed_options)
+        try:
+            frozen = utils.freeze(options)
+            hash(frozen)
+        except TypeError:
+            raise SignatureError("Unsupported option values")
+
+        timestamp = int(time.time()) // self.window * self.window
+        key = (self._account(), frozen)
+        params = self._cache.get(key + (timestamp,))
+        if params is None:
+            params = self._sign(options, timestamp)
+            self._cache.set(key + (timestamp,), params)
+        if self._pregenerator is not None:
+            self._remember(key, options)
+        return dict(params)
+
+    def sign_batch(self, requests):
+        """
+        Sign many upload requests at once.
+
+        :param requests: a list of upload options, at most :const:`MAX_BATCH_SIZE`
+        :type requests: list
+
+        :return: the signed parameters of each request, or ``{"error": {"message": ...}}`` for rejected requests
+        :rtype: list
+        """
+        if len(requests) > MAX_BATCH_SIZE:
+            raise SignatureError("At most {0} requests can be signed at once".format(MAX_BATCH_SIZE))
+        results = []
+        for options in requests:
+            try:
+                results.append(self.sign(options))
+            except SignatureError as e:
+                results.append({"error": {"message": str(e)}})
+        return results
+
+    def handle(self, body, authorize=None):
+        """
+        Sign the upload requests in a JSON request body, an object or a list of objects.
+
+        :param body: the request body
+        :type body: bytes
+        :param authorize: called with the decoded upload requests, returns False to deny them
+
+        :return: the HTTP status and the JSON response body
+        :rtype: tuple
+        """
+        try:
+            requests = json.loads(body.decode("utf-8")) if body else {}
+        except ValueError as e:
+            return 400, json.dumps({"error": {"message": str(e)}}).encode("utf-8")
+        if authorize is not None and not authorize(requests):
+            return 403, b'{"error": {"message": "Forbidden"}}'
+        try:
+            if isinstance(requests, list):
+                result = self.sign_batch(requests)
+            else:
+                result = self.sign(requests)
+        except (SignatureError, ValueError) as e:
+            return 400, json.dumps({"error": {"message": str(e)}}).encode("utf-8")
+        return 200, json.dumps(result).encode("utf-8")
+
+    def stats(self):
+        """
+        :return: the signature cache statistics, see :meth:`cloudinary.cache.TTLCache.stats`
+        """
+        return self._cache.stats()
+
+    def close(self):
+        """Stop the background pre-generation."""
+        if self._pregenerator is not None:
+            self._stopped.set()
+            self._pregenerator.join()
+            self._pregenerator = None
+
+    def _account(self):
+        # The account options not given to the issuer are those of the current scope
+        config = cloudinary.config()
+        return tuple(self.account_options.get(name, getattr(config, name, None)) for name in ACCOUNT_OPTIONS)
+
+    def _sign(self, options, timestamp):
+        params = utils.build_upload_params(**options)
+        params["timestamp"] = str(timestamp)
+        return utils.sign_request(params, dict(options, **self.account_options))
+
+    def _remember(self, key, options):
+        # The options are signed again in the scope of the request, with the same account
+        sign = client.bind(self._sign)
+        with self._recent_lock:
+            self._recent.pop(key, None)
+            self._recent[key] = (options, sign)
+            while len(self._recent) > DEFAULT_RECENT_SIZE:
+                self._recent.popitem(last=False)
+
+    def pregenerate(self, timestamp):
+        """
+        Sign the recently requested option sets for the window starting at ``timestamp``.
+
+        Called by the background thread before each window starts when ``pregenerate`` is enabled.
+        """
+        with self._recent_lock:
+            recent = list(self._recent.items())
+        for key, (options, sign) in recent:
+            if key + (timestamp,) not in self._cache:
+                try:
+                    self._cache.set(key + (timestamp,), sign(options, timestamp))
+                except Exception:
+                    cloudinary.logger.exception("Failed to pre-generate an upload signature")
+
+    def _pregenerate(self):
+        lead_time = min(PREGENERATE_LEAD_TIME, self.window / 2.0)
+        while True:
+            now = time.time()
+            next_timestamp = (int(now) // self.window + 1) * self.window
+            if self._stopped.wait(max(0, next_timestamp - lead_time - now)):
+                return
+            self.pregenerate(next_timestamp)
+            # Sleep past the lead time, so each window is pre-generated once
+            if self._stopped.wait(lead_time):
+                return
+
+
+class SignatureApp(object):
+    """
+    A WSGI application that signs the upload requests POSTed to it as JSON.
+
+    :param authorize: called with the WSGI environ and the decoded upload requests, an object or a list of
+                      objects, returns True if the request may have them signed, e.g. for a logged in user
+    :param issuer: the issuer, a default :class:`SignatureIssuer` if not given
+    """
+    def __init__(self, authorize, issuer=None):
+        if not callable(authorize):
+            raise TypeError("authorize must be a callable checking the requests")
+        self.authorize = authorize
+        self.issuer = issuer or SignatureIssuer()
+
+    def __call__(self, environ, start_response):
+        if environ.get("REQUEST_METHOD") != "POST":
+            return _wsgi_response(start_response, 405, b'{"error": {"message": "Method not allowed"}}')
+        try:
+            length = int(environ.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            length = 0
+        if length > MAX_BODY_SIZE:
+            return _wsgi_response(start_response, 413, b'{"error": {"message": "Request too large"}}')
+        status, body = self.issuer.handle(environ["wsgi.input"].read(length) if length else b"",
+                                          lambda params: self.authorize(environ, params))
+        return _wsgi_response(start_response, status, body)
+
+
+WSGI_STATUS = {200: "200 OK", 400: "400 Bad Request", 401: "401 Unauthorized", 403: "403 Forbidden",
+               405: "405 Method Not Allowed", 413: "413 Payload Too Large"}
+
+
+def _wsgi_response(start_response, status, body):
+    start_response(WSGI_STATUS[status], [("Content-Type", "application/json"), ("Content-Length", str(len(body)))])
+    return [body]
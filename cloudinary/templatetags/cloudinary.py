@@ -3,7 +3,7 @@ from __future__ import absolute_import
 import json
 
 import cloudinary
-from cloudinary import CloudinaryResource, utils
+from cloudinary import CloudinaryResource, prefetch, utils
 from cloudinary.compat import PY3
 from cloudinary.forms import CloudinaryJsFileField, cl_init_js_callbacks
 from django import template
@@ -45,6 +45,40 @@ def cloudinary_tag(context, image, options_dict=None, **options):
     return mark_safe(image.image(**options))
 
 
+@register.filter(name='prefetch_cloudinary_urls')
+def prefetch_cloudinary_urls_filter(objects, field_name):
+    """
+    Usage: {% for product in products|prefetch_cloudinary_urls:"image" %}{{ product.image_urls }}{% endfor %}
+    """
+    return _prefetch_safe_urls(objects, field_name)
+
+
+@register.simple_tag(name='cloudinary_prefetch', takes_context=True)
+def cloudinary_prefetch(context, objects, field_name, options_dict=None, **options):
+    """
+    Usage: {% cloudinary_prefetch products "image" width=200 crop="fill" as products %}
+    """
+    if options_dict is None:
+        options = dict(**options)
+    else:
+        options = dict(options_dict, **options)
+    try:
+        if context['request'].is_secure() and 'secure' not in options:
+            options['secure'] = True
+    except KeyError:
+        pass
+    return _prefetch_safe_urls(objects, field_name, **options)
+
+
+def _prefetch_safe_urls(objects, field_name, **options):
+    objects = prefetch.prefetch_cloudinary_urls(objects, field_name, **options)
+    for obj in objects:
+        urls = getattr(obj, field_name + "_urls")
+        if urls is not None:
+            urls.image = mark_safe(urls.image)
+    return objects
+
+
 @register.simple_tag
 def cloudinary_direct_upload_field(field_name="image", request=None):
     form = type("OnTheFlyForm", (Form,), {field_name: CloudinaryJsFileField()})()
@@ -59,8 +93,7 @@ def cloudinary_direct_upload_field(field_name="image", request=None):
 @register.inclusion_tag('cloudinary_direct_upload.html')
 def cloudinary_direct_upload(callback_url, **options):
     """Deprecated - please use cloudinary_direct_upload_field, or a proper form"""
-    params = utils.build_upload_params(callback=callback_url, **options)
-    params = utils.sign_request(params, options)
+    params = utils.signed_upload_params(callback=callback_url, **options)
 
     api_url = utils.cloudinary_api_url("upload", resource_type=options.get("resource_type", "image"),
                                        upload_prefix=options.get("upload_prefix"))
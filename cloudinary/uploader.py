@@ -1,19 +1,17 @@
 # Copyright Cloudinary
-import json
 import re
 import socket
+import threading
 from os.path import getsize
 
-from six import string_types
+from six import string_types, text_type
 from urllib3 import PoolManager
 from urllib3.exceptions import HTTPError
 
-from django.utils.encoding import escape_uri_path
-
-import certifi
 import cloudinary
-from cloudinary import utils
-from cloudinary.api import Error
+from cloudinary import codec, coalesce, instrumentation, utils
+from cloudinary.api import EXCEPTION_CODES, Error
+from cloudinary.compat import quote
 
 try:
     from urllib3.contrib.appengine import AppEngineManager, is_appengine_sandbox
@@ -26,15 +24,48 @@ try:  # Python 2.7+
 except ImportError:
     from urllib3.packages.ordered_dict import OrderedDict
 
-if is_appengine_sandbox():
-    # AppEngineManager uses AppEngine's URLFetch API behind the scenes
-    _http = AppEngineManager()
-else:
-    # PoolManager uses a socket-level API behind the scenes
-    _http = PoolManager(
-        cert_reqs='CERT_REQUIRED',
-        ca_certs=certifi.where()
-    )
+# Created on first use, so importing the module does not load the CA certificates
+_http = None
+_http_lock = threading.Lock()
+
+
+def _get_http():
+    client = cloudinary.client.current_client()
+    if client is not None:
+        return client.get_http("upload", _new_http)
+    global _http
+    if _http is None:
+        with _http_lock:
+            if _http is None:
+                _http = _new_http()
+    return _http
+
+
+def _new_http():
+    if is_appengine_sandbox():
+        # AppEngineManager uses AppEngine's URLFetch API behind the scenes
+        http = AppEngineManager()
+    else:
+        import certifi
+        # PoolManager uses a socket-level API behind the scenes
+        http = PoolManager(
+            cert_reqs='CERT_REQUIRED',
+            ca_certs=certifi.where()
+        )
+    instrumentation.instrument(http)
+    return http
+
+
+def escape_uri_path(path):
+    """
+    Escape a file name sent as the name of an uploaded file, like ``django.utils.encoding.escape_uri_path``.
+
+    :param path: the file name
+    :return: the escaped file name
+    """
+    if isinstance(path, text_type):
+        path = path.encode("utf-8")
+    return quote(path, safe=b"/:@&+$,-_.!~*'()")
 
 
 def upload(file, **options):
@@ -222,6 +253,12 @@ def remove_all_context(public_ids, **options):
 
 
 def call_tags_api(tag, command, public_ids=None, **options):
+    """
+    Send a tags command. With the ``coalesce`` option or the ``coalesce_tags`` configuration parameter the command
+    is buffered and merged with other commands, see :class:`cloudinary.coalesce.WriteBehindBuffer`.
+    """
+    if options.pop("coalesce", cloudinary.config().coalesce_tags) and public_ids:
+        return coalesce.get_write_behind_buffer().tags(tag, command, public_ids, **options).result()
     params = {
         "timestamp": utils.now(),
         "tag": tag,
@@ -233,6 +270,12 @@ def call_tags_api(tag, command, public_ids=None, **options):
 
 
 def call_context_api(context, command, public_ids=None, **options):
+    """
+    Send a context command, buffered like :func:`call_tags_api` with the ``coalesce`` option or the
+    ``coalesce_tags`` configuration parameter.
+    """
+    if options.pop("coalesce", cloudinary.config().coalesce_tags) and public_ids:
+        return coalesce.get_write_behind_buffer().context(context, command, public_ids, **options).result()
     params = {
         "timestamp": utils.now(),
         "context": utils.encode_context(context),
@@ -269,18 +312,7 @@ def call_api(action, params, http_headers=None, return_error=False, unsigned=Fal
         http_headers = {}
     file_io = None
     try:
-        if unsigned:
-            params = utils.cleanup_params(params)
-        else:
-            params = utils.sign_request(params, options)
-
-        param_list = OrderedDict()
-        for k, v in params.items():
-            if isinstance(v, list):
-                for i in range(len(v)):
-                    param_list["{0}[{1}]".format(k, i)] = v[i]
-            elif v:
-                param_list[k] = v
+        param_list = _build_param_list(params, unsigned, options)
 
         api_url = utils.cloudinary_api_url(action, **options)
         if file:
@@ -316,29 +348,66 @@ def call_api(action, params, http_headers=None, return_error=False, unsigned=Fal
         if timeout is not None:
             kw['timeout'] = timeout
 
-        code = 200
         try:
-            response = _http.request("POST", api_url, param_list, headers, **kw)
+            response = instrumentation.request(_get_http(), "upload", "POST", api_url, param_list, headers, **kw)
         except HTTPError as e:
             raise Error("Unexpected error - {0!r}".format(e))
         except socket.error as e:
             raise Error("Socket error: {0!r}".format(e))
 
-        try:
-            result = json.loads(response.data.decode('utf-8'))
-        except Exception as e:
-            # Error is parsing json
-            raise Error("Error parsing server response (%d) - %s. Got - %s", response.status, response, e)
-
-        if "error" in result:
-            if response.status not in [200, 400, 401, 403, 404, 500]:
-                code = response.status
-            if return_error:
-                    result["error"]["http_code"] = code
-            else:
-                raise Error(result["error"]["message"])
-
-        return result
+        return _parse_response(response, response.data, return_error)
     finally:
         if file_io:
             file_io.close()
+
+
+def _build_param_list(params, unsigned, options):
+    """
+    Sign (unless ``unsigned``) and flatten upload API parameters, expanding lists to ``key[i]`` entries.
+
+    :return: the request parameters
+    :rtype: OrderedDict
+    """
+    if unsigned:
+        params = utils.cleanup_params(params)
+    else:
+        params = utils.sign_request(params, options)
+
+    param_list = OrderedDict()
+    for k, v in params.items():
+        if isinstance(v, list):
+            for i in range(len(v)):
+                param_list["{0}[{1}]".format(k, i)] = v[i]
+        elif v:
+            param_list[k] = v
+    return param_list
+
+
+def _parse_response(response, body, return_error=False):
+    """
+    Decode the body of an upload API response.
+
+    :param response: the HTTP response, providing ``status``
+    :param body: the response body
+    :type body: bytes
+    :param return_error: return errors in the result instead of raising them
+
+    :return: the decoded response
+    :rtype: dict
+    """
+    code = 200
+    try:
+        result = codec.loads(body)
+    except Exception as e:
+        # Error is parsing json
+        raise Error("Error parsing server response (%d) - %s. Got - %s", response.status, response, e)
+
+    if "error" in result:
+        if response.status not in [200, 400, 401, 403, 404, 500]:
+            code = response.status
+        if return_error:
+                result["error"]["http_code"] = code
+        else:
+            raise EXCEPTION_CODES.get(response.status, Error)(result["error"]["message"])
+
+    return result
@@ -7,6 +7,7 @@ import random
 import re
 import string
 import struct
+import threading
 import time
 import zlib
 from collections import OrderedDict
@@ -18,6 +19,7 @@ from six import iteritems
 
 import cloudinary
 from cloudinary import auth_token
+from cloudinary.cache import TTLCache
 from cloudinary.compat import PY3, to_bytes, to_bytearray, to_string, string_types, urlparse
 
 VAR_NAME_RE = r'(\$\([a-zA-Z]\w+\))'
@@ -34,6 +36,13 @@ RANGE_VALUE_RE = r'^(?P<value>(\d+\.)?\d+)(?P<modifier>[%pP])?$'
 RANGE_RE = r'^(\d+\.)?\d+[%pP]?\.\.(\d+\.)?\d+[%pP]?$'
 FLOAT_RE = r'^(\d+)\.(\d+)?$'
 REMOTE_URL_RE = r'ftp:|https?:|s3:|data:[^;]*;base64,([a-zA-Z0-9\/+\n=]+)$'
+UPLOAD_PARAMS_CACHE_TTL = 60
+MAX_UPLOAD_PARAMS_CACHE_TTL = 1800
+UPLOAD_PARAMS_CACHE_SIZE = 256
+
+_upload_params_cache = None
+_upload_params_cache_lock = threading.Lock()
+
 __LAYER_KEYWORD_PARAMS = [("font_weight", "normal"),
                           ("font_style", "normal"),
                           ("text_decoration", "none"),
@@ -483,12 +492,28 @@ def merge(*dict_args):
 
 
 def cloudinary_url(source, **options):
-    original_source = source
-
     type = options.pop("type", "upload")
     if type == 'fetch':
         options["fetch_format"] = options.get("fetch_format", options.pop("format", None))
     transformation, options = generate_transformation_string(**options)
+    return cloudinary_url_with_transformation(source, type, transformation, options)
+
+
+def cloudinary_url_with_transformation(source, type, transformation, options):
+    """
+    Build a delivery URL from an already generated transformation string.
+
+    Lets callers that build many URLs with the same transformation generate it once.
+
+    :param source: the public ID or the URL to fetch
+    :param type: the delivery type
+    :param transformation: the transformation string, as returned by :func:`generate_transformation_string`
+    :param options: the options left by :func:`generate_transformation_string`. Consumed URL options are removed.
+    :type options: dict
+
+    :return: a tuple of the URL and the remaining options
+    """
+    original_source = source
 
     resource_type = options.pop("resource_type", "image")
     version = options.pop("version", None)
@@ -533,10 +558,7 @@ def cloudinary_url(source, **options):
 
     signature = None
     if sign_url and not auth_token:
-        to_sign = "/".join(__compact([transformation, source_to_sign]))
-        signature = "s--" + to_string(
-            base64.urlsafe_b64encode(
-                hashlib.sha1(to_bytes(to_sign + api_secret)).digest())[0:8]) + "--"
+        signature = url_signature("/".join(__compact([transformation, source_to_sign])), api_secret)
 
     prefix = unsigned_download_url_prefix(
         source, cloud_name, private_cdn, cdn_subdomain, secure_cdn_subdomain,
@@ -550,6 +572,17 @@ def cloudinary_url(source, **options):
     return source, options
 
 
+def url_signature(to_sign, api_secret):
+    """
+    :param to_sign: the transformation and the source of a delivery URL, joined with a slash
+    :param api_secret: the API secret
+
+    :return: the signature component of a signed delivery URL, ``s--<signature>--``
+    """
+    digest = hashlib.sha1(to_bytes(to_sign + api_secret)).digest()
+    return "s--" + to_string(base64.urlsafe_b64encode(digest)[0:8]) + "--"
+
+
 def cloudinary_api_url(action='upload', **options):
     cloudinary_prefix = options.get("upload_prefix", cloudinary.config().upload_prefix)\
                         or "https://api.cloudinary.com"
@@ -752,6 +785,92 @@ def build_upload_params(**options):
     return params
 
 
+def signed_upload_params(**options):
+    """
+    Build the upload parameters of a browser upload form, signed unless the ``unsigned`` option is set.
+
+    The parameters are cached, keyed on the options and the account, for the freshness window set by the
+    ``upload_params_cache_ttl`` configuration parameter (60 seconds by default, 0 disables the cache).
+    The timestamp is rounded down to the start of the window, so every request in the same window gets the same
+    signed parameters. The window cannot exceed :const:`MAX_UPLOAD_PARAMS_CACHE_TTL`, which stays well within the
+    timestamp tolerance of the upload API.
+
+    :return: the upload parameters
+    :rtype: dict
+    """
+    return dict(__cached_upload_params(options)[0])
+
+
+def signed_upload_form_data(**options):
+    """
+    Same as :func:`signed_upload_params`, encoded as JSON for the ``data-form-data`` attribute of an upload input.
+
+    :rtype: str
+    """
+    return __cached_upload_params(options)[1]
+
+
+def clear_upload_params_cache():
+    if _upload_params_cache is not None:
+        _upload_params_cache.clear()
+
+
+def __build_signed_upload_params(options, timestamp):
+    params = build_upload_params(**options)
+    if timestamp is not None:
+        params["timestamp"] = str(timestamp)
+    if options.get("unsigned"):
+        params = cleanup_params(params)
+    else:
+        params = sign_request(params, options)
+    return params, json.dumps(params)
+
+
+def __cached_upload_params(options):
+    global _upload_params_cache
+    ttl = cloudinary.config().upload_params_cache_ttl
+    if ttl is None:
+        ttl = UPLOAD_PARAMS_CACHE_TTL
+    ttl = int(ttl)
+    if ttl <= 0:
+        return __build_signed_upload_params(options, None)
+    if ttl > MAX_UPLOAD_PARAMS_CACHE_TTL:
+        raise ValueError("upload_params_cache_ttl must not exceed {0} seconds".format(MAX_UPLOAD_PARAMS_CACHE_TTL))
+
+    timestamp = int(time.time()) // ttl * ttl
+    try:
+        key = (freeze(options), options.get("api_key", cloudinary.config().api_key),
+               options.get("api_secret", cloudinary.config().api_secret), timestamp)
+        hash(key)
+    except TypeError:
+        return __build_signed_upload_params(options, timestamp)
+
+    client = cloudinary.client.current_client()
+    if client is not None:
+        cache = client.get_cache("upload_params", UPLOAD_PARAMS_CACHE_SIZE, ttl)
+    else:
+        with _upload_params_cache_lock:
+            if _upload_params_cache is None or _upload_params_cache.ttl != ttl:
+                _upload_params_cache = TTLCache(UPLOAD_PARAMS_CACHE_SIZE, ttl)
+            cache = _upload_params_cache
+    result = cache.get(key)
+    if result is None:
+        result = __build_signed_upload_params(options, timestamp)
+        cache.set(key, result)
+    return result
+
+
+def freeze(value):
+    """
+    Convert nested dicts and lists to tuples, so equal option values get equal hashable keys.
+    """
+    if isinstance(value, dict):
+        return tuple(sorted((k, freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
 def __process_text_options(layer, layer_parameter):
     font_family = layer.get("font_family")
     font_size = layer.get("font_size")
@@ -0,0 +1,53 @@
+from django.http import HttpResponse, HttpResponseNotAllowed
+from django.views.decorators.csrf import csrf_exempt
+
+from cloudinary.signing import SignatureIssuer
+
+
+def signature_view(authorize, issuer=None):
+    """
+    Create a view that signs the upload requests POSTed to it as JSON, for direct uploads from browsers.
+
+    Usage: path("upload-signature/", signature_view(lambda request, params: request.user.is_authenticated))
+
+    :param authorize: called with the request and the decoded upload requests, an object or a list of objects,
+                      returns True if the request may have them signed
+    :param issuer: the issuer, a default :class:`cloudinary.signing.SignatureIssuer` if not given
+
+    :return: the view
+    """
+    if not callable(authorize):
+        raise TypeError("authorize must be a callable checking the requests")
+    issuer = issuer or SignatureIssuer()
+
+    def view(request):
+        if request.method != "POST":
+            return HttpResponseNotAllowed(["POST"])
+        status, body = issuer.handle(request.body, lambda params: authorize(request, params))
+        return HttpResponse(body, status=status, content_type="application/json")
+
+    view.issuer = issuer
+    return view
+
+
+def notification_view(receiver):
+    """
+    Create a view that receives the upload and eager notifications sent to a ``notification_url``.
+
+    Usage: path("cloudinary-notifications/", notification_view(NotificationReceiver(invalidate_cache)))
+
+    :param receiver: the receiver
+    :type receiver: cloudinary.notifications.NotificationReceiver
+
+    :return: the view
+    """
+    @csrf_exempt
+    def view(request):
+        if request.method != "POST":
+            return HttpResponseNotAllowed(["POST"])
+        status, body = receiver.handle(request.body, request.META.get("HTTP_X_CLD_TIMESTAMP"),
+                                       request.META.get("HTTP_X_CLD_SIGNATURE"))
+        return HttpResponse(body, status=status, content_type="application/json")
+
+    view.receiver = receiver
+    return view
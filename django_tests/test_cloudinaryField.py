@@ -1,4 +1,6 @@
 import os
+import shutil
+import tempfile
 import unittest
 
 from mock import mock
@@ -7,14 +9,22 @@ from urllib3.util import parse_url
 import cloudinary
 from cloudinary import CloudinaryImage, CloudinaryResource, uploader
 from cloudinary.forms import CloudinaryFileField
-from cloudinary.models import CloudinaryField
-from django.test import TestCase
+from cloudinary.models import CloudinaryField, LazyCloudinaryResource
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
 from django.core.files.uploadedfile import SimpleUploadedFile
 
 from .models import Poll
 from django_tests.helper_test import SUFFIX, TEST_IMAGE, TEST_IMAGE_W, TEST_IMAGE_H
 
 API_TEST_ID = "dj_test_{}".format(SUFFIX)
+DEFERRED_RESULT = {"public_id": "deferred_id", "version": 1234, "format": "png", "type": "upload",
+                   "resource_type": "image", "width": TEST_IMAGE_W, "height": TEST_IMAGE_H}
+
+
+class InlinePool(object):
+    def submit(self, func):
+        func()
 
 
 class TestCloudinaryField(TestCase):
@@ -69,6 +79,73 @@ class TestCloudinaryField(TestCase):
         self.assertIsNone(p.image_width)
         self.assertIsNone(p.image_height)
 
+    def test_pre_save_deferred(self):
+        """should save a placeholder and fill in the resource after the upload completes"""
+        p = Poll(question="deferred", image_width=1, image_height=2)
+        p.image = SimpleUploadedFile(TEST_IMAGE, b'content')
+        field = Poll._meta.get_field("image")
+
+        with mock.patch.object(field, "deferred", True), mock.patch.object(field, "deferred_pool", InlinePool()), \
+                mock.patch('cloudinary.uploader.upload', return_value=DEFERRED_RESULT) as upload_mock:
+            with self.captureOnCommitCallbacks(execute=True):
+                p.save()
+                self.assertFalse(upload_mock.called)
+                self.assertIsNone(p.image.version)
+                placeholder_id = p.image.public_id
+                self.assertEqual(Poll.objects.get(pk=p.pk).image.public_id, placeholder_id)
+                self.assertEqual((p.image_width, p.image_height), (1, 2))
+
+        self.assertEqual(upload_mock.call_args[1]["public_id"], placeholder_id)
+        self.assertFalse(os.path.exists(upload_mock.call_args[0][0]))
+        self.assertEqual(TEST_IMAGE_W, p.image_width)
+        saved = Poll.objects.get(pk=p.pk)
+        self.assertEqual(saved.image_height, TEST_IMAGE_H)
+        self.assertEqual(field.get_prep_value(saved.image), "image/upload/v1234/deferred_id.png")
+
+    def test_pre_save_deferred_rollback(self):
+        """should not spool the file of a deferred upload when the transaction is rolled back"""
+        spool_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, spool_dir, True)
+        p = Poll(question="deferred")
+        p.image = SimpleUploadedFile(TEST_IMAGE, b'content')
+        field = Poll._meta.get_field("image")
+
+        with mock.patch.object(field, "deferred", True), mock.patch('cloudinary.uploader.upload') as upload_mock:
+            with self.captureOnCommitCallbacks(execute=False) as callbacks:
+                cloudinary.config(deferred_upload_dir=spool_dir)
+                try:
+                    with transaction.atomic():
+                        p.save()
+                        raise ValueError("rolled back")
+                except ValueError:
+                    pass
+                finally:
+                    cloudinary.config(deferred_upload_dir=None)
+
+        self.assertEqual(callbacks, [])
+        self.assertFalse(upload_mock.called)
+        self.assertEqual(os.listdir(spool_dir), [])
+
+    def test_from_db_value_is_lazy(self):
+        """should parse the database value on first use, with the same results as to_python"""
+        c = CloudinaryField('image', resource_type='video')
+        value = "v1234/{}.mp4".format(API_TEST_ID)
+        lazy = c.from_db_value(value, None, None)
+        self.assertIsInstance(lazy, LazyCloudinaryResource)
+        self.assertEqual(lazy._raw, value)
+
+        eager = c.to_python(value)
+        self.assertEqual(lazy.url, eager.url)
+        self.assertIsNone(lazy._raw)
+        self.assertEqual(lazy.image(), eager.image())
+        self.assertEqual(c.get_prep_value(lazy), "video/upload/v1234/{}.mp4".format(API_TEST_ID))
+
+        lazy = c.from_db_value(value, None, None)
+        lazy.version = "5678"
+        self.assertEqual(lazy.get_prep_value(), "video/upload/v5678/{}.mp4".format(API_TEST_ID))
+        with self.assertRaises(AttributeError):
+            lazy.unknown_attribute
+
     def test_get_prep_value(self):
         c = CloudinaryField('image')
         res = CloudinaryImage(public_id=API_TEST_ID, format='jpg')
@@ -101,3 +178,20 @@ class TestCloudinaryField(TestCase):
             "/{cloud}/image/upload/v1234/{name}.jpg".format(cloud=cloudinary.config().cloud_name, name=API_TEST_ID)
         )
         self.assertTrue(False or field.image)
+
+
+class TestCloudinaryFieldAutocommit(TransactionTestCase):
+    def test_pre_save_deferred(self):
+        """should start a deferred upload once the row is saved outside of transactions"""
+        p = Poll(question="deferred")
+        p.image = SimpleUploadedFile(TEST_IMAGE, b'content')
+        field = Poll._meta.get_field("image")
+
+        with mock.patch.object(field, "deferred", True), mock.patch.object(field, "deferred_pool", InlinePool()), \
+                mock.patch('cloudinary.uploader.upload', return_value=DEFERRED_RESULT) as upload_mock:
+            p.save()
+
+        self.assertTrue(upload_mock.called)
+        saved = Poll.objects.get(pk=p.pk)
+        self.assertEqual(field.get_prep_value(saved.image), "image/upload/v1234/deferred_id.png")
+        self.assertEqual((saved.image_width, saved.image_height), (TEST_IMAGE_W, TEST_IMAGE_H))
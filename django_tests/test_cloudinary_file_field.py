@@ -36,5 +36,30 @@ class TestCloudinaryFileField(TestCase):
         self.assertIsInstance(res, CloudinaryResource)
         self.assertEqual(API_TEST_ID, res.public_id)
 
+    def test_to_python_deferred(self):
+        """should return a placeholder and upload after the transaction commits"""
+        class InlinePool(object):
+            def submit(self, func):
+                func()
+
+        completed = []
+        field = CloudinaryFileField(autosave=True, deferred=True, deferred_pool=InlinePool(),
+                                    on_complete=completed.append, options={"public_id": API_TEST_ID})
+        upload_result = {"public_id": API_TEST_ID, "version": 1234, "format": "png"}
+        with mock.patch('cloudinary.uploader.upload', return_value=upload_result) as upload_mock:
+            with self.captureOnCommitCallbacks(execute=True):
+                res = field.to_python(self.test_file)
+                self.assertFalse(upload_mock.called)
+                self.assertEqual(API_TEST_ID, res.public_id)
+                self.assertIsNone(res.version)
+
+        self.assertTrue(upload_mock.called)
+        self.assertEqual("1234", res.version)
+        self.assertEqual("png", res.format)
+        self.assertEqual(completed, [res])
+
+        with self.assertRaises(ValueError):
+            CloudinaryFileField(autosave=True, deferred=True)
+
     def tearDown(self):
         pass
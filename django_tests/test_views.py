@@ -0,0 +1,61 @@
+import hashlib
+import json
+import time
+
+from django.conf.urls import url
+from django.test import Client, RequestFactory, TestCase
+
+from cloudinary.notifications import NotificationReceiver
+from cloudinary.signing import SignatureIssuer
+from cloudinary.views import notification_view, signature_view
+
+
+class TestSignatureView(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.view = signature_view(lambda request, params: request.META.get("HTTP_X_USER") == "user",
+                                   SignatureIssuer(allowed_options=("public_id",)))
+
+    def test_sign(self):
+        request = self.factory.post("/sign", data=json.dumps({"public_id": "avatar"}),
+                                    content_type="application/json", HTTP_X_USER="user")
+        response = self.view(request)
+        self.assertEqual(response.status_code, 200)
+        params = json.loads(response.content.decode("utf-8"))
+        self.assertEqual(params["public_id"], "avatar")
+        self.assertIn("signature", params)
+
+    def test_rejected(self):
+        request = self.factory.post("/sign", data=json.dumps({"type": "private"}), content_type="application/json",
+                                    HTTP_X_USER="user")
+        self.assertEqual(self.view(request).status_code, 400)
+        self.assertEqual(self.view(self.factory.get("/sign")).status_code, 405)
+
+    def test_unauthorized(self):
+        request = self.factory.post("/sign", data=json.dumps({"public_id": "avatar"}),
+                                    content_type="application/json")
+        self.assertEqual(self.view(request).status_code, 403)
+
+
+class TestNotificationView(TestCase):
+    def setUp(self):
+        self.batches = []
+        self.view = notification_view(NotificationReceiver(self.batches.append, secrets="b"))
+
+    def tearDown(self):
+        self.view.receiver.close()
+
+    def test_receive(self):
+        body = json.dumps({"notification_type": "upload", "public_id": "sample"}).encode("utf-8")
+        timestamp = str(int(time.time()))
+        signature = hashlib.sha1(body + timestamp.encode("utf-8") + b"b").hexdigest()
+        client = Client(enforce_csrf_checks=True)
+        with self.settings(ROOT_URLCONF=(url(r'^notify$', view=self.view),)):
+            response = client.post("/notify", data=body, content_type="application/json",
+                                   HTTP_X_CLD_TIMESTAMP=timestamp, HTTP_X_CLD_SIGNATURE=signature)
+            self.assertEqual(response.status_code, 200)
+            response = client.post("/notify", data=body, content_type="application/json",
+                                   HTTP_X_CLD_TIMESTAMP=timestamp, HTTP_X_CLD_SIGNATURE="0" * 40)
+            self.assertEqual(response.status_code, 401)
+        self.view.receiver.flush()
+        self.assertEqual(self.batches[0][0]["public_id"], "sample")
@@ -0,0 +1,12 @@
+import atexit
+import os
+
+if os.environ.get("CLOUDINARY_EMULATOR"):
+    # Run the tests offline, against a local emulator of the account configured by CLOUDINARY_URL
+    import cloudinary
+    from cloudinary.emulator import Emulator
+
+    _emulator = Emulator().start()
+    atexit.register(_emulator.stop)
+    os.environ["CLOUDINARY_URL"] = _emulator.cloudinary_url
+    cloudinary.reset_config()
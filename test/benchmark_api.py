@@ -0,0 +1,273 @@
+"""
+Throughput benchmarks of the upload and Admin API calls against the local API emulator.
+
+Measures ``upload``, ``upload_large``, bulk tagging, resource listing loops and ``Search.execute`` across file sizes
+and concurrency levels. Reports throughput, p50 and p99 latency, errors, and the peak memory allocated by Python
+(tracemalloc) and the peak RSS of the process.
+
+Usage::
+
+    python -m test.benchmark_api
+    python -m test.benchmark_api --sizes 10240,1048576 --concurrency 1,8 --operations 100 --latency 0.005
+    python -m test.benchmark_api --save before.json
+    python -m test.benchmark_api --compare before.json --threshold 10
+
+``--compare`` fails when the throughput of a scenario dropped by more than the threshold percentage.
+"""
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import timeit
+
+from six.moves import queue
+
+import cloudinary
+from cloudinary import api, uploader
+from cloudinary.search import Search
+from cloudinary.emulator import Emulator
+
+try:
+    import resource
+except ImportError:
+    # Windows
+    resource = None
+
+try:
+    import tracemalloc
+except ImportError:
+    # Python 2
+    tracemalloc = None
+
+DEFAULT_SIZES = (10 * 1024, 1024 * 1024)
+DEFAULT_CONCURRENCY = (1, 4, 16)
+DEFAULT_OPERATIONS = 64
+DEFAULT_THRESHOLD = 20.0
+LARGE_CHUNK_SIZE = 256 * 1024
+BULK_TAG_IDS = 100
+LISTING_RESOURCES = 500
+LISTING_PAGE_SIZE = 100
+
+ACCOUNT = dict(cloud_name="bench", api_key="a", api_secret="b")
+
+
+def _percentile(values, percent):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(round(percent / 100.0 * (len(values) - 1))))]
+
+
+def run_concurrently(operation, operations, concurrency):
+    """
+    Call ``operation(i)`` for ``i`` in ``range(operations)`` from ``concurrency`` threads.
+
+    :return: throughput in operations per second, p50 and p99 latency in seconds, the number of errors,
+             and the peak memory allocated by Python in bytes, None on Python 2
+    :rtype: dict
+    """
+    jobs = queue.Queue()
+    for i in range(operations):
+        jobs.put(i)
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def work():
+        while True:
+            try:
+                i = jobs.get_nowait()
+            except queue.Empty:
+                return
+            start = timeit.default_timer()
+            try:
+                operation(i)
+            except Exception as e:
+                with lock:
+                    errors.append(e)
+            with lock:
+                latencies.append(timeit.default_timer() - start)
+
+    if tracemalloc is not None:
+        tracemalloc.start()
+    start = timeit.default_timer()
+    threads = [threading.Thread(target=work) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = timeit.default_timer() - start
+    peak = None
+    if tracemalloc is not None:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        "operations": operations,
+        "throughput": operations / elapsed if elapsed else 0.0,
+        "p50": _percentile(latencies, 50),
+        "p99": _percentile(latencies, 99),
+        "errors": len(errors),
+        "peak_traced_bytes": peak,
+    }
+
+
+def _peak_rss():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+class Scenarios(object):
+    """
+    The benchmarked operations, against the emulator.
+
+    :param server: the emulator
+    :type server: Emulator
+    :param directory: a directory for the uploaded files
+    """
+    def __init__(self, server, directory):
+        self.server = server
+        self.directory = directory
+        self.options = dict(ACCOUNT, upload_prefix=server.url)
+        self._files = {}
+
+    def file(self, size):
+        if size not in self._files:
+            path = os.path.join(self.directory, "file_{0}.bin".format(size))
+            with open(path, "wb") as f:
+                f.write(os.urandom(size))
+            self._files[size] = path
+        return self._files[size]
+
+    def upload(self, size):
+        path = self.file(size)
+        return lambda i: uploader.upload(path, public_id="upload_{0}_{1}".format(size, i), **self.options)
+
+    def upload_large(self, size):
+        path = self.file(size)
+        return lambda i: uploader.upload_large(path, public_id="large_{0}_{1}".format(size, i),
+                                               chunk_size=LARGE_CHUNK_SIZE, **self.options)
+
+    def bulk_tags(self):
+        self.server.add_resources(BULK_TAG_IDS, prefix="tagged")
+        public_ids = ["tagged_{0}".format(i) for i in range(BULK_TAG_IDS)]
+        return lambda i: uploader.add_tag("tag_{0}".format(i), public_ids, **self.options)
+
+    def listing(self):
+        self.server.add_resources(LISTING_RESOURCES, prefix="listed")
+
+        def list_all(i):
+            next_cursor = None
+            while True:
+                result = api.resources(prefix="listed", max_results=LISTING_PAGE_SIZE, next_cursor=next_cursor,
+                                       **self.options)
+                next_cursor = result.get("next_cursor")
+                if not next_cursor:
+                    return
+        return list_all
+
+    def search(self):
+        self.server.add_resources(LISTING_RESOURCES, prefix="searched", tags=["shoe"])
+        return lambda i: Search().expression("tags=shoe").max_results(100).execute(**self.options)
+
+
+def run(sizes=DEFAULT_SIZES, concurrency_levels=DEFAULT_CONCURRENCY, operations=DEFAULT_OPERATIONS, latency=0.0,
+        error_rate=0.0):
+    """
+    Run all scenarios.
+
+    :return: the results of each scenario, keyed by ``<scenario>[_<size>]@<concurrency>``
+    :rtype: dict
+    """
+    directory = tempfile.mkdtemp(prefix="cloudinary-benchmark-")
+    results = {}
+    try:
+        for concurrency in concurrency_levels:
+            with Emulator(latency=latency, error_rate=error_rate, seed=0, **ACCOUNT) as server:
+                scenarios = Scenarios(server, directory)
+                cases = []
+                for size in sizes:
+                    cases.append(("upload_{0}".format(size), scenarios.upload(size)))
+                    cases.append(("upload_large_{0}".format(size), scenarios.upload_large(size)))
+                cases.append(("bulk_tags", scenarios.bulk_tags()))
+                cases.append(("listing", scenarios.listing()))
+                cases.append(("search", scenarios.search()))
+                for name, operation in cases:
+                    result = run_concurrently(operation, operations, concurrency)
+                    result["peak_rss_bytes"] = _peak_rss()
+                    results["{0}@{1}".format(name, concurrency)] = result
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    :return: the scenarios whose throughput dropped by more than ``threshold`` percent, as
+             (scenario, baseline throughput, throughput, percent change) tuples
+    :rtype: list
+    """
+    regressions = []
+    for name, result in sorted(results.items()):
+        if name in baseline and baseline[name]["throughput"]:
+            change = (result["throughput"] / baseline[name]["throughput"] - 1) * 100
+            if change < -threshold:
+                regressions.append((name, baseline[name]["throughput"], result["throughput"], change))
+    return regressions
+
+
+def _print(results):
+    print("{0:<28} {1:>10} {2:>9} {3:>9} {4:>7} {5:>12}".format("scenario", "ops/s", "p50 ms", "p99 ms",
+                                                                 "errors", "peak KB"))
+    for name, result in sorted(results.items()):
+        print("{0:<28} {1:>10.1f} {2:>9.2f} {3:>9.2f} {4:>7} {5:>12}".format(
+            name, result["throughput"], result["p50"] * 1000, result["p99"] * 1000, result["errors"],
+            (result["peak_traced_bytes"] or 0) // 1024))
+
+
+def _int_list(value):
+    return [int(item) for item in value.split(",") if item]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark upload and Admin API throughput")
+    parser.add_argument("--sizes", type=_int_list, default=list(DEFAULT_SIZES), help="file sizes in bytes")
+    parser.add_argument("--concurrency", type=_int_list, default=list(DEFAULT_CONCURRENCY),
+                        help="numbers of concurrent threads")
+    parser.add_argument("--operations", type=int, default=DEFAULT_OPERATIONS, help="operations per scenario")
+    parser.add_argument("--latency", type=float, default=0.0, help="server latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="probability of server errors")
+    parser.add_argument("--save", help="save the results as JSON")
+    parser.add_argument("--compare", help="compare with results saved with --save")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed throughput drop in percent")
+    args = parser.parse_args(argv)
+
+    cloudinary.config(**ACCOUNT)
+    results = run(args.sizes, args.concurrency, args.operations, args.latency, args.error_rate)
+    _print(results)
+    peak_rss = _peak_rss()
+    if peak_rss is not None:
+        print("peak RSS: {0} KB".format(peak_rss // 1024))
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for name, before, after, change in regressions:
+            print("{0}: {1:.1f} ops/s, was {2:.1f} ops/s ({3:+.1f}%)".format(name, after, before, change))
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
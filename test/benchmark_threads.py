@@ -0,0 +1,113 @@
+"""
+Multi-threaded throughput of delivery URL generation.
+
+Generates URLs from an increasing number of threads and reports the throughput and the speedup over a single
+thread. Scaling is close to linear on free-threaded CPython builds (3.13t) only, with the GIL the speedup stays
+around 1.
+
+Usage::
+
+    python -m test.benchmark_threads
+    python -m test.benchmark_threads --threads 1,2,4,8 --duration 2
+"""
+from __future__ import print_function
+
+import argparse
+import multiprocessing
+import sys
+import threading
+import timeit
+
+import cloudinary
+from cloudinary import utils
+
+ACCOUNT = dict(cloud_name="test123", api_key="a", api_secret="b")
+DEFAULT_DURATION = 1.0
+BATCH = 100
+
+
+def gil_enabled():
+    """
+    :return: False on free-threaded builds running without the GIL
+    """
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return is_gil_enabled is None or is_gil_enabled()
+
+
+def default_threads():
+    threads = [1]
+    while threads[-1] * 2 <= multiprocessing.cpu_count():
+        threads.append(threads[-1] * 2)
+    return threads
+
+
+def _generate(i):
+    utils.cloudinary_url("folder/sample_{0}.jpg".format(i), width=100, height=100, crop="fill", sign_url=True)
+
+
+def throughput(threads, duration=DEFAULT_DURATION):
+    """
+    Generate URLs from ``threads`` threads for ``duration`` seconds.
+
+    :return: the number of URLs generated per second
+    :rtype: float
+    """
+    barrier = threading.Barrier(threads + 1) if hasattr(threading, "Barrier") else None
+    stop = threading.Event()
+    counts = [0] * threads
+
+    def work(index):
+        if barrier is not None:
+            barrier.wait()
+        count = 0
+        while not stop.is_set():
+            for i in range(BATCH):
+                _generate(i)
+            count += BATCH
+        counts[index] = count
+
+    workers = [threading.Thread(target=work, args=(index,)) for index in range(threads)]
+    for worker in workers:
+        worker.start()
+    if barrier is not None:
+        barrier.wait()
+    start = timeit.default_timer()
+    stop.wait(duration)
+    stop.set()
+    for worker in workers:
+        worker.join()
+    return sum(counts) / (timeit.default_timer() - start)
+
+
+def run(thread_counts=None, duration=DEFAULT_DURATION):
+    """
+    :return: (threads, URLs per second, speedup over one thread) for each number of threads
+    :rtype: list
+    """
+    cloudinary.config(**ACCOUNT)
+    results = []
+    for threads in thread_counts or default_threads():
+        rate = throughput(threads, duration)
+        results.append((threads, rate, rate / results[0][1] if results else 1.0))
+    return results
+
+
+def _int_list(value):
+    return [int(item) for item in value.split(",") if item]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark multi-threaded URL generation")
+    parser.add_argument("--threads", type=_int_list, default=default_threads(), help="numbers of threads")
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION, help="seconds per number of threads")
+    args = parser.parse_args(argv)
+
+    print("GIL {0}, {1} CPUs".format("enabled" if gil_enabled() else "disabled", multiprocessing.cpu_count()))
+    print("{0:>8} {1:>12} {2:>8}".format("threads", "URLs/s", "speedup"))
+    for threads, rate, speedup in run(args.threads, args.duration):
+        print("{0:>8} {1:>12.0f} {2:>8.2f}".format(threads, rate, speedup))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
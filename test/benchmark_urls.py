@@ -0,0 +1,213 @@
+"""
+Benchmarks of delivery URL and HTML tag generation.
+
+Runs offline. Each case is timed relative to a fixed pure Python calibration workload, so baselines recorded on one
+machine can be compared on another. A run fails when a case is slower than its baseline by more than the threshold.
+
+Usage::
+
+    python -m test.benchmark_urls                     # compare with test/benchmark_urls_baseline.json
+    python -m test.benchmark_urls --threshold 10      # fail on a regression of more than 10%
+    python -m test.benchmark_urls --update-baseline   # record new baselines
+
+The threshold defaults to the ``CLOUDINARY_BENCHMARK_THRESHOLD`` environment variable, or 25 percent.
+"""
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import sys
+import timeit
+
+import cloudinary
+from cloudinary import CloudinaryResource, utils
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "benchmark_urls_baseline.json")
+DEFAULT_THRESHOLD = 25.0
+REPEAT = 9
+MIN_RUN_TIME = 0.05
+
+ACCOUNT = dict(cloud_name="test123", api_key="a", api_secret="b")
+AUTH_TOKEN = dict(key="00112233FF99", duration=300, start_time=1111111111)
+TEXT_OVERLAY = dict(font_family="Arial", font_size=20, font_weight="bold", text="Hello, World! $100")
+NESTED_TRANSFORMATION = [
+    dict(width=400, height=300, crop="fill", gravity="faces"),
+    dict(transformation=[dict(effect="sepia"), dict(angle=[10, "exif"], radius="max")]),
+    dict(overlay="logo", width=50, gravity="south_east", x=10, y=10, flags="relative"),
+    dict(quality="auto", fetch_format="auto"),
+]
+
+
+def _url_plain():
+    utils.cloudinary_url("folder/sample.jpg", width=100, height=100, crop="fill")
+
+
+def _url_signed():
+    utils.cloudinary_url("folder/sample.jpg", width=100, height=100, crop="fill", sign_url=True)
+
+
+def _url_auth_token():
+    utils.cloudinary_url("folder/sample.jpg", type="authenticated", sign_url=True, width=100,
+                         auth_token=AUTH_TOKEN)
+
+
+def _url_fetch():
+    utils.cloudinary_url("http://example.com/images/sample image.jpg?size=large", type="fetch", width=100,
+                         format="webp")
+
+
+def _url_text_overlay():
+    utils.cloudinary_url("sample", overlay=TEXT_OVERLAY, gravity="north", y=20)
+
+
+def _url_conditional_variables():
+    utils.cloudinary_url("sample", transformation=[
+        {"variables": [["$w", 200], ["$ratio", "$w / 2"]]},
+        {"if": "w > 400 && ar < 1.0", "width": "$w", "height": "$w * $ratio", "crop": "scale"},
+        {"if": "else", "width": "$w", "crop": "fit"},
+        {"if": "end"},
+    ])
+
+
+_image_resource = CloudinaryResource("folder/sample", format="jpg", version=1234)
+_video_resource = CloudinaryResource("movie", resource_type="video")
+
+
+def _image_srcset():
+    _image_resource.image(width=400, crop="scale", srcset={"breakpoints": [200, 400, 800, 1200], "sizes": True})
+
+
+def _video_sources():
+    _video_resource.video(source_types=["webm", "mp4", "ogv"], width=640,
+                          source_transformation={"mp4": {"quality": 70}}, poster={"effect": "sepia"})
+
+
+def _transformation_nested():
+    utils.generate_transformation_string(transformation=NESTED_TRANSFORMATION, width=100, dpr=2.0)
+
+
+CASES = [
+    ("cloudinary_url_plain", _url_plain),
+    ("cloudinary_url_signed", _url_signed),
+    ("cloudinary_url_auth_token", _url_auth_token),
+    ("cloudinary_url_fetch", _url_fetch),
+    ("cloudinary_url_text_overlay", _url_text_overlay),
+    ("cloudinary_url_conditional_variables", _url_conditional_variables),
+    ("image_srcset", _image_srcset),
+    ("video_sources", _video_sources),
+    ("generate_transformation_string_nested", _transformation_nested),
+]
+
+
+def _calibration():
+    # Dict, string and regex-free arithmetic work, similar in kind to URL generation
+    options = {}
+    for i in range(50):
+        options["key%d" % i] = str(i * 7)
+    return ",".join(sorted(key + "_" + value for key, value in options.items()))
+
+
+def _iterations(func):
+    number = 1
+    while timeit.timeit(func, number=number) < MIN_RUN_TIME:
+        number *= 2
+    return number
+
+
+def measure(func):
+    """
+    Time ``func`` relative to the calibration workload.
+
+    The case and the calibration are timed alternately, so changes in machine load affect both.
+
+    :return: the median ratio of the time of a call of ``func`` to the time of a calibration call
+    :rtype: float
+    """
+    number = _iterations(func)
+    calibration_number = _iterations(_calibration)
+    ratios = []
+    for _ in range(REPEAT):
+        elapsed = timeit.timeit(func, number=number) / number
+        calibration = timeit.timeit(_calibration, number=calibration_number) / calibration_number
+        ratios.append(elapsed / calibration)
+    return sorted(ratios)[len(ratios) // 2]
+
+
+def run(cases=None):
+    """
+    :param cases: the names of the cases to run, all cases by default
+
+    :return: the relative cost of each case
+    :rtype: dict
+    """
+    cloudinary.config(**ACCOUNT)
+    return dict((name, measure(func)) for name, func in CASES if cases is None or name in cases)
+
+
+def load_baseline(path=BASELINE_PATH):
+    with open(path) as baseline_file:
+        return json.load(baseline_file)
+
+
+def save_baseline(results, path=BASELINE_PATH):
+    with open(path, "w") as baseline_file:
+        json.dump(dict((name, round(cost, 4)) for name, cost in results.items()), baseline_file, indent=2,
+                  sort_keys=True)
+        baseline_file.write("\n")
+
+
+def compare(results, baseline, threshold):
+    """
+    :param threshold: the allowed slowdown in percent
+
+    :return: the regressions, as (case, baseline, result, percent slower) tuples
+    :rtype: list
+    """
+    regressions = []
+    for name, cost in sorted(results.items()):
+        if name not in baseline:
+            continue
+        change = (cost / baseline[name] - 1) * 100
+        if change > threshold:
+            regressions.append((name, baseline[name], cost, change))
+    return regressions
+
+
+def default_threshold():
+    return float(os.environ.get("CLOUDINARY_BENCHMARK_THRESHOLD", DEFAULT_THRESHOLD))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark URL generation")
+    parser.add_argument("--threshold", type=float, default=default_threshold(),
+                        help="allowed slowdown in percent")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline file")
+    parser.add_argument("--update-baseline", action="store_true", help="record the results as the baseline")
+    parser.add_argument("cases", nargs="*", help="cases to run, all by default")
+    args = parser.parse_args(argv)
+
+    results = run(args.cases or None)
+    if args.update_baseline:
+        save_baseline(results, args.baseline)
+        print("Saved the baseline to {0}".format(args.baseline))
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    print("{0:<40} {1:>10} {2:>10} {3:>8}".format("case", "baseline", "result", "change"))
+    for name, cost in sorted(results.items()):
+        if name in baseline:
+            change = "{0:+.1f}%".format((cost / baseline[name] - 1) * 100)
+            print("{0:<40} {1:>10.2f} {2:>10.2f} {3:>8}".format(name, baseline[name], cost, change))
+        else:
+            print("{0:<40} {1:>10} {2:>10.2f} {3:>8}".format(name, "-", cost, "new"))
+
+    regressions = compare(results, baseline, args.threshold)
+    for name, _, _, change in regressions:
+        print("{0} is {1:.1f}% slower than the baseline, over the {2}% threshold".format(name, change,
+                                                                                          args.threshold))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
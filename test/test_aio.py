@@ -0,0 +1,201 @@
+import json
+import os
+import sys
+import threading
+import unittest
+
+from six.moves import BaseHTTPServer, socketserver
+
+import cloudinary
+
+if sys.version_info >= (3, 6):
+    import asyncio
+    from cloudinary import aio
+    from cloudinary.aio.http import AsyncConnectionPool
+
+TEST_IMAGE = os.path.join(os.path.dirname(__file__), "resources", "logo.png")
+
+
+class _Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _respond(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length)
+        server = self.server
+        with server.lock:
+            server.requests.append((self.command, self.path, self.headers, body))
+            server.connections.add(self.client_address)
+            drop, server.drop = server.drop, False
+        if drop:
+            # Close the connection without a response, as a server that went away after reading the request
+            self.close_connection = True
+            return
+        status, result = server.response
+        data = json.dumps(result).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("X-FeatureRateLimit-Limit", "500")
+        self.send_header("X-FeatureRateLimit-Reset", "Wed, 01 Jan 2020 00:00:00 GMT")
+        self.send_header("X-FeatureRateLimit-Remaining", "499")
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = do_POST = do_DELETE = do_PUT = _respond
+
+    def log_message(self, *args):
+        pass
+
+
+class _Server(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+@unittest.skipIf(sys.version_info < (3, 6), "cloudinary.aio requires Python 3.6 or later")
+class AioTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = _Server(("127.0.0.1", 0), _Handler)
+        cls.server.lock = threading.Lock()
+        cls.thread = threading.Thread(target=cls.server.serve_forever)
+        cls.thread.daemon = True
+        cls.thread.start()
+        cls.prefix = "http://127.0.0.1:{0}".format(cls.server.server_address[1])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.requests = []
+        self.server.connections = set()
+        self.server.drop = False
+        self.server.response = (200, {"public_id": "sample", "version": 1})
+        self.options = dict(upload_prefix=self.prefix, cloud_name="test123", api_key="a", api_secret="b")
+
+    def _run(self, coroutine):
+        async def run():
+            try:
+                return await coroutine
+            finally:
+                await aio.close()
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(run())
+        finally:
+            loop.close()
+
+    def test_upload_streams_file(self):
+        """should send a signed multipart upload request with the file content"""
+        result = self._run(aio.uploader.upload(TEST_IMAGE, tags=["a", "b"], **self.options))
+        self.assertEqual(result["public_id"], "sample")
+
+        method, path, headers, body = self.server.requests[0]
+        self.assertEqual(method, "POST")
+        self.assertEqual(path, "/v1_1/test123/image/upload")
+        self.assertIn("multipart/form-data", headers["Content-Type"])
+        self.assertIn(b'name="signature"', body)
+        self.assertIn(b'name="tags"\r\n\r\na,b\r\n', body)
+        with open(TEST_IMAGE, "rb") as image:
+            self.assertIn(image.read(), body)
+
+    def test_upload_error(self):
+        """should raise upload API errors"""
+        self.server.response = (400, {"error": {"message": "Invalid image file"}})
+        with self.assertRaisesRegex(cloudinary.api.Error, "Invalid image file"):
+            self._run(aio.uploader.upload(TEST_IMAGE, **self.options))
+
+    def test_upload_large(self):
+        """should upload a file in parts with Content-Range headers"""
+        size = os.path.getsize(TEST_IMAGE)
+        self._run(aio.uploader.upload_large(TEST_IMAGE, chunk_size=size // 2 + 1, **self.options))
+        ranges = [headers["Content-Range"] for _, _, headers, _ in self.server.requests]
+        self.assertEqual(ranges, ["bytes 0-{0}/{1}".format(size // 2, size),
+                                  "bytes {0}-{1}/{2}".format(size // 2 + 1, size - 1, size)])
+
+    def test_tags(self):
+        self._run(aio.uploader.add_tag("shoe", ["id1", "id2"], **self.options))
+        method, path, _, body = self.server.requests[0]
+        self.assertEqual(path, "/v1_1/test123/image/tags")
+        self.assertIn(b'name="command"\r\n\r\nadd\r\n', body)
+        self.assertIn(b'name="public_ids[1]"\r\n\r\nid2\r\n', body)
+
+    def test_admin_api(self):
+        """should send query parameters and return a Response with rate limits"""
+        self.server.response = (200, {"resources": []})
+        result = self._run(aio.api.resources(prefix="products", max_results=10, **self.options))
+        self.assertEqual(result["resources"], [])
+        self.assertEqual(result.rate_limit_remaining, 499)
+
+        method, path, headers, _ = self.server.requests[0]
+        self.assertEqual(method, "GET")
+        self.assertTrue(path.startswith("/v1_1/test123/resources/image?"))
+        self.assertIn("prefix=products", path)
+        self.assertTrue(headers["Authorization"].startswith("Basic "))
+
+    def test_admin_api_error(self):
+        self.server.response = (404, {"error": {"message": "Resource not found"}})
+        with self.assertRaises(cloudinary.api.NotFound):
+            self._run(aio.api.resource("missing", **self.options))
+
+    def test_search(self):
+        self._run(aio.Search().expression("tags=shoe").max_results(5).execute(**self.options))
+        method, path, headers, body = self.server.requests[0]
+        self.assertEqual((method, path), ("POST", "/v1_1/test123/resources/search"))
+        self.assertEqual(json.loads(body.decode("utf-8")), {"expression": "tags=shoe", "max_results": 5})
+
+    def test_connections_are_reused(self):
+        """should send sequential requests over one keep-alive connection"""
+        async def requests():
+            for _ in range(3):
+                await aio.api.ping(**self.options)
+        self._run(requests())
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(len(self.server.connections), 1)
+
+    def test_uploads_reuse_connections(self):
+        """should send sequential streamed uploads over one keep-alive connection"""
+        async def uploads():
+            for _ in range(2):
+                await aio.uploader.upload(TEST_IMAGE, **self.options)
+        self._run(uploads())
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(len(self.server.connections), 1)
+
+    def test_lost_response(self):
+        """should send an idempotent request again when the response on a reused connection is lost, only"""
+        pool = AsyncConnectionPool()
+
+        async def requests(method):
+            await pool.request("GET", self.prefix + "/ping")
+            self.server.drop = True
+            try:
+                return await pool.request(method, self.prefix + "/ping", body=b"")
+            finally:
+                await pool.close()
+
+        self.assertEqual(self._run(requests("GET")).status, 200)
+        self.assertEqual(len(self.server.requests), 3)
+
+        self.server.requests = []
+        with self.assertRaises(ConnectionError):
+            self._run(requests("POST"))
+        self.assertEqual([method for method, _, _, _ in self.server.requests], ["GET", "POST"])
+
+    def test_concurrency_limit(self):
+        """should not open more connections than allowed"""
+        pool = AsyncConnectionPool(max_connections=2)
+
+        async def requests():
+            responses = await asyncio.gather(*[pool.request("GET", self.prefix + "/ping") for _ in range(10)])
+            await pool.close()
+            return responses
+        responses = self._run(requests())
+        self.assertEqual([r.status for r in responses], [200] * 10)
+        self.assertLessEqual(len(self.server.connections), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
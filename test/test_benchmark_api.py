@@ -0,0 +1,25 @@
+import json
+import unittest
+
+from test import benchmark_api
+
+
+class BenchmarkApiTest(unittest.TestCase):
+    def test_run(self):
+        """should measure every scenario at every concurrency level"""
+        results = benchmark_api.run(sizes=[1024], concurrency_levels=[1, 2], operations=2)
+        self.assertEqual(len(results), 10)
+        for name, result in results.items():
+            self.assertEqual(result["errors"], 0, name)
+            self.assertGreater(result["throughput"], 0)
+            self.assertLessEqual(result["p50"], result["p99"])
+        json.dumps(results)
+
+    def test_compare(self):
+        baseline = {"upload@1": {"throughput": 100.0}, "search@1": {"throughput": 100.0}}
+        results = {"upload@1": {"throughput": 70.0}, "search@1": {"throughput": 95.0}}
+        self.assertEqual([name for name, _, _, _ in benchmark_api.compare(results, baseline, 20)], ["upload@1"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,31 @@
+import os
+import unittest
+
+import cloudinary
+from test import benchmark_urls
+
+
+class BenchmarkUrlsTest(unittest.TestCase):
+    def setUp(self):
+        cloudinary.config(**benchmark_urls.ACCOUNT)
+
+    def test_cases(self):
+        """should run every case offline and have a baseline for it"""
+        baseline = benchmark_urls.load_baseline()
+        for name, func in benchmark_urls.CASES:
+            func()
+            self.assertIn(name, baseline)
+
+    def test_compare(self):
+        regressions = benchmark_urls.compare({"a": 1.3, "b": 1.1, "c": 5.0}, {"a": 1.0, "b": 1.0}, 20)
+        self.assertEqual([name for name, _, _, _ in regressions], ["a"])
+
+    @unittest.skipUnless(os.environ.get("CLOUDINARY_BENCHMARK"), "set CLOUDINARY_BENCHMARK=1 to run benchmarks")
+    def test_no_regressions(self):
+        regressions = benchmark_urls.compare(benchmark_urls.run(), benchmark_urls.load_baseline(),
+                                             benchmark_urls.default_threshold())
+        self.assertEqual(regressions, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
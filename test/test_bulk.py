@@ -0,0 +1,129 @@
+import threading
+import time
+import unittest
+
+from mock import patch
+
+import cloudinary
+from cloudinary import api, bulk
+from cloudinary.bulk import NOT_UPDATED, RateBudget
+from cloudinary.emulator import Emulator
+
+OPTIONS = dict(cloud_name="bulk", api_key="a", api_secret="b")
+
+
+class BulkTest(unittest.TestCase):
+    def setUp(self):
+        cloudinary.config(**OPTIONS)
+        self.requests = []
+        self.lock = threading.Lock()
+        patcher = patch('cloudinary.uploader.call_api', side_effect=self._response)
+        self.call_api = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _response(self, action, params, **options):
+        with self.lock:
+            self.requests.append((action, params["command"], list(params["public_ids"])))
+        if "missing" in params["public_ids"]:
+            raise api.NotFound("Resource not found - missing")
+        return {"public_ids": [public_id for public_id in params["public_ids"] if public_id != "deleted"]}
+
+    def test_batches(self):
+        """should send any number of public IDs from a generator in batches of at most 1000"""
+        result = bulk.add_tag("sale", ("id{0}".format(i) for i in range(2500)), concurrency=3)
+
+        self.assertTrue(result.ok)
+        self.assertEqual(sorted(len(public_ids) for _, _, public_ids in self.requests), [500, 1000, 1000])
+        self.assertEqual(sorted(result.succeeded), sorted("id{0}".format(i) for i in range(2500)))
+        self.assertEqual(result.requests, 3)
+
+    def test_commands(self):
+        bulk.remove_tag("sale", ["a"])
+        bulk.replace_tag("sale", ["a"])
+        bulk.remove_all_tags(["a"])
+        bulk.add_context({"alt": "x"}, ["a"])
+        bulk.remove_all_context(["a"])
+        self.assertEqual([(action, command) for action, command, _ in self.requests],
+                         [("tags", "remove"), ("tags", "replace"), ("tags", "remove_all"), ("context", "add"),
+                          ("context", "remove_all")])
+        self.assertEqual(self.call_api.call_args_list[3][0][1]["context"], "alt=x")
+
+    def test_failures(self):
+        """should report the public IDs of failed batches and those the server did not update"""
+        result = bulk.add_tag("sale", ["a", "missing", "b", "deleted", "c"], batch_size=2, concurrency=2)
+
+        self.assertFalse(result.ok)
+        self.assertEqual(sorted(result.succeeded), ["b", "c"])
+        self.assertEqual(result.failed, {"a": "NotFound: Resource not found - missing",
+                                         "missing": "NotFound: Resource not found - missing",
+                                         "deleted": NOT_UPDATED})
+
+    @patch('cloudinary.bulk.retry_delay', return_value=0)
+    def test_retry(self, _):
+        """should retry batches that were rate limited"""
+        self.call_api.side_effect = [api.RateLimited("slow down"), {"public_ids": ["a"]}]
+        result = bulk.add_tag("sale", ["a"], concurrency=1)
+        self.assertEqual((result.succeeded, result.requests), (["a"], 2))
+
+        self.call_api.side_effect = api.GeneralError("unavailable")
+        result = bulk.add_tag("sale", ["a"], max_attempts=3)
+        self.assertEqual((result.failed, result.requests), ({"a": "GeneralError: unavailable"}, 3))
+
+    def test_exclusive(self):
+        """should send the exclusive command for the first batch only, before the others"""
+        bulk.add_tag("sale", ["a", "b", "c", "d", "e"], exclusive=True, batch_size=2)
+        self.assertEqual(self.requests[0], ("tags", "set_exclusive", ["a", "b"]))
+        self.assertEqual(sorted(self.requests[1:]), [("tags", "add", ["c", "d"]), ("tags", "add", ["e"])])
+
+    def test_duplicates(self):
+        bulk.add_tag("sale", ["a", "b", "a"])
+        self.assertEqual(self.requests, [("tags", "add", ["a", "b"])])
+
+    def test_iterable_error(self):
+        def public_ids():
+            yield "a"
+            raise IOError("listing failed")
+
+        with self.assertRaises(IOError):
+            bulk.add_tag("sale", public_ids())
+
+    def test_invalid_batch_size(self):
+        with self.assertRaises(ValueError):
+            bulk.add_tag("sale", ["a"], batch_size=1001)
+
+    def test_rate_budget(self):
+        budget = RateBudget(100)
+        start = time.time()
+        for _ in range(5):
+            budget.acquire()
+        self.assertGreaterEqual(time.time() - start, 0.035)
+        with self.assertRaises(ValueError):
+            RateBudget(0)
+
+    def test_max_rate(self):
+        start = time.time()
+        bulk.add_tag("sale", ("id{0}".format(i) for i in range(40)), batch_size=10, max_rate=100)
+        self.assertGreaterEqual(time.time() - start, 0.025)
+        self.assertEqual(len(self.requests), 4)
+
+
+class BulkEmulatorTest(unittest.TestCase):
+    def test_add_tag(self):
+        with Emulator(**OPTIONS) as emulator:
+            emulator.add_resources(30)
+            with cloudinary.using(upload_prefix=emulator.url, **OPTIONS):
+                result = bulk.add_tag("sale", ("resource_{0}".format(i) for i in range(30)), batch_size=7)
+                self.assertEqual((len(result.succeeded), result.requests), (30, 5))
+                self.assertEqual(len(api.resources_by_tag("sale", max_results=100)["resources"]), 30)
+
+    def test_error_responses(self):
+        """should not retry the permanent errors of the server"""
+        with Emulator(**OPTIONS) as emulator:
+            with cloudinary.using(upload_prefix=emulator.url, cloud_name="bulk", api_key="a", api_secret="wrong"):
+                result = bulk.add_tag("sale", ["a", "b"])
+        self.assertEqual(result.requests, 1)
+        self.assertTrue(result.failed["a"].startswith("AuthorizationRequired: Invalid Signature"), result.failed)
+
+
+if __name__ == '__main__':
+    unittest.main()
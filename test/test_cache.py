@@ -0,0 +1,57 @@
+import unittest
+
+from mock import patch
+
+from cloudinary.cache import TTLCache
+
+
+class TTLCacheTest(unittest.TestCase):
+    def test_get_set(self):
+        cache = TTLCache(max_size=2)
+        cache.set("a", 1)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("b", "default"), "default")
+        self.assertIn("a", cache)
+        self.assertEqual(cache.stats(), {"hits": 1, "misses": 2, "size": 1})
+
+    def test_lru_eviction(self):
+        """should evict the least recently used entry"""
+        cache = TTLCache(max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        self.assertEqual(len(cache), 2)
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+
+    @patch('time.time')
+    def test_expiration(self, time_mock):
+        """should not return expired entries"""
+        time_mock.return_value = 1000
+        cache = TTLCache(max_size=2, ttl=10)
+        cache.set("a", 1)
+        time_mock.return_value = 1009
+        self.assertEqual(cache.get("a"), 1)
+        time_mock.return_value = 1010
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+    def test_pop_and_clear(self):
+        cache = TTLCache(max_size=2)
+        cache.set("a", 1)
+        self.assertEqual(cache.pop("a"), 1)
+        self.assertIsNone(cache.pop("a"))
+        cache.set("b", 2)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+    def test_invalid_size(self):
+        with self.assertRaises(ValueError):
+            TTLCache(max_size=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,282 @@
+import threading
+import unittest
+
+from mock import patch
+
+import cloudinary
+from cloudinary import api, uploader
+from cloudinary.coalesce import SingleFlight, WriteBehindBuffer
+from cloudinary.search import Search
+from test.helper_test import api_response_mock
+
+THREADS = 5
+
+
+class SingleFlightTest(unittest.TestCase):
+    def test_sequential_calls_are_not_coalesced(self):
+        flight = SingleFlight()
+        self.assertEqual(flight.do("key", lambda: 1), 1)
+        self.assertEqual(flight.do("key", lambda: 2), 2)
+        self.assertEqual(flight.stats(), {"executed": 2, "coalesced": 0, "in_flight": 0})
+
+    def test_concurrent_calls_share_result(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+        results = []
+
+        def slow():
+            calls.append(1)
+            release.wait(5)
+            return "result"
+
+        threads = [threading.Thread(target=lambda: results.append(flight.do("key", slow))) for _ in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        self._wait_for_waiters(flight, THREADS - 1)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ["result"] * THREADS)
+        self.assertEqual(flight.stats(), {"executed": 1, "coalesced": THREADS - 1, "in_flight": 0})
+
+    def test_concurrent_calls_share_exception(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        errors = []
+
+        def failing():
+            release.wait(5)
+            raise ValueError("failed")
+
+        def run():
+            try:
+                flight.do("key", failing)
+            except ValueError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=run) for _ in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        self._wait_for_waiters(flight, THREADS - 1)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(errors), THREADS)
+        self.assertEqual(flight.stats()["executed"], 1)
+
+    @staticmethod
+    def _wait_for_waiters(flight, count):
+        while flight.stats()["coalesced"] < count:
+            threading.Event().wait(0.001)
+
+
+class ApiCoalescingTest(unittest.TestCase):
+    def setUp(self):
+        cloudinary.config(cloud_name="test123", api_key="a", api_secret="b")
+        api.reset_coalescing_stats()
+        self.release = threading.Event()
+
+    def _slow_response(self, *args, **kwargs):
+        self.release.wait(5)
+        return api_response_mock()
+
+    def _run_concurrently(self, func):
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(func())) for _ in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        while api.coalescing_stats()["coalesced"] < THREADS - 1:
+            self.release.wait(0.001)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+        return results
+
+    @patch('urllib3.request.RequestMethods.request')
+    def test_coalesce_resource(self, mocker):
+        """should share one request between identical concurrent resource calls"""
+        mocker.side_effect = self._slow_response
+        results = self._run_concurrently(lambda: api.resource("sample", coalesce=True))
+
+        self.assertEqual(mocker.call_count, 1)
+        self.assertEqual([result["foo"] for result in results], ["bar"] * THREADS)
+        self.assertEqual(api.coalescing_stats(), {"executed": 1, "coalesced": THREADS - 1, "in_flight": 0})
+
+    @patch('urllib3.request.RequestMethods.request')
+    def test_coalesce_search(self, mocker):
+        """should share one request between identical concurrent searches"""
+        mocker.side_effect = self._slow_response
+        self._run_concurrently(lambda: Search().expression("tags=shoe").execute(coalesce=True))
+
+        self.assertEqual(mocker.call_count, 1)
+
+    @patch('urllib3.request.RequestMethods.request')
+    def test_no_coalescing_of_mutations(self, mocker):
+        """should not coalesce non idempotent calls"""
+        mocker.return_value = api_response_mock()
+        api.delete_resources(["sample"], coalesce=True)
+        api.delete_resources(["sample"], coalesce=True)
+
+        self.assertEqual(mocker.call_count, 2)
+        self.assertEqual(api.coalescing_stats()["executed"], 0)
+
+    @patch('urllib3.request.RequestMethods.request')
+    def test_coalescing_disabled_by_default(self, mocker):
+        mocker.return_value = api_response_mock()
+        api.resource("sample")
+
+        self.assertEqual(api.coalescing_stats()["executed"], 0)
+
+
+def _tags_response(action, params, **options):
+    if "missing" in params["public_ids"]:
+        raise api.NotFound("Resource not found - missing")
+    return {"public_ids": list(params["public_ids"])}
+
+
+class WriteBehindBufferTest(unittest.TestCase):
+    def setUp(self):
+        cloudinary.config(cloud_name="test123", api_key="a", api_secret="b")
+        self.buffer = WriteBehindBuffer(window=60, max_ids=10)
+        patcher = patch('cloudinary.uploader.call_api', side_effect=_tags_response)
+        self.call_api = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.buffer.close)
+
+    def _requests(self):
+        return [(args[0], params["command"], params.get("tag"), params.get("context"), params["public_ids"])
+                for args, _ in self.call_api.call_args_list for params in [args[1]]]
+
+    def test_merge(self):
+        """should send the commands with the same tag, command and type as one request"""
+        futures = [self.buffer.tags("featured", "add", ["id{0}".format(i)]) for i in range(5)]
+        other_type = self.buffer.tags("featured", "add", ["id0"], type="private")
+        self.assertTrue(self.buffer.flush(5))
+
+        self.assertEqual(sorted(self._requests()), [
+            ("tags", "add", "featured", None, ["id0"]),
+            ("tags", "add", "featured", None, ["id0", "id1", "id2", "id3", "id4"]),
+        ])
+        self.assertEqual([f.result() for f in futures], [{"public_ids": ["id{0}".format(i)]} for i in range(5)])
+        self.assertEqual(other_type.result(), {"public_ids": ["id0"]})
+        self.assertEqual(self.buffer.stats(), {"commands": 6, "requests": 2})
+
+    def test_split(self):
+        """should split batches into requests of at most max_ids public IDs"""
+        ids = ["id{0}".format(i) for i in range(25)]
+        many = self.buffer.tags("featured", "add", ids)
+        one = self.buffer.tags("featured", "add", ["id24"])
+        self.buffer.flush(5)
+
+        self.assertEqual([len(request[4]) for request in self._requests()], [10, 10, 5])
+        self.assertEqual(many.result()["public_ids"], ids)
+        self.assertEqual(one.result()["public_ids"], ["id24"])
+
+    def test_order(self):
+        """should send conflicting commands on a resource in order"""
+        self.buffer.tags("a", "add", ["id0"])
+        self.buffer.tags("b", "add", ["id0"])
+        self.buffer.tags("a", "remove", ["id1"])
+        self.buffer.tags("a", "remove", ["id0"])
+        self.buffer.tags("a", "add", ["id2"])
+        self.buffer.flush(5)
+
+        requests = self._requests()
+        self.assertEqual(sorted(requests[:3]), [("tags", "add", "a", None, ["id0"]),
+                                                ("tags", "add", "b", None, ["id0"]),
+                                                ("tags", "remove", "a", None, ["id1"])])
+        self.assertEqual(sorted(requests[3:]), [("tags", "add", "a", None, ["id2"]),
+                                                ("tags", "remove", "a", None, ["id0"])])
+
+    def test_exclusive(self):
+        self.buffer.tags("a", "set_exclusive", ["id0"])
+        self.buffer.tags("a", "set_exclusive", ["id1"])
+        self.buffer.tags("a", "add", ["id2"])
+        self.buffer.flush(5)
+
+        self.assertEqual(self._requests(), [("tags", "set_exclusive", "a", None, ["id0"]),
+                                            ("tags", "set_exclusive", "a", None, ["id1"]),
+                                            ("tags", "add", "a", None, ["id2"])])
+
+    def test_context(self):
+        first = self.buffer.context({"alt": "shoe"}, "add", ["id0"])
+        second = self.buffer.context({"alt": "shoe"}, "add", ["id1"])
+        self.buffer.context({"alt": "boot"}, "add", ["id2"])
+        self.buffer.flush(5)
+
+        self.assertEqual(sorted(self._requests()), [("context", "add", None, "alt=boot", ["id2"]),
+                                                    ("context", "add", None, "alt=shoe", ["id0", "id1"])])
+        self.assertEqual(second.result(), {"public_ids": ["id1"]})
+        self.assertTrue(first.done())
+
+    def test_errors(self):
+        """should raise the error of a request to the callers it included"""
+        succeeded = self.buffer.tags("featured", "add", ["id0"], type="private")
+        failed = [self.buffer.tags("featured", "add", [public_id]) for public_id in ("id0", "missing")]
+        self.buffer.flush(5)
+
+        self.assertEqual(succeeded.result(), {"public_ids": ["id0"]})
+        for future in failed:
+            with self.assertRaises(api.NotFound):
+                future.result()
+
+    def test_accounts(self):
+        """should not merge the commands of different accounts"""
+        self.buffer.tags("featured", "add", ["id0"])
+        with cloudinary.using(cloud_name="other"):
+            self.buffer.tags("featured", "add", ["id1"])
+        self.buffer.flush(5)
+
+        self.assertEqual(sorted(kwargs["cloud_name"] for _, kwargs in self.call_api.call_args_list),
+                         ["other", "test123"])
+
+    def test_scopes(self):
+        """should send the commands of a scope within it, with its configuration and client"""
+        scopes = []
+
+        def call_api(action, params, **options):
+            scopes.append((cloudinary.config().timeout, cloudinary.client.current_client()))
+            return {"public_ids": list(params["public_ids"])}
+        self.call_api.side_effect = call_api
+
+        client = cloudinary.Cloudinary(cloud_name="test123", api_key="a", api_secret="b", timeout=7)
+        self.addCleanup(client.close)
+        self.buffer.tags("featured", "add", ["id0"])
+        with cloudinary.using(client):
+            self.buffer.tags("featured", "add", ["id1"])
+        with cloudinary.using(client):
+            self.buffer.tags("featured", "add", ["id2"])
+        self.buffer.flush(5)
+
+        self.assertEqual(sorted(request[4] for request in self._requests()), [["id0"], ["id1", "id2"]])
+        self.assertEqual(sorted(scopes, key=lambda scope: scope[1] is not None), [(None, None), (7, client)])
+
+    def test_window(self):
+        buffer = WriteBehindBuffer(window=0.01)
+        self.addCleanup(buffer.close)
+        self.assertEqual(buffer.tags("featured", "add", ["id0"]).result(5), {"public_ids": ["id0"]})
+
+    def test_uploader(self):
+        """should buffer the tag and context functions with the coalesce option"""
+        results = []
+        threads = [threading.Thread(target=lambda i=i: results.append(
+            uploader.add_tag("featured", ["id{0}".format(i)], coalesce=True))) for i in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.call_api.call_count, 1)
+        self.assertEqual(sorted(result["public_ids"][0] for result in results),
+                         ["id{0}".format(i) for i in range(THREADS)])
+        uploader.add_context({"alt": "x"}, ["id0"], coalesce=True)
+        uploader.add_tag("featured", ["id0"])
+        self.assertEqual(self.call_api.call_count, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
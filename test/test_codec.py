@@ -0,0 +1,55 @@
+import email.utils
+import unittest
+
+from mock import patch
+
+from cloudinary import api, codec
+from test.helper_test import api_response_mock, http_response_mock
+
+
+class CodecTest(unittest.TestCase):
+    def tearDown(self):
+        codec.set_codec()
+
+    def test_default_codec(self):
+        """should use the first installed codec"""
+        self.assertIn(codec.get_codec(), codec.CODECS)
+
+    def test_loads_bytes(self):
+        for name in codec.CODECS:
+            try:
+                codec.set_codec(name)
+            except ImportError:
+                continue
+            self.assertEqual(codec.loads(u'{"public_id": "café", "tags": []}'.encode("utf-8")),
+                             {"public_id": u"café", "tags": []})
+            with self.assertRaises(ValueError):
+                codec.loads(b"{")
+
+    def test_unknown_codec(self):
+        with self.assertRaises(ValueError):
+            codec.set_codec("yaml")
+
+
+class ResponseTest(unittest.TestCase):
+    def test_rate_limits(self):
+        response = api._parse_response(api_response_mock(), b'{"foo": "bar"}')
+        self.assertEqual(response, {"foo": "bar"})
+        self.assertEqual(response.rate_limit_allowed, 0)
+        self.assertEqual(response.rate_limit_remaining, 0)
+        self.assertEqual(response.rate_limit_reset_at, email.utils.parsedate("Sat, 01 Apr 2017 22:00:00 GMT"))
+
+    def test_rate_limits_are_parsed_lazily(self):
+        with patch("email.utils.parsedate") as parsedate:
+            response = api._parse_response(api_response_mock(), b'{"foo": "bar"}')
+            self.assertFalse(parsedate.called)
+            response.rate_limit_reset_at
+            self.assertTrue(parsedate.called)
+
+    def test_missing_rate_limits(self):
+        response = api._parse_response(http_response_mock(), b'{"foo": "bar"}')
+        self.assertIsNone(response.rate_limit_remaining)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import os
+import threading
+import unittest
+
+from mock import patch
+
+from cloudinary.deferred import DeferredUpload, DeferredUploadPool, submit_on_commit
+from test.helper_test import TEST_IMAGE
+
+
+class InlinePool(object):
+    def submit(self, func):
+        func()
+
+
+class DeferredTest(unittest.TestCase):
+    def test_pool_runs_submitted_calls(self):
+        pool = DeferredUploadPool(workers=2)
+        results = []
+        lock = threading.Lock()
+
+        def append(value):
+            with lock:
+                results.append(value)
+        for i in range(10):
+            pool.submit(append, i)
+        pool.join()
+        self.assertEqual(sorted(results), list(range(10)))
+
+    @patch('cloudinary.uploader.upload')
+    def test_deferred_upload(self, upload_mock):
+        """should upload the spooled copy and fill in the placeholder"""
+        upload_mock.return_value = {"public_id": "sample", "version": 1234, "format": "png", "width": 241}
+        completed = []
+        with open(TEST_IMAGE, "rb") as image:
+            upload = DeferredUpload(image, on_complete=completed.append, tags="a")
+        self.assertEqual(upload.resource.get_prep_value(), "image/upload/" + upload.options["public_id"])
+        path = upload.path
+        self.assertTrue(os.path.exists(path))
+
+        upload.run()
+        upload_mock.assert_called_once_with(path, tags="a", public_id=upload.options["public_id"])
+        self.assertEqual(completed, [upload.resource])
+        self.assertEqual(upload.resource.get_prep_value(), "image/upload/v1234/sample.png")
+        self.assertEqual(upload.resource.metadata["width"], 241)
+        self.assertFalse(os.path.exists(path))
+
+    @patch('cloudinary.uploader.upload')
+    def test_server_naming(self, upload_mock):
+        """should let the server name the resource when the upload options ask it to"""
+        upload_mock.return_value = {"public_id": "logo_x1y2z3", "version": 1234, "format": "png"}
+        upload = DeferredUpload(TEST_IMAGE, use_filename=True)
+        self.assertNotIn("public_id", upload.options)
+        self.assertEqual(os.path.basename(upload.path), os.path.basename(TEST_IMAGE))
+        self.assertIsNone(upload.resource.public_id)
+
+        path = upload.path
+        upload.run()
+        upload_mock.assert_called_once_with(path, use_filename=True)
+        self.assertEqual(upload.resource.get_prep_value(), "image/upload/v1234/logo_x1y2z3.png")
+
+        for options, public_id in (({"upload_preset": "named"}, None), ({"unique_filename": True}, None),
+                                   ({"use_filename": True, "public_id": "given"}, "given")):
+            upload = DeferredUpload(TEST_IMAGE, **options)
+            upload.discard()
+            self.assertEqual(upload.options.get("public_id"), public_id)
+
+    @patch('cloudinary.uploader.upload')
+    def test_lazy_spool(self, upload_mock):
+        upload_mock.return_value = {"public_id": "sample", "version": 1234}
+        upload = DeferredUpload(TEST_IMAGE, spool=False, public_id="sample")
+        self.assertIsNone(upload.path)
+        submit_on_commit(upload, InlinePool())
+        self.assertEqual(upload_mock.call_args[0][0].rsplit(os.sep, 1)[-1], os.path.basename(TEST_IMAGE))
+        self.assertTrue(upload.done)
+
+        errors = []
+        upload = DeferredUpload("/missing/file.jpg", spool=False, on_error=errors.append)
+        submit_on_commit(upload, InlinePool())
+        self.assertIsInstance(errors[0][1], IOError)
+        self.assertEqual(upload_mock.call_count, 1)
+
+    @patch('cloudinary.uploader.upload')
+    def test_deferred_upload_error(self, upload_mock):
+        upload_mock.side_effect = Exception("failed")
+        errors = []
+        upload = DeferredUpload(TEST_IMAGE, on_error=errors.append, public_id="sample")
+        upload.run()
+        self.assertEqual(str(errors[0][1]), "failed")
+        self.assertFalse(upload.done)
+        self.assertIsNone(upload.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,196 @@
+import os
+import tempfile
+import time
+import unittest
+
+import six
+
+import cloudinary
+from cloudinary import api, uploader, utils
+from cloudinary.emulator import Emulator
+
+OPTIONS = dict(cloud_name="emulated", api_key="a", api_secret="b")
+FORM_HEADERS = {"Content-Type": "application/x-www-form-urlencoded"}
+GIF = "data:image/gif;base64,R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7"
+
+
+class EmulatorTest(unittest.TestCase):
+    def setUp(self):
+        self.emulator = Emulator(seed=0, **OPTIONS).start()
+        self.options = dict(OPTIONS, upload_prefix=self.emulator.url)
+
+    def tearDown(self):
+        self.emulator.stop()
+
+    def test_upload(self):
+        result = uploader.upload(GIF, public_id="sample", tags=["a", "b"], context={"caption": "x=y"},
+                                 folder="folder", **self.options)
+        self.assertEqual(result["public_id"], "folder/sample")
+        self.assertEqual(result["tags"], ["a", "b"])
+        self.assertEqual(result["context"], {"custom": {"caption": "x=y"}})
+        self.assertEqual(result["signature"],
+                         utils.api_sign_request({"public_id": "folder/sample", "version": result["version"]}, "b"))
+        self.assertEqual(api.resource("folder/sample", **self.options)["bytes"], len(GIF))
+
+    def test_eager(self):
+        """should record eager transformations as derived resources and used transformations"""
+        result = uploader.upload(GIF, public_id="sample", eager=[{"width": 100, "crop": "scale"}], **self.options)
+        self.assertEqual(result["eager"][0]["transformation"], "c_scale,w_100")
+        self.assertEqual(len(api.resource("sample", **self.options)["derived"]), 1)
+        self.assertEqual(api.transformation("c_scale,w_100", **self.options)["info"], [{"width": 100, "crop": "scale"}])
+        api.delete_derived_by_transformation(["sample"], "c_scale,w_100", **self.options)
+        self.assertEqual(api.resource("sample", **self.options)["derived"], [])
+
+    def test_upload_large(self):
+        """should assemble chunked uploads"""
+        with tempfile.NamedTemporaryFile(suffix=".bin", delete=False) as f:
+            f.write(b"x" * 2500)
+        try:
+            result = uploader.upload_large(f.name, public_id="large", chunk_size=1000, **self.options)
+        finally:
+            os.remove(f.name)
+        self.assertEqual((result["public_id"], result["bytes"]), ("large", 2500))
+        self.assertEqual(self.emulator.requests, 3)
+
+    def test_signature(self):
+        """should reject upload API requests with an invalid or stale signature"""
+        with six.assertRaisesRegex(self, api.Error, "Invalid Signature"):
+            uploader.upload(GIF, **dict(self.options, api_secret="wrong"))
+        stale = utils.sign_request({"timestamp": int(time.time()) - 7200, "public_id": "x"}, self.options)
+        status, result, _ = self.emulator.handle("POST", "/v1_1/emulated/image/destroy", FORM_HEADERS, _form(stale))
+        self.assertEqual(status, 400)
+        six.assertRegex(self, result["error"]["message"], "Stale request")
+
+    def test_admin_credentials(self):
+        with self.assertRaises(api.AuthorizationRequired):
+            api.ping(**dict(self.options, api_secret="wrong"))
+        self.assertEqual(api.ping(**self.options)["status"], "ok")
+
+    def test_unsigned_upload(self):
+        api.create_upload_preset(name="open", unsigned=True, tags="preset_tag", **self.options)
+        result = uploader.unsigned_upload(GIF, "open", **self.options)
+        self.assertEqual(result["tags"], ["preset_tag"])
+        with six.assertRaisesRegex(self, api.Error, "signature"):
+            uploader.unsigned_upload(GIF, "missing", **self.options)
+
+    def test_explicit_rename_destroy_restore(self):
+        uploader.upload(GIF, public_id="first", backup=True, **self.options)
+        self.assertEqual(uploader.explicit("first", type="upload", tags=["t"], **self.options)["tags"], ["t"])
+        self.assertEqual(uploader.rename("first", "second", **self.options)["public_id"], "second")
+        with self.assertRaises(api.NotFound):
+            api.resource("first", **self.options)
+        self.assertEqual(uploader.destroy("second", **self.options), {"result": "ok"})
+        self.assertEqual(uploader.destroy("second", **self.options), {"result": "not found"})
+        self.assertTrue(api.resource("second", **self.options)["placeholder"])
+        self.assertEqual(api.restore(["second"], **self.options)["second"]["bytes"], len(GIF))
+        self.assertFalse(api.resource("second", **self.options)["placeholder"])
+
+    def test_tags_and_context(self):
+        self.emulator.add_resources(3)
+        uploader.add_tag("shoe", ["resource_0", "resource_2"], **self.options)
+        result = cloudinary.Search().expression("tags=shoe").execute(**self.options)
+        self.assertEqual(sorted(r["public_id"] for r in result["resources"]), ["resource_0", "resource_2"])
+        uploader.add_tag("shoe", ["resource_1"], exclusive=True, **self.options)
+        self.assertEqual([r["public_id"] for r in api.resources_by_tag("shoe", **self.options)["resources"]],
+                         ["resource_1"])
+        self.assertEqual(api.tags(**self.options)["tags"], ["shoe"])
+        uploader.remove_all_tags(["resource_1"], **self.options)
+        self.assertEqual(api.tags(**self.options)["tags"], [])
+        uploader.add_context({"alt": "a|b"}, ["resource_0"], **self.options)
+        self.assertEqual(api.resource("resource_0", **self.options)["context"], {"custom": {"alt": "a|b"}})
+        uploader.remove_all_context(["resource_0"], **self.options)
+        self.assertNotIn("context", api.resource("resource_0", **self.options))
+
+    def test_generated_resources(self):
+        self.emulator.add_resources(2, tags=["group"])
+        self.assertEqual(len(uploader.generate_sprite("group", **self.options)["image_infos"]), 2)
+        self.assertEqual(uploader.multi("group", **self.options)["public_id"], "group")
+        self.assertEqual(uploader.explode("resource_0", page="all", **self.options)["status"], "processing")
+        self.assertEqual(uploader.text("Hello", **self.options)["type"], "text")
+        archive = uploader.create_zip(tags="group", target_public_id="archive", **self.options)
+        self.assertEqual((archive["public_id"], archive["file_count"]), ("archive.zip", 2))
+
+    def test_listing(self):
+        """should paginate listings with next_cursor and send rate limit headers"""
+        self.emulator.add_resources(25)
+        first = api.resources(max_results=10, **self.options)
+        self.assertEqual(len(first["resources"]), 10)
+        self.assertEqual(first.rate_limit_allowed, 5000)
+        self.assertEqual(first.rate_limit_remaining, 4999)
+        public_ids = [r["public_id"] for r in first["resources"]]
+        next_cursor = first["next_cursor"]
+        while next_cursor:
+            page = api.resources(max_results=10, next_cursor=next_cursor, **self.options)
+            public_ids += [r["public_id"] for r in page["resources"]]
+            next_cursor = page.get("next_cursor")
+        self.assertEqual(len(set(public_ids)), 25)
+        by_ids = api.resources_by_ids(["resource_3", "resource_4"], **self.options)
+        self.assertEqual(len(by_ids["resources"]), 2)
+
+    def test_delete_resources(self):
+        self.emulator.add_resources(3, prefix="gone")
+        self.emulator.add_resources(1, prefix="kept")
+        result = api.delete_resources(["gone_0", "missing"], **self.options)
+        self.assertEqual(result["deleted"], {"gone_0": "deleted", "missing": "not_found"})
+        api.delete_resources_by_prefix("gone", **self.options)
+        self.assertEqual([r["public_id"] for r in api.resources(**self.options)["resources"]], ["kept_0"])
+
+    def test_folders(self):
+        uploader.upload(GIF, public_id="a/b/c", **self.options)
+        self.assertEqual(api.root_folders(**self.options)["folders"], [{"name": "a", "path": "a"}])
+        self.assertEqual(api.subfolders("a", **self.options)["folders"], [{"name": "b", "path": "a/b"}])
+        with self.assertRaises(api.NotFound):
+            api.subfolders("missing", **self.options)
+
+    def test_transformations(self):
+        api.create_transformation("thumb", {"width": 100, "crop": "fill"}, **self.options)
+        with self.assertRaises(api.AlreadyExists):
+            api.create_transformation("thumb", "w_50", **self.options)
+        api.update_transformation("thumb", allowed_for_strict=True, **self.options)
+        result = api.transformation("thumb", **self.options)
+        self.assertTrue(result["allowed_for_strict"])
+        self.assertEqual(result["info"], [{"crop": "fill", "width": 100}])
+        self.assertEqual([t["name"] for t in api.transformations(**self.options)["transformations"]], ["thumb"])
+        api.delete_transformation("thumb", **self.options)
+        with self.assertRaises(api.NotFound):
+            api.transformation("thumb", **self.options)
+
+    def test_upload_presets_and_mappings(self):
+        api.create_upload_preset(name="preset", folder="uploads", **self.options)
+        api.update_upload_preset("preset", unsigned=True, **self.options)
+        preset = api.upload_preset("preset", **self.options)
+        self.assertTrue(preset["unsigned"])
+        self.assertEqual(preset["settings"]["folder"], "uploads")
+        api.delete_upload_preset("preset", **self.options)
+        self.assertEqual(api.upload_presets(**self.options)["presets"], [])
+
+        api.create_upload_mapping("remote", template="http://example.com/", **self.options)
+        api.update_upload_mapping("remote", template="http://example.org/", **self.options)
+        self.assertEqual(api.upload_mapping("remote", **self.options)["template"], "http://example.org/")
+        api.delete_upload_mapping("remote", **self.options)
+        self.assertEqual(api.upload_mappings(**self.options)["mappings"], [])
+
+    def test_streaming_profiles(self):
+        self.assertIn("hd", [p["name"] for p in api.list_streaming_profiles(**self.options)["data"]])
+        result = api.create_streaming_profile("custom", representations=[
+            {"transformation": {"bit_rate": "5m", "height": 1200, "width": 1200, "crop": "limit"}}], **self.options)
+        self.assertEqual(result["data"]["representations"][0]["transformation"],
+                         [{"bit_rate": "5m", "height": 1200, "width": 1200, "crop": "limit"}])
+        api.update_streaming_profile("custom", display_name="Custom", **self.options)
+        self.assertEqual(api.get_streaming_profile("custom", **self.options)["data"]["display_name"], "Custom")
+        api.delete_streaming_profile("custom", **self.options)
+        with self.assertRaises(api.NotFound):
+            api.get_streaming_profile("custom", **self.options)
+
+    def test_injected_errors(self):
+        self.emulator.error_rate = 1.0
+        with self.assertRaises(api.Error):
+            uploader.upload(GIF, **self.options)
+
+
+def _form(params):
+    return "&".join("{0}={1}".format(key, value) for key, value in params.items()).encode("utf-8")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import csv
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from mock import patch
+
+from cloudinary import export
+from cloudinary.search import Search
+
+PAGES = [{"resources": [{"public_id": "a", "bytes": 1, "tags": ["x"]}, {"public_id": "b", "bytes": 2}],
+          "next_cursor": "cursor1"},
+         {"resources": [{"public_id": u"cé", "bytes": 3, "context": {"custom": {"alt": "C"}}}]}]
+
+
+class ExportTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "export")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _read_ndjson(self):
+        with open(self.path, "rb") as f:
+            return [json.loads(line.decode("utf-8")) for line in f]
+
+    @patch('cloudinary.api.resources')
+    def test_export_resources_ndjson(self, mocker):
+        """should write every page and remove the checkpoint when done"""
+        mocker.side_effect = PAGES
+        self.assertEqual(export.export_resources(self.path, page_size=2, resource_type="video"), 3)
+
+        self.assertEqual([r["public_id"] for r in self._read_ndjson()], ["a", "b", u"cé"])
+        self.assertEqual(mocker.call_args_list[0][1], {"max_results": 2, "resource_type": "video"})
+        self.assertEqual(mocker.call_args_list[1][1]["next_cursor"], "cursor1")
+        self.assertFalse(os.path.exists(self.path + export.CHECKPOINT_SUFFIX))
+
+    @patch('cloudinary.api.resources')
+    def test_export_resources_csv(self, mocker):
+        mocker.side_effect = PAGES
+        export.export_resources(self.path, format="csv", fields=["public_id", "bytes", "tags"])
+
+        with open(self.path, "rb") as f:
+            rows = list(csv.reader(f.read().decode("utf-8").splitlines()))
+        self.assertEqual(rows, [["public_id", "bytes", "tags"], ["a", "1", '["x"]'], ["b", "2", ""],
+                                [u"cé", "3", ""]])
+
+    @patch('cloudinary.search.Search._execute')
+    def test_resume_search_export(self, mocker):
+        """should resume an interrupted export from the checkpoint"""
+        mocker.side_effect = [PAGES[0], Exception("network error")]
+        search = Search().expression("format:jpg")
+        with self.assertRaises(Exception):
+            export.export_search(search, self.path, prefetch=False)
+        with open(self.path + export.CHECKPOINT_SUFFIX) as f:
+            self.assertEqual(json.load(f)["next_cursor"], "cursor1")
+        with open(self.path, "ab") as f:
+            f.write(b'{"partial')
+
+        mocker.side_effect = [PAGES[1]]
+        self.assertEqual(export.export_search(search, self.path, prefetch=False), 3)
+        self.assertEqual(mocker.call_args[0][0]["next_cursor"], "cursor1")
+        self.assertEqual([r["public_id"] for r in self._read_ndjson()], ["a", "b", u"cé"])
+
+    @patch('cloudinary.search.Search._execute')
+    def test_resume_other_export(self, mocker):
+        """should not resume the checkpoint of an export of another query"""
+        mocker.side_effect = [PAGES[0], Exception("network error")]
+        with self.assertRaises(Exception):
+            export.export_search(Search().expression("format:jpg"), self.path, prefetch=False)
+
+        for search, options in ((Search().expression("format:png"), {}),
+                                (Search().expression("format:jpg"), {"format": "csv"}),
+                                (Search().expression("format:jpg"), {"fields": ["public_id"]})):
+            with self.assertRaises(ValueError):
+                export.export_search(search, self.path, prefetch=False, **options)
+
+        mocker.side_effect = PAGES
+        self.assertEqual(export.export_search(Search().expression("format:png"), self.path, resume=False), 3)
+        self.assertFalse(os.path.exists(self.path + export.CHECKPOINT_SUFFIX))
+
+    def test_invalid_format(self):
+        with self.assertRaises(ValueError):
+            export.export_resources(self.path, format="xml")
+
+    @unittest.skipIf(export.pyarrow is None, "requires pyarrow")
+    @patch('cloudinary.api.resources')
+    def test_export_parquet(self, mocker):
+        mocker.side_effect = PAGES
+        export.export_resources(self.path, format="parquet")
+
+        table = export.pyarrow.parquet.read_table(self.path)
+        self.assertEqual(table.column("public_id").to_pylist(), ["a", "b", u"cé"])
+        self.assertEqual(table.column("bytes").to_pylist(), [1, 2, 3])
+
+    @unittest.skipIf(export.pyarrow is None, "requires pyarrow")
+    @patch('cloudinary.api.resources')
+    def test_parquet_starts_over(self, mocker):
+        """should not checkpoint parquet exports, and export everything again after an interruption"""
+        mocker.side_effect = [PAGES[0], Exception("network error")]
+        with self.assertRaises(Exception):
+            export.export_resources(self.path, format="parquet")
+        self.assertFalse(os.path.exists(self.path + export.CHECKPOINT_SUFFIX))
+
+        mocker.side_effect = PAGES
+        self.assertEqual(export.export_resources(self.path, format="parquet"), 3)
+        self.assertEqual(export.pyarrow.parquet.read_table(self.path).num_rows, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
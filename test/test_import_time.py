@@ -0,0 +1,110 @@
+"""
+Import time budgets of the modules that code building URLs or uploading files starts with.
+
+The budgets depend on the machine, so they are only checked with ``CLOUDINARY_BENCHMARK=1``, like the other
+benchmarks. Run ``python -m test.test_import_time --report`` to print the ``-X importtime`` results.
+"""
+from __future__ import print_function
+
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Import time budgets in milliseconds, as the best of RUNS imports in a new interpreter
+BUDGETS = {
+    "cloudinary": 150,
+    "cloudinary.utils": 150,
+    "cloudinary.uploader": 400,
+}
+RUNS = 3
+
+# Modules that importing a module must not import, they are imported when first needed
+DEFERRED_MODULES = {
+    "cloudinary": ("django", "urllib3", "certifi", "http.client", "cloudinary.api"),
+    "cloudinary.utils": ("django", "urllib3", "certifi", "http.client", "cloudinary.api"),
+    "cloudinary.uploader": ("django", "certifi"),
+}
+
+MARKER = "-- start"
+SCRIPT = """
+import json, sys
+before = set(sys.modules)
+sys.stderr.write("{0}\\n")
+import {{0}}
+print(json.dumps(sorted(set(sys.modules) - before)))
+""".format(MARKER)
+
+
+def import_module(module):
+    """
+    Import ``module`` in a new interpreter, outside of a Django process.
+
+    :return: the modules the import imported, and the ``-X importtime`` results of the import as
+             (self microseconds, cumulative microseconds, indented module name) tuples
+    """
+    env = dict((key, value) for key, value in os.environ.items()
+               if key != "DJANGO_SETTINGS_MODULE" and not key.startswith("CLOUDINARY"))
+    process = subprocess.Popen([sys.executable, "-X", "importtime", "-c", SCRIPT.format(module)], cwd=ROOT, env=env,
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    stdout, stderr = process.communicate()
+    if process.returncode:
+        raise RuntimeError(stderr)
+    results = []
+    for line in stderr.split(MARKER, 1)[1].splitlines():
+        fields = line.split("|")
+        if len(fields) == 3 and fields[0].startswith("import time:") and fields[1].strip().isdigit():
+            results.append((int(fields[0].split(":")[1]), int(fields[1]), fields[2][1:].rstrip()))
+    return json.loads(stdout.splitlines()[-1]), results
+
+
+def total_ms(results):
+    """
+    :return: the time of an import in milliseconds, including the packages of the module
+    """
+    return sum(cumulative for _, cumulative, name in results if name == name.lstrip()) / 1000.0
+
+
+def report(module, results, top=15):
+    """
+    :return: the slowest imports within the import of ``module``, as text
+    """
+    lines = ["{0}: {1:.1f} ms".format(module, total_ms(results))]
+    for own, cumulative, name in sorted(results, key=lambda result: -result[0])[:top]:
+        lines.append("{0:>10.1f} {1:>10.1f}  {2}".format(own / 1000.0, cumulative / 1000.0, name.strip()))
+    return "\n".join(lines)
+
+
+@unittest.skipUnless(sys.version_info >= (3, 7), "-X importtime requires Python 3.7")
+class ImportTimeTest(unittest.TestCase):
+    def test_deferred_modules(self):
+        """should not import Django, the HTTP client or the CA certificates before they are needed"""
+        for module, deferred in sorted(DEFERRED_MODULES.items()):
+            imported, _ = import_module(module)
+            self.assertEqual([name for name in deferred if name in imported], [], module)
+
+    def test_log_handlers(self):
+        """should not add log handlers that write records, that is up to the application"""
+        script = "import logging, cloudinary; print([type(handler).__name__ for handler in " \
+                 "logging.getLogger('Cloudinary').handlers + logging.getLogger().handlers])"
+        output = subprocess.check_output([sys.executable, "-c", script], cwd=ROOT, universal_newlines=True)
+        self.assertEqual(output.strip(), "['NullHandler']")
+
+    @unittest.skipUnless(os.environ.get("CLOUDINARY_BENCHMARK"), "set CLOUDINARY_BENCHMARK=1 to run benchmarks")
+    def test_budgets(self):
+        for module, budget in sorted(BUDGETS.items()):
+            runs = [import_module(module)[1] for _ in range(RUNS)]
+            best = min(runs, key=total_ms)
+            self.assertLessEqual(total_ms(best), budget, report(module, best))
+
+
+if __name__ == "__main__":
+    if "--report" in sys.argv:
+        for name in sorted(BUDGETS):
+            print(report(name, import_module(name)[1]))
+            print()
+    else:
+        unittest.main()
@@ -0,0 +1,146 @@
+import json
+import threading
+import unittest
+
+from mock import MagicMock
+from six.moves import BaseHTTPServer, socketserver
+from urllib3.util.retry import RequestHistory, Retry
+
+from cloudinary import api, instrumentation, uploader
+from cloudinary.instrumentation import MetricsRegistry, uri_template
+from test.helper_test import http_response_mock
+
+
+class _Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _respond(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        status, result = self.server.response
+        data = json.dumps(result).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = do_POST = do_DELETE = _respond
+
+    def log_message(self, *args):
+        pass
+
+
+class _Server(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+class UriTemplateTest(unittest.TestCase):
+    def test_uri_template(self):
+        prefix = "https://api.cloudinary.com/v1_1/demo/"
+        self.assertEqual(uri_template(prefix + "image/upload"), "image/upload")
+        self.assertEqual(uri_template(prefix + "resources/image/upload/folder/sample"), "resources/image/upload/{id}")
+        self.assertEqual(uri_template(prefix + "resources/image/tags/shoe?max_results=10"), "resources/image/tags/{id}")
+        self.assertEqual(uri_template(prefix + "transformations/w_100"), "transformations/{id}")
+
+
+class InstrumentationTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = _Server(("127.0.0.1", 0), _Handler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever)
+        cls.thread.daemon = True
+        cls.thread.start()
+        cls.prefix = "http://127.0.0.1:{0}".format(cls.server.server_address[1])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.response = (200, {"public_id": "sample", "version": 1})
+        self.options = dict(upload_prefix=self.prefix, cloud_name="test123", api_key="a", api_secret="b")
+        self.events = []
+        instrumentation.register(self.events.append)
+
+    def tearDown(self):
+        instrumentation.unregister(self.events.append)
+
+    def test_upload_events(self):
+        """should report the start and the end of upload calls with timings and sizes"""
+        uploader.upload("data:image/gif;base64,R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7",
+                        **self.options)
+        self.assertEqual([event.name for event in self.events], ["request_start", "request_end"])
+        end = self.events[1]
+        self.assertEqual((end.api, end.method, end.uri_template, end.status), ("upload", "POST", "image/upload", 200))
+        self.assertGreater(end.bytes_sent, 100)
+        self.assertEqual(end.bytes_received, len(b'{"public_id": "sample", "version": 1}'))
+        self.assertEqual(set(end.timings), {"connect", "send", "wait", "receive", "total"})
+        self.assertAlmostEqual(sum(end.timings[stage] for stage in ("connect", "send", "wait", "receive")),
+                               end.timings["total"])
+
+    def test_admin_api_events(self):
+        self.server.response = (420, {"error": {"message": "Rate Limit Exceeded"}})
+        with self.assertRaises(api.RateLimited):
+            api.resource("folder/sample", **self.options)
+        self.assertEqual([event.name for event in self.events], ["request_start", "rate_limited", "request_end"])
+        self.assertEqual(self.events[-1].uri_template, "resources/image/upload/{id}")
+        self.assertEqual(self.events[-1].method, "GET")
+
+    def test_failed_request(self):
+        options = dict(self.options, upload_prefix="http://127.0.0.1:1")
+        with self.assertRaises(api.Error):
+            uploader.destroy("sample", **options)
+        end = self.events[-1]
+        self.assertEqual(end.name, "request_end")
+        self.assertIsNone(end.status)
+        self.assertIsNotNone(end.error)
+
+    def test_retries(self):
+        response = http_response_mock('{}', status=200)
+        response.retries = Retry(history=(RequestHistory("GET", "/", None, 503, None),))
+        http = MagicMock()
+        http.request.return_value = response
+        instrumentation.request(http, "admin", "GET", self.prefix + "/v1_1/test123/ping")
+        self.assertEqual([event.name for event in self.events], ["request_start", "retry", "request_end"])
+        self.assertEqual(self.events[1].status, 503)
+        self.assertEqual(self.events[2].retries, 1)
+
+    def test_hook_errors_are_ignored(self):
+        def failing_hook(event):
+            raise ValueError("hook")
+        instrumentation.register(failing_hook)
+        try:
+            self.assertEqual(api.ping(**self.options)["public_id"], "sample")
+        finally:
+            instrumentation.unregister(failing_hook)
+
+    def test_metrics(self):
+        metrics = MetricsRegistry()
+        instrumentation.register(metrics)
+        try:
+            api.ping(**self.options)
+            api.ping(**self.options)
+            self.server.response = (420, {"error": {"message": "Rate Limit Exceeded"}})
+            with self.assertRaises(api.RateLimited):
+                api.ping(**self.options)
+        finally:
+            instrumentation.unregister(metrics)
+
+        duration = metrics.histogram("cloudinary_request_duration_seconds", api="admin", uri="ping", method="GET",
+                                     status="200")
+        self.assertEqual(duration.count, 2)
+        self.assertEqual(metrics.counter("cloudinary_rate_limited_total", uri="ping"), 1)
+
+        text = metrics.to_prometheus()
+        self.assertIn("# TYPE cloudinary_request_duration_seconds histogram\n", text)
+        self.assertIn('cloudinary_request_duration_seconds_count{api="admin",uri="ping",method="GET",status="200"} 2\n',
+                      text)
+        self.assertIn('cloudinary_request_duration_seconds_bucket{api="admin",uri="ping",method="GET",status="200",'
+                      'le="+Inf"} 2\n', text)
+        self.assertIn('cloudinary_rate_limited_total{api="admin",uri="ping"} 1\n', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
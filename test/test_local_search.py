@@ -0,0 +1,119 @@
+import unittest
+
+from mock import patch
+
+from cloudinary import local_search
+from cloudinary.local_search import ResourceIndex, UnsupportedQuery, parse
+from cloudinary.mirror import Mirror
+from cloudinary.search import Search
+from test.helper_test import api_response_mock
+
+RESOURCES = [
+    dict(public_id="products/shoe", resource_type="image", type="upload", format="jpg", bytes=2 * 1024 * 1024,
+         width=100, height=50, created_at="2018-01-01T00:00:00Z", tags=["shoe", "red shoes"],
+         context={"custom": {"alt": "Red shoe"}}),
+    dict(public_id="products/hat", resource_type="image", type="upload", format="png", bytes=1024,
+         width=10, height=10, created_at="2018-02-01T00:00:00Z", tags=["hat"]),
+    dict(public_id="videos/intro", resource_type="video", type="upload", format="mp4", bytes=10 * 1024 * 1024,
+         created_at="2018-03-01T00:00:00Z", tags=["shoe"]),
+    dict(public_id="private/doc", resource_type="raw", type="private", bytes=10,
+         created_at="2018-04-01T00:00:00Z", tags=[]),
+]
+
+
+class LocalSearchTest(unittest.TestCase):
+    def setUp(self):
+        self.index = ResourceIndex(RESOURCES)
+
+    def _ids(self, search):
+        return [r["public_id"] for r in search.execute_local(self.index)["resources"]]
+
+    def test_parse(self):
+        self.assertEqual(parse("resource_type:image AND tags=shoe"),
+                         ("and", [("term", "resource_type", ":", "image"), ("term", "tags", "=", "shoe")]))
+        self.assertEqual(parse("-format:png OR (bytes>1mb NOT tags:hat)"),
+                         ("or", [("not", ("term", "format", ":", "png")),
+                                 ("and", [("term", "bytes", ">", "1mb"), ("not", ("term", "tags", ":", "hat"))])]))
+        self.assertEqual(parse('context.alt="Red shoe"'), ("term", "context.alt", "=", "Red shoe"))
+        self.assertIsNone(parse(""))
+
+    def test_parse_errors(self):
+        for expression in ["(tags=shoe", "tags=shoe)", "AND", "tags="]:
+            with self.assertRaises(UnsupportedQuery):
+                parse(expression)
+
+    def test_expressions(self):
+        self.assertEqual(self._ids(Search().expression("resource_type:image AND tags=shoe")), ["products/shoe"])
+        self.assertEqual(self._ids(Search().expression("tags:shoes")), ["products/shoe"])
+        self.assertEqual(self._ids(Search().expression("tags=shoe")), ["products/shoe", "videos/intro"])
+        self.assertEqual(self._ids(Search().expression("public_id:products/*")), ["products/hat", "products/shoe"])
+        self.assertEqual(self._ids(Search().expression("folder=products -format:jpg")), ["products/hat"])
+        self.assertEqual(self._ids(Search().expression("bytes>1mb")), ["products/shoe", "videos/intro"])
+        self.assertEqual(self._ids(Search().expression("pixels<=100")), ["products/hat"])
+        self.assertEqual(self._ids(Search().expression("type=private OR format=mp4")),
+                         ["private/doc", "videos/intro"])
+        self.assertEqual(self._ids(Search().expression("uploaded_at>2018-02-15")), ["private/doc", "videos/intro"])
+        self.assertEqual(self._ids(Search().expression('context.alt="Red shoe"')), ["products/shoe"])
+        self.assertEqual(self._ids(Search().expression("intro")), ["videos/intro"])
+        self.assertEqual(len(self._ids(Search())), len(RESOURCES))
+
+    def test_unsupported_fields(self):
+        for expression in ["metadata.sku=1", "moderation_status=approved", "bogus_field=3", "tags=shoe OR typo:x"]:
+            with self.assertRaises(UnsupportedQuery):
+                Search().expression(expression).execute_local(self.index)
+        with self.assertRaises(UnsupportedQuery):
+            Search().sort_by("metadata.sku").execute_local(self.index)
+
+    def test_sort_and_paginate(self):
+        search = Search().expression("bytes>0").sort_by("bytes", "desc").max_results(3)
+        result = search.execute_local(self.index)
+        self.assertEqual(result["total_count"], 4)
+        self.assertEqual([r["public_id"] for r in result["resources"]],
+                         ["videos/intro", "products/shoe", "products/hat"])
+        self.assertNotIn("tags", result["resources"][0])
+
+        result = search.next_cursor(result["next_cursor"]).execute_local(self.index)
+        self.assertEqual([r["public_id"] for r in result["resources"]], ["private/doc"])
+        self.assertNotIn("next_cursor", result)
+
+    def test_aggregate_and_with_field(self):
+        result = Search().expression("tags=shoe").aggregate("resource_type").with_field("tags") \
+            .execute_local(self.index)
+        self.assertEqual(result["aggregations"], {"resource_type": {"image": 1, "video": 1}})
+        self.assertEqual(result["resources"][0]["tags"], ["shoe", "red shoes"])
+
+        with self.assertRaises(UnsupportedQuery):
+            Search().aggregate("pixels").execute_local(self.index)
+
+    def test_mirror_index(self):
+        mirror = Mirror()
+        for resource in RESOURCES:
+            mirror.apply_notification(dict(resource, notification_type="upload"))
+        result = Search().expression("tags=shoe AND resource_type=video").execute_local(mirror)
+        self.assertEqual([r["public_id"] for r in result["resources"]], ["videos/intro"])
+
+    @patch('urllib3.request.RequestMethods.request')
+    def test_remote_fallback(self, mocker):
+        """should only call the Search API on explicit fallback"""
+        mocker.return_value = api_response_mock()
+        search = Search().expression("tags:(shoe OR hat)")
+        with self.assertRaises(UnsupportedQuery):
+            search.execute_local(self.index)
+        self.assertFalse(mocker.called)
+
+        result = Search().expression("metadata.sku=1").execute_local(self.index, remote_fallback=True,
+                                                                     cloud_name="test123", api_key="a",
+                                                                     api_secret="b")
+        self.assertEqual(result["foo"], "bar")
+
+        result = search.execute_local(self.index, remote_fallback=True, cloud_name="test123", api_key="a",
+                                      api_secret="b")
+        self.assertEqual(result["foo"], "bar")
+        self.assertTrue(mocker.called)
+
+    def test_compiled_expressions_are_cached(self):
+        self.assertIs(local_search.compile_expression("tags=shoe"), local_search.compile_expression("tags=shoe"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+
+from mock import patch
+
+from cloudinary.mirror import Mirror
+
+
+def _resource(public_id, created_at, tags=None, size=100, **kwargs):
+    resource = dict(public_id=public_id, resource_type="image", type="upload", format="jpg", version=1,
+                     bytes=size, width=10, height=20, created_at=created_at, tags=tags or [])
+    resource.update(kwargs)
+    return resource
+
+
+PAGE1 = {"resources": [_resource("products/shoe", "2018-01-01T00:00:00Z", ["shoe", "featured"], 300),
+                       _resource("products/hat", "2018-01-02T00:00:00Z", ["hat"], 200)],
+         "next_cursor": "cursor1"}
+PAGE2 = {"resources": [_resource("banners/sale", "2018-01-03T00:00:00Z", ["featured"], 50,
+                                 context={"custom": {"alt": "Sale"}})]}
+
+
+class MirrorTest(unittest.TestCase):
+    def setUp(self):
+        self.mirror = Mirror()
+
+    def tearDown(self):
+        self.mirror.close()
+
+    @patch('cloudinary.api.resources')
+    def test_load(self, mocker):
+        """should load all pages of the listing"""
+        mocker.side_effect = [PAGE1, PAGE2]
+        self.assertEqual(self.mirror.load(), 3)
+
+        self.assertEqual(mocker.call_count, 2)
+        self.assertEqual(mocker.call_args[1]["next_cursor"], "cursor1")
+        self.assertTrue(mocker.call_args[1]["tags"])
+        self.assertEqual(self.mirror.count(), 3)
+        self.assertEqual(self.mirror.get("banners/sale")["context"], {"custom": {"alt": "Sale"}})
+        self.assertEqual(self.mirror.get("products/hat")["tags"], ["hat"])
+        self.assertIsNone(self.mirror.get("missing"))
+        self.assertEqual(self.mirror.last_created_at(), "2018-01-03T00:00:00Z")
+
+    @patch('cloudinary.api.resources')
+    def test_queries(self, mocker):
+        mocker.side_effect = [PAGE1, PAGE2]
+        self.mirror.load()
+
+        self.assertEqual([r["public_id"] for r in self.mirror.resources_by_tag("featured")],
+                         ["banners/sale", "products/shoe"])
+        self.assertEqual([r["public_id"] for r in self.mirror.resources_by_prefix("products/")],
+                         ["products/hat", "products/shoe"])
+        self.assertEqual(self.mirror.total_bytes(prefix="products/"), 500)
+        self.assertEqual(self.mirror.total_bytes(tag="featured"), 350)
+        self.assertEqual(self.mirror.count(prefix="products/", tag="featured"), 1)
+        self.assertEqual(self.mirror.total_bytes(resource_type="video"), 0)
+
+    @patch('cloudinary.api.resources')
+    def test_refresh(self, mocker):
+        """should request only resources created since the last sync"""
+        mocker.side_effect = [PAGE2, {"resources": [_resource("new", "2018-02-01T00:00:00Z")]}]
+        self.mirror.load()
+        self.assertEqual(self.mirror.refresh(), 1)
+
+        options = mocker.call_args[1]
+        self.assertEqual(options["start_at"], "2018-01-03T00:00:00Z")
+        self.assertEqual(options["direction"], "asc")
+        self.assertEqual(self.mirror.count(), 2)
+        self.assertEqual(self.mirror.last_created_at(), "2018-02-01T00:00:00Z")
+
+    @patch('cloudinary.api.resources')
+    def test_refresh_without_load(self, mocker):
+        mocker.return_value = PAGE2
+        self.assertEqual(self.mirror.refresh(), 1)
+        self.assertNotIn("start_at", mocker.call_args[1])
+
+    def test_apply_notifications(self):
+        upload = _resource("uploaded", "2018-03-01T00:00:00Z", ["new"], notification_type="upload")
+        self.assertTrue(self.mirror.apply_notification(upload))
+        self.assertEqual(self.mirror.resources_by_tag("new")[0]["public_id"], "uploaded")
+
+        self.mirror.apply_notification({"notification_type": "rename", "resource_type": "image",
+                                        "type": "upload", "from_public_id": "uploaded", "to_public_id": "renamed"})
+        self.assertIsNone(self.mirror.get("uploaded"))
+        self.assertEqual(self.mirror.resources_by_tag("new")[0]["public_id"], "renamed")
+
+        self.mirror.apply_notification({"notification_type": "delete",
+                                        "resources": [{"public_id": "renamed", "resource_type": "image",
+                                                       "type": "upload"}]})
+        self.assertEqual(self.mirror.count(), 0)
+        self.assertEqual(self.mirror.resources_by_tag("new"), [])
+
+        self.assertFalse(self.mirror.apply_notification({"notification_type": "eager"}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+import hashlib
+import io
+import json
+import threading
+import time
+import unittest
+
+from mock import patch
+
+import cloudinary
+from cloudinary.notifications import (InvalidSignature, NotificationApp, NotificationError, NotificationReceiver,
+                                      verify_notification_signature)
+
+SECRET = "b"
+TIMESTAMP = 1500000000
+
+
+def _sign(body, timestamp=TIMESTAMP, secret=SECRET):
+    return hashlib.sha1(body + str(timestamp).encode("utf-8") + secret.encode("utf-8")).hexdigest()
+
+
+def _notification(public_id):
+    return json.dumps({"notification_type": "upload", "public_id": public_id}).encode("utf-8")
+
+
+@patch('time.time', lambda: TIMESTAMP + 10)
+class VerifyNotificationSignatureTest(unittest.TestCase):
+    def test_verify(self):
+        body = _notification("sample")
+        self.assertTrue(verify_notification_signature(body, str(TIMESTAMP), _sign(body), secrets=SECRET))
+        self.assertFalse(verify_notification_signature(body, str(TIMESTAMP), _sign(body + b" "), secrets=SECRET))
+        self.assertFalse(verify_notification_signature(body, str(TIMESTAMP + 1), _sign(body), secrets=SECRET))
+        self.assertFalse(verify_notification_signature(body, None, _sign(body), secrets=SECRET))
+        self.assertFalse(verify_notification_signature(body, "now", _sign(body), secrets=SECRET))
+
+    def test_default_secret(self):
+        cloudinary.config(api_secret=SECRET)
+        body = _notification("sample")
+        self.assertTrue(verify_notification_signature(body, TIMESTAMP, _sign(body)))
+
+    def test_timestamp_window(self):
+        body = _notification("sample")
+        timestamp = TIMESTAMP - 100
+        self.assertTrue(verify_notification_signature(body, timestamp, _sign(body, timestamp), 200, SECRET))
+        self.assertFalse(verify_notification_signature(body, timestamp, _sign(body, timestamp), 50, SECRET))
+
+    def test_secret_rotation(self):
+        """should accept signatures of any of the secrets"""
+        body = _notification("sample")
+        secrets = ("new", "old")
+        self.assertTrue(verify_notification_signature(body, TIMESTAMP, _sign(body, secret="old"), secrets=secrets))
+        self.assertTrue(verify_notification_signature(body, TIMESTAMP, _sign(body, secret="new"), secrets=secrets))
+        self.assertFalse(verify_notification_signature(body, TIMESTAMP, _sign(body), secrets=secrets))
+
+
+@patch('time.time', lambda: TIMESTAMP + 10)
+class NotificationReceiverTest(unittest.TestCase):
+    def setUp(self):
+        self.batches = []
+        self.receiver = NotificationReceiver(self.batches.append, secrets=SECRET, batch_size=3, batch_interval=60)
+
+    def tearDown(self):
+        self.receiver.close()
+
+    def _receive(self, body):
+        return self.receiver.receive(body, str(TIMESTAMP), _sign(body))
+
+    def test_invalid(self):
+        with self.assertRaises(InvalidSignature):
+            self.receiver.receive(_notification("sample"), str(TIMESTAMP), "0" * 40)
+        body = b"[1, 2]"
+        with self.assertRaises(NotificationError):
+            self._receive(body)
+        self.assertEqual(self.receiver.stats()["received"], 0)
+
+    def test_deduplication(self):
+        """should drop redelivered notifications"""
+        self.assertTrue(self._receive(_notification("a")))
+        self.assertFalse(self._receive(_notification("a")))
+        self.assertTrue(self._receive(_notification("b")))
+        self.receiver.flush()
+        self.assertEqual([[n["public_id"] for n in batch] for batch in self.batches], [["a", "b"]])
+        self.assertEqual(self.receiver.stats(), {"received": 2, "duplicates": 1, "pending": 0})
+
+    def test_bounded_deduplication(self):
+        receiver = NotificationReceiver(self.batches.append, secrets=SECRET, dedup_size=2)
+        for public_id in ("a", "b", "c"):
+            receiver.receive(_notification(public_id), TIMESTAMP, _sign(_notification(public_id)))
+        self.assertTrue(receiver.receive(_notification("a"), TIMESTAMP, _sign(_notification("a"))))
+        receiver.close()
+
+    def test_full_batches(self):
+        """should pass full batches to the callback from the background thread"""
+        delivered = threading.Event()
+        threads = []
+
+        def callback(batch):
+            threads.append(threading.current_thread())
+            self.batches.append(batch)
+            delivered.set()
+        self.receiver.callback = callback
+        for i in range(7):
+            self._receive(_notification(str(i)))
+        self.assertTrue(delivered.wait(5))
+        self.receiver.close()
+        self.assertEqual([len(batch) for batch in self.batches], [3, 3, 1])
+        self.assertNotEqual(threads[0], threading.current_thread())
+
+    def test_callback_errors_are_logged(self):
+        self.receiver.callback = lambda batch: 1 / 0
+        self._receive(_notification("a"))
+        with patch.object(cloudinary.logger, "exception") as exception:
+            self.receiver.flush()
+        self.assertTrue(exception.called)
+
+    def test_wsgi_app(self):
+        app = NotificationApp(self.receiver)
+        body = _notification("a")
+
+        def call(signature, method="POST"):
+            environ = {"REQUEST_METHOD": method, "CONTENT_LENGTH": str(len(body)), "wsgi.input": io.BytesIO(body),
+                       "HTTP_X_CLD_TIMESTAMP": str(TIMESTAMP), "HTTP_X_CLD_SIGNATURE": signature}
+            statuses = []
+            app(environ, lambda status, headers: statuses.append(status))
+            return statuses[0]
+
+        self.assertEqual(call(_sign(body)), "200 OK")
+        self.assertEqual(call(_sign(body)), "200 OK")
+        self.assertEqual(call("0" * 40), "401 Unauthorized")
+        self.assertEqual(call(_sign(body), "GET"), "405 Method Not Allowed")
+        self.assertEqual(self.receiver.stats()["duplicates"], 1)
+
+
+class NotificationBatchIntervalTest(unittest.TestCase):
+    def test_batch_interval(self):
+        """should pass incomplete batches to the callback after the interval"""
+        delivered = threading.Event()
+        receiver = NotificationReceiver(lambda batch: delivered.set(), secrets=SECRET, batch_interval=0.01)
+        now = int(time.time())
+        receiver.receive(_notification("a"), now, _sign(_notification("a"), now))
+        self.assertTrue(delivered.wait(5))
+        receiver.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+
+import cloudinary
+from cloudinary import CloudinaryImage, CloudinaryResource, CloudinaryVideo
+from cloudinary.prefetch import CloudinaryUrls, prefetch_cloudinary_urls
+
+OPTION_SETS = [
+    {},
+    {"crop": "fill", "width": 200, "height": 100, "alt": "product"},
+    {"transformation": [{"effect": "sepia"}, {"crop": "limit", "width": 300}], "secure": True},
+    {"width": "auto", "crop": "scale", "responsive": True},
+    {"srcset": {"breakpoints": [100, 200, 300], "sizes": True}, "effect": "grayscale"},
+    {"srcset": {"min_width": 100, "max_width": 300, "max_images": 2, "transformation": {"crop": "crop"}}},
+    {"sign_url": True, "cdn_subdomain": True, "dpr": "auto"},
+    {"type": "fetch", "format": "png"},
+]
+
+
+class Product(object):
+    def __init__(self, image):
+        self.image = image
+
+
+class PrefetchTest(unittest.TestCase):
+    def setUp(self):
+        cloudinary.reset_config()
+        cloudinary.config(cloud_name="test123", api_secret="1234", cname=None)
+        self.resources = [
+            CloudinaryImage("products/shoe", format="jpg", version="1234"),
+            CloudinaryImage("products/hat", format="png"),
+            CloudinaryVideo("videos/intro", format="mp4", version="5678"),
+            CloudinaryResource("private/doc", type="private", resource_type="image", format="jpg"),
+            "http://example.com/remote.jpg",
+        ]
+
+    def test_same_results_as_resource(self):
+        """should produce the same URLs and tags as building them one by one"""
+        for options in OPTION_SETS:
+            products = prefetch_cloudinary_urls([Product(r) for r in self.resources], "image", **options)
+            for product in products:
+                resource = product.image
+                if not isinstance(resource, CloudinaryResource):
+                    resource = CloudinaryResource(resource)
+                urls = product.image_urls
+                self.assertIsInstance(urls, CloudinaryUrls)
+                self.assertEqual(urls.url, resource.build_url(**dict(options)), options)
+                self.assertEqual(urls.image, resource.image(**dict(options)), options)
+
+    def test_srcset(self):
+        products = prefetch_cloudinary_urls([Product(self.resources[0])], "image", effect="sepia",
+                                            srcset={"breakpoints": [100]})
+        self.assertEqual(products[0].image_urls.srcset,
+                         "http://res.cloudinary.com/test123/image/upload/e_sepia/c_scale,w_100/v1/products/shoe 100w")
+
+    def test_empty_field_and_attribute(self):
+        products = prefetch_cloudinary_urls(iter([Product(None), Product("sample")]), "image", attribute="urls")
+        self.assertIsNone(products[0].urls)
+        self.assertEqual(str(products[1].urls), '<img src="http://res.cloudinary.com/test123/image/upload/sample"/>')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import threading
+import unittest
+
+import cloudinary
+from cloudinary import CloudinaryResource, profiling, utils
+
+
+class ProfilingTest(unittest.TestCase):
+    def setUp(self):
+        cloudinary.config(cloud_name="test123", api_secret="b")
+
+    def tearDown(self):
+        profiling.disable()
+
+    def test_disabled(self):
+        """should not wrap any function while profiling is disabled"""
+        original = utils.generate_transformation_string
+        with profiling.profile_urls():
+            self.assertIsNot(utils.generate_transformation_string, original)
+        self.assertIs(utils.generate_transformation_string, original)
+        self.assertIsNone(profiling.get_profile())
+
+    def test_stages(self):
+        with profiling.profile_urls() as profile:
+            url, _ = utils.cloudinary_url("sample", width=100, crop="scale", sign_url=True,
+                                          overlay={"font_family": "arial", "font_size": 20, "text": "Hello"})
+        self.assertEqual(url, utils.cloudinary_url("sample", width=100, crop="scale", sign_url=True,
+                                                   overlay={"font_family": "arial", "font_size": 20,
+                                                            "text": "Hello"})[0])
+        stages = dict((stage, calls) for stage, calls, _ in profile.report()["stages"])
+        for stage in ("cloudinary_url", "generate_transformation_string", "process_layer", "finalize_source",
+                      "smart_escape", "unsigned_download_url_prefix", "signing"):
+            self.assertIn(stage, stages)
+        self.assertEqual(stages["cloudinary_url"], 1)
+
+    def test_nested_transformations(self):
+        """should count recursive calls once"""
+        with profiling.profile_urls() as profile:
+            utils.cloudinary_url("sample", transformation=[{"width": 100}, {"angle": 10}])
+        stages = dict((stage, calls) for stage, calls, _ in profile.report()["stages"])
+        self.assertEqual(stages["generate_transformation_string"], 1)
+
+    def test_option_sets(self):
+        """should report the most costly option sets of the outermost calls"""
+        resource = CloudinaryResource("sample", format="jpg")
+        with profiling.profile_urls() as profile:
+            for _ in range(3):
+                resource.image(width=100, crop="fill")
+            resource.image(width=200)
+            resource.video(source_types=["mp4", "webm"])
+        option_sets = profile.report(top=2)["option_sets"]
+        self.assertEqual(len(option_sets), 2)
+        entry_points = dict(((entry_point, options), calls) for entry_point, options, calls, _ in
+                            profile.report()["option_sets"])
+        self.assertEqual(entry_points[("image", (("crop", "fill"), ("width", 100)))], 3)
+        self.assertNotIn("cloudinary_url", [entry_point for entry_point, _ in entry_points])
+        self.assertIn("html_attrs", profile.format())
+
+    def test_config(self):
+        cloudinary.config(profile_urls=True)
+        try:
+            utils.cloudinary_url("sample")
+            self.assertEqual(profiling.get_profile().stages["cloudinary_url"][0], 1)
+        finally:
+            cloudinary.config(profile_urls=False)
+        self.assertIsNone(profiling.get_profile())
+
+    def test_concurrent_blocks(self):
+        """should record the URLs of each thread into the profile of its own block"""
+        original = utils.cloudinary_url
+        entered = threading.Barrier(2) if hasattr(threading, "Barrier") else None
+        counts = {}
+
+        def generate(index):
+            with profiling.profile_urls() as profile:
+                if entered is not None:
+                    entered.wait()
+                for _ in range(index + 1):
+                    utils.cloudinary_url("sample", width=100)
+                if entered is not None:
+                    entered.wait()
+            counts[index] = profile.stages["cloudinary_url"][0]
+
+        threads = [threading.Thread(target=generate, args=(index,)) for index in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(counts, {0: 1, 1: 2})
+        self.assertIs(utils.cloudinary_url, original)
+
+    def test_nested_blocks(self):
+        original = utils.cloudinary_url
+        cloudinary.config(profile_urls=True)
+        with profiling.profile_urls() as outer:
+            with profiling.profile_urls() as inner:
+                utils.cloudinary_url("sample")
+                self.assertIs(profiling.get_profile(), inner)
+            utils.cloudinary_url("sample")
+        self.assertEqual((inner.stages["cloudinary_url"][0], outer.stages["cloudinary_url"][0]), (1, 2))
+        self.assertEqual(profiling.get_profile().stages["cloudinary_url"][0], 2)
+        self.assertIsNot(utils.cloudinary_url, original)
+        cloudinary.config(profile_urls=False)
+        self.assertIs(utils.cloudinary_url, original)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,160 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from mock import patch
+
+import cloudinary
+from cloudinary import api
+from cloudinary.emulator import Emulator
+from cloudinary.queue import DONE, FAILED, PENDING, RUNNING, JobQueue
+
+OPTIONS = dict(cloud_name="queued", api_key="a", api_secret="b")
+GIF = "data:image/gif;base64,R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7"
+
+
+class JobQueueTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "jobs.db")
+        self.jobs = JobQueue(self.path, max_attempts=3)
+
+    def tearDown(self):
+        self.jobs.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    @patch('cloudinary.uploader.upload')
+    def test_run_pending(self, upload_mock):
+        upload_mock.return_value = {"public_id": "sample", "version": 1}
+        completed = []
+        self.jobs.on_complete = completed.append
+        job_id = self.jobs.enqueue("upload", "/tmp/sample.jpg", public_id="sample", tags=["a"])
+        self.assertEqual(self.jobs.get(job_id).status, PENDING)
+
+        self.assertEqual(self.jobs.run_pending(), 1)
+        upload_mock.assert_called_once_with("/tmp/sample.jpg", public_id="sample", tags=["a"])
+        job = self.jobs.get(job_id)
+        self.assertEqual((job.status, job.attempts, job.result), (DONE, 1, {"public_id": "sample", "version": 1}))
+        self.assertEqual([j.id for j in completed], [job_id])
+        self.assertEqual(self.jobs.counts(), {DONE: 1})
+        self.assertEqual(self.jobs.purge(), 1)
+        self.assertIsNone(self.jobs.get(job_id))
+
+    def test_unsupported_operation(self):
+        with self.assertRaises(ValueError):
+            self.jobs.enqueue("delete_resources", ["sample"])
+
+    @patch('cloudinary.uploader.add_tag')
+    def test_idempotency_key(self, add_tag_mock):
+        first = self.jobs.enqueue("add_tag", "tag", ["a"], idempotency_key="key")
+        second = self.jobs.enqueue("add_tag", "tag", ["a"], idempotency_key="key")
+        self.assertEqual(first, second)
+        self.assertEqual(self.jobs.run_pending(), 1)
+        self.assertEqual(self.jobs.get_by_key("key").status, DONE)
+        self.assertEqual(add_tag_mock.call_count, 1)
+
+    @patch('cloudinary.queue.retry_delay', return_value=0)
+    @patch('cloudinary.uploader.destroy')
+    def test_retry(self, destroy_mock, _):
+        """should retry temporary errors until the attempts are exhausted"""
+        failed = []
+        self.jobs.on_error = failed.append
+        destroy_mock.side_effect = [api.GeneralError("unavailable"), {"result": "ok"}]
+        job_id = self.jobs.enqueue("destroy", "sample")
+        self.assertEqual(self.jobs.run_pending(), 2)
+        self.assertEqual((self.jobs.get(job_id).status, self.jobs.get(job_id).attempts), (DONE, 2))
+
+        destroy_mock.side_effect = api.RateLimited("slow down")
+        job_id = self.jobs.enqueue("destroy", "sample")
+        self.assertEqual(self.jobs.run_pending(), 3)
+        job = self.jobs.get(job_id)
+        self.assertEqual((job.status, job.attempts, job.error), (FAILED, 3, "RateLimited: slow down"))
+        self.assertEqual([j.id for j in failed], [job_id])
+
+        destroy_mock.side_effect = None
+        self.assertTrue(self.jobs.retry(job_id))
+        self.assertEqual(self.jobs.run_pending(), 1)
+        self.assertEqual(self.jobs.get(job_id).status, DONE)
+
+    @patch('cloudinary.queue.retry_delay', return_value=0)
+    def test_error_responses(self, _):
+        """should fail on the first permanent error of the server, and retry server errors"""
+        with Emulator(**OPTIONS) as emulator:
+            with cloudinary.using(upload_prefix=emulator.url, cloud_name="queued", api_key="a", api_secret="wrong"):
+                job_id = self.jobs.enqueue("upload", GIF, public_id="sample")
+                self.assertEqual(self.jobs.run_pending(), 1)
+            job = self.jobs.get(job_id)
+            self.assertEqual((job.status, job.attempts), (FAILED, 1))
+            self.assertTrue(job.error.startswith("AuthorizationRequired: Invalid Signature"), job.error)
+
+            emulator.error_rate = 1.0
+            with cloudinary.using(upload_prefix=emulator.url, **OPTIONS):
+                job_id = self.jobs.enqueue("upload", GIF, public_id="sample")
+                self.assertEqual(self.jobs.run_pending(), 3)
+            job = self.jobs.get(job_id)
+            self.assertEqual((job.status, job.attempts, job.error), (FAILED, 3, "GeneralError: Injected error"))
+
+    def test_delay(self):
+        job_id = self.jobs.enqueue("destroy", "sample", delay=60)
+        self.assertEqual(self.jobs.run_pending(), 0)
+        self.assertEqual(self.jobs.get(job_id).status, PENDING)
+
+    @patch('cloudinary.uploader.rename')
+    def test_crash_recovery(self, rename_mock):
+        """should run jobs abandoned by a crashed process again once their lease expires"""
+        crashed = JobQueue(self.path, lease=0.05)
+        job_id = crashed.enqueue("rename", "a", "b")
+        self.assertIsNotNone(crashed._claim())
+        crashed.close()
+        self.assertEqual(self.jobs.get(job_id).status, RUNNING)
+        self.assertEqual(self.jobs.run_pending(), 0)
+
+        time.sleep(0.1)
+        self.assertEqual(self.jobs.run_pending(), 1)
+        rename_mock.assert_called_once_with("a", "b")
+        self.assertEqual((self.jobs.get(job_id).status, self.jobs.get(job_id).attempts), (DONE, 2))
+
+    @patch('cloudinary.uploader.rename')
+    def test_expired_lease(self, rename_mock):
+        """should not record the outcome of a job whose lease expired, and fail it once it used up its attempts"""
+        completed, failed = [], []
+        jobs = JobQueue(self.path, on_complete=completed.append, on_error=failed.append, max_attempts=2, lease=0.05)
+        self.addCleanup(jobs.close)
+        job_id = jobs.enqueue("rename", "a", "b")
+        slow = jobs._claim()
+        time.sleep(0.1)
+        self.assertEqual(jobs.run_pending(), 1)
+        self.assertEqual(jobs.get(job_id).status, DONE)
+
+        jobs._done(slow, {"public_id": "b"})
+        jobs._failed(slow, api.GeneralError("late"))
+        self.assertEqual((len(completed), failed), (1, []))
+        self.assertIsNone(jobs.get(job_id).error)
+
+        job_id = jobs.enqueue("rename", "c", "d")
+        self.assertIsNotNone(jobs._claim())
+        time.sleep(0.1)
+        self.assertIsNotNone(jobs._claim())
+        time.sleep(0.1)
+        self.assertEqual(jobs.run_pending(), 0)
+        self.assertEqual(jobs.get(job_id).status, FAILED)
+        self.assertEqual([job.id for job in failed], [job_id])
+        self.assertEqual(rename_mock.call_count, 1)
+
+    def test_workers(self):
+        with Emulator(**OPTIONS) as emulator:
+            with cloudinary.using(upload_prefix=emulator.url, **OPTIONS):
+                self.jobs.start(workers=3)
+            job_ids = [self.jobs.enqueue("upload", GIF, public_id="queued_{0}".format(i)) for i in range(10)]
+            self.jobs.enqueue("add_tag", "tagged", ["queued_0", "queued_1"])
+            self.assertTrue(self.jobs.join(timeout=10))
+            self.jobs.stop()
+            self.assertEqual(self.jobs.counts(), {DONE: 11})
+            self.assertEqual(self.jobs.get(job_ids[0]).result["public_id"], "queued_0")
+            self.assertEqual(len(emulator.resources), 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+
+import cloudinary
+from cloudinary import api, retry, uploader
+from cloudinary.emulator import Emulator
+
+OPTIONS = dict(cloud_name="retried", api_key="a", api_secret="b")
+GIF = "data:image/gif;base64,R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7"
+
+
+class RetryTest(unittest.TestCase):
+    def test_backoff(self):
+        self.assertTrue(0.5 <= retry.retry_delay(1) <= 1.0)
+        self.assertTrue(4.0 <= retry.retry_delay(4) <= 8.0)
+        self.assertLessEqual(retry.retry_delay(100), retry.MAX_RETRY_DELAY)
+        self.assertLessEqual(retry.retry_delay(3, base=0.1, maximum=0.2), 0.2)
+
+    def test_upload_api_errors(self):
+        """should classify the errors of the upload API by their HTTP status"""
+        with Emulator(**OPTIONS) as emulator:
+            with cloudinary.using(upload_prefix=emulator.url, **OPTIONS):
+                uploader.upload(GIF, public_id="first")
+                uploader.upload(GIF, public_id="second")
+                errors = []
+                for call in (lambda: uploader.upload(GIF, api_secret="wrong"),
+                             lambda: uploader.rename("first", "second"),
+                             lambda: uploader.upload(GIF, upload_preset="missing")):
+                    with self.assertRaises(api.Error) as context:
+                        call()
+                    errors.append(context.exception)
+                emulator.error_rate = 1.0
+                with self.assertRaises(api.GeneralError) as context:
+                    uploader.upload(GIF)
+                errors.append(context.exception)
+
+        self.assertEqual([type(error) for error in errors],
+                         [api.AuthorizationRequired, api.BadRequest, api.BadRequest, api.GeneralError])
+        self.assertEqual([retry.is_retryable(error) for error in errors], [False, False, False, True])
+
+    def test_network_errors(self):
+        with Emulator(**OPTIONS) as emulator:
+            url = emulator.url
+        with self.assertRaises(api.Error) as context:
+            uploader.upload(GIF, upload_prefix=url, **OPTIONS)
+        self.assertTrue(retry.is_retryable(context.exception))
+        self.assertTrue(retry.is_retryable(api.RateLimited("slow down")))
+        self.assertFalse(retry.is_retryable(ValueError("invalid")))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,14 +1,17 @@
+import json
 import os
 import time
 import unittest
 
+from mock import patch
 from six import iterkeys
 from urllib3 import disable_warnings
 
 import cloudinary
 from cloudinary import api, logger, uploader
-from cloudinary.search import Search
-from test.helper_test import SUFFIX, TEST_IMAGE, TEST_TAG, UNIQUE_TAG
+from cloudinary.cache import TTLCache
+from cloudinary.search import Search, FrozenSearch, clear_result_cache
+from test.helper_test import SUFFIX, TEST_IMAGE, TEST_TAG, UNIQUE_TAG, http_response_mock
 
 TEST_TAG = 'search_{}'.format(TEST_TAG)
 UNIQUE_TAG = 'search_{}'.format(UNIQUE_TAG)
@@ -171,5 +174,154 @@ class SearchTest(unittest.TestCase):
             self.assertEqual(len(res['tags']), 2)
 
 
+def search_response_mock(public_ids, next_cursor=None):
+    body = {"total_count": 5, "resources": [{"public_id": public_id} for public_id in public_ids]}
+    if next_cursor:
+        body["next_cursor"] = next_cursor
+    return http_response_mock(json.dumps(body), {"x-featureratelimit-limit": '0',
+                                                 "x-featureratelimit-reset": 'Sat, 01 Apr 2017 22:00:00 GMT',
+                                                 "x-featureratelimit-remaining": '0'})
+
+
+class SearchIterateTest(unittest.TestCase):
+    PAGES = [(["a", "b"], "cursor1"), (["c", "d"], "cursor2"), (["e"], None)]
+
+    def setUp(self):
+        cloudinary.config(cloud_name="test123", api_key="a", api_secret="b")
+
+    def _mock_pages(self, mocker):
+        mocker.side_effect = [search_response_mock(ids, cursor) for ids, cursor in self.PAGES]
+
+    @staticmethod
+    def _sent_query(call):
+        return json.loads(call[1]["body"].decode("utf-8"))
+
+    @patch('urllib3.request.RequestMethods.request')
+    def test_iterate_all_pages(self, mocker):
+        """should yield the resources of all pages"""
+        for prefetch in (True, False):
+            self._mock_pages(mocker)
+            mocker.reset_mock()
+            iterator = Search().expression("format:jpg").iterate(page_size=2, prefetch=prefetch)
+            self.assertEqual([r["public_id"] for r in iterator], ["a", "b", "c", "d", "e"])
+            self.assertEqual(mocker.call_count, 3)
+            queries = [self._sent_query(call) for call in mocker.call_args_list]
+            self.assertEqual([query.get("next_cursor") for query in queries], [None, "cursor1", "cursor2"])
+            self.assertEqual(queries[0], {"expression": "format:jpg", "max_results": 2})
+            self.assertTrue(iterator.exhausted)
+            self.assertIsNone(iterator.next_cursor)
+
+    @patch('urllib3.request.RequestMethods.request')
+    def test_prefetch_in_scope(self, mocker):
+        """should fetch the next pages with the configuration of the scope the iteration runs in"""
+        self._mock_pages(mocker)
+        with cloudinary.using(cloud_name="tenant", api_key="c", api_secret="d"):
+            iterator = Search().iterate(page_size=2, prefetch=True)
+            self.assertEqual(len(list(iterator)), 5)
+        urls = [call[0][1] for call in mocker.call_args_list]
+        self.assertEqual(len(urls), 3)
+        self.assertEqual([url for url in urls if "/tenant/" not in url], [])
+        self.assertEqual(set(call[0][3]["authorization"] for call in mocker.call_args_list),
+                         {"Basic Yzpk"})
+
+    @patch('urllib3.request.RequestMethods.request')
+    def test_resume(self, mocker):
+        """should expose the cursor of the first page that was not fully consumed"""
+        self._mock_pages(mocker)
+        iterator = Search().iterate(page_size=2, prefetch=False)
+        pages = iterator.pages()
+        next(pages)
+        self.assertIsNone(iterator.next_cursor)
+        next(pages)
+        self.assertEqual(iterator.next_cursor, "cursor1")
+        self.assertFalse(iterator.exhausted)
+
+        mocker.reset_mock()
+        mocker.side_effect = [search_response_mock(*self.PAGES[2])]
+        resumed = Search().next_cursor("cursor2").iterate(page_size=2)
+        self.assertEqual([r["public_id"] for r in resumed], ["e"])
+        self.assertEqual(self._sent_query(mocker.call_args)["next_cursor"], "cursor2")
+
+
+class SearchCacheTest(unittest.TestCase):
+    def setUp(self):
+        cloudinary.config(cloud_name="test123", api_key="a", api_secret="b", search_cache_ttl=None)
+        clear_result_cache()
+
+    def tearDown(self):
+        cloudinary.config(search_cache_ttl=None)
+
+    def test_canonical_key(self):
+        """should serialize equivalent queries the same way"""
+        first = Search().aggregate("format").aggregate("type").expression("tags=shoe").max_results("10")
+        second = Search().max_results(10).expression("tags=shoe").aggregate("type").aggregate("format")
+        self.assertEqual(first.canonical_key(), second.canonical_key())
+
+        ordered = Search().sort_by("created_at").sort_by("public_id")
+        reversed_order = Search().sort_by("public_id").sort_by("created_at")
+        self.assertNotEqual(ordered.canonical_key(), reversed_order.canonical_key())
+
+    def test_canonical_key_of_aggregate_objects(self):
+        """should serialize aggregate objects, which can not be compared to each other or to strings"""
+        ranges = {"type": "bytes", "ranges": [{"key": "small", "to": 1000}]}
+        first = Search().aggregate(ranges).aggregate("format").aggregate({"type": "format"})
+        second = Search().aggregate({"type": "format"}).aggregate("format").aggregate(
+            {"ranges": [{"to": 1000, "key": "small"}], "type": "bytes"})
+        self.assertEqual(first.canonical_key(), second.canonical_key())
+        self.assertEqual(len(json.loads(first.canonical_key())["aggregate"]), 3)
+
+    def test_canonical_key_is_updated_on_change(self):
+        search = Search().expression("tags=shoe")
+        key = search.canonical_key()
+        search.with_field("tags")
+        self.assertNotEqual(search.canonical_key(), key)
+
+    def test_frozen_search(self):
+        """should be immutable and hashable"""
+        frozen = Search().expression("tags=shoe").freeze()
+        changed = frozen.max_results(10)
+
+        self.assertIsInstance(changed, FrozenSearch)
+        self.assertEqual(frozen.as_dict(), {"expression": "tags=shoe"})
+        self.assertEqual(changed.as_dict(), {"expression": "tags=shoe", "max_results": 10})
+        self.assertEqual(frozen, Search().expression("tags=shoe").freeze())
+        self.assertEqual(len({frozen, Search().expression("tags=shoe").freeze(), changed}), 2)
+        self.assertEqual(frozen.aggregate("format").as_dict()["aggregate"], ["format"])
+        self.assertNotIn("aggregate", frozen.as_dict())
+
+    @patch('urllib3.request.RequestMethods.request')
+    def test_no_cache_by_default(self, mocker):
+        mocker.side_effect = lambda *args, **kwargs: search_response_mock(["a"])
+        Search().expression("tags=shoe").execute()
+        Search().expression("tags=shoe").execute()
+        self.assertEqual(mocker.call_count, 2)
+
+    @patch('urllib3.request.RequestMethods.request')
+    def test_cached_execute(self, mocker):
+        """should serve identical queries from the cache when search_cache_ttl is set"""
+        mocker.side_effect = lambda *args, **kwargs: search_response_mock(["a"])
+        cloudinary.config(search_cache_ttl=60)
+
+        first = Search().expression("tags=shoe").aggregate("format").aggregate("type").execute()
+        second = Search().aggregate("type").aggregate("format").expression("tags=shoe").execute()
+        self.assertIs(first, second)
+        self.assertEqual(mocker.call_count, 1)
+
+        Search().expression("tags=shoe").execute(cache=False)
+        Search().expression("tags=shoe").execute(cloud_name="other")
+        self.assertEqual(mocker.call_count, 3)
+
+    @patch('urllib3.request.RequestMethods.request')
+    def test_explicit_cache(self, mocker):
+        mocker.side_effect = lambda *args, **kwargs: search_response_mock(["a"])
+        cache = TTLCache(max_size=10, ttl=60)
+        frozen = Search().expression("tags=shoe").freeze()
+        frozen.execute(cache=cache)
+        frozen.execute(cache=cache)
+
+        self.assertEqual(mocker.call_count, 1)
+        self.assertEqual(cache.stats(), {"hits": 1, "misses": 1, "size": 1})
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,144 @@
+import io
+import json
+import unittest
+
+import six
+from mock import patch
+
+import cloudinary
+from cloudinary import utils
+from cloudinary.signing import SignatureApp, SignatureError, SignatureIssuer
+
+
+class SignatureIssuerTest(unittest.TestCase):
+    def setUp(self):
+        cloudinary.config(cloud_name="test123", api_key="a", api_secret="b")
+        self.issuer = SignatureIssuer(allowed_options=("public_id", "tags"), fixed_options={"folder": "uploads"},
+                                      window=60)
+
+    @patch('time.time')
+    def test_sign(self, time_mock):
+        """should sign the allowed options with a rounded timestamp"""
+        time_mock.return_value = 1500000010
+        params = self.issuer.sign({"public_id": "avatar", "tags": ["a", "b"]})
+        self.assertEqual(params["timestamp"], "1500000000")
+        self.assertEqual(params["folder"], "uploads")
+        self.assertEqual(params["api_key"], "a")
+        expected = utils.build_upload_params(public_id="avatar", tags=["a", "b"], folder="uploads")
+        expected["timestamp"] = "1500000000"
+        self.assertEqual(params["signature"], utils.sign_request(expected, {})["signature"])
+
+        time_mock.return_value = 1500000020
+        self.assertEqual(self.issuer.sign({"tags": ["a", "b"], "public_id": "avatar"}), params)
+        self.assertEqual(self.issuer.stats()["hits"], 1)
+
+    def test_default_allowed_options(self):
+        issuer = SignatureIssuer()
+        self.assertIn("signature", issuer.sign({"tags": ["a"], "context": {"alt": "b"}}))
+        for option in ("public_id", "folder", "upload_preset", "eager", "transformation"):
+            with self.assertRaises(SignatureError):
+                issuer.sign({option: "x"})
+
+    def test_disallowed_options(self):
+        with six.assertRaisesRegex(self, SignatureError, "notification_url"):
+            self.issuer.sign({"public_id": "avatar", "notification_url": "http://example.com"})
+        with self.assertRaises(SignatureError):
+            self.issuer.sign(["public_id"])
+
+    def test_sign_batch(self):
+        results = self.issuer.sign_batch([{"public_id": "a"}, {"type": "private"}, {}])
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0]["public_id"], "a")
+        self.assertIn("error", results[1])
+        self.assertIn("signature", results[2])
+        with self.assertRaises(SignatureError):
+            self.issuer.sign_batch([{}] * 101)
+
+    @patch('time.time')
+    def test_pregenerate(self, time_mock):
+        """should sign recently requested options for the next window ahead of time"""
+        issuer = SignatureIssuer(window=60)
+        issuer._pregenerator = True  # remember requests without starting the thread
+        time_mock.return_value = 1500000010
+        issuer.sign({"tags": ["avatar"]})
+        issuer.pregenerate(1500000060)
+
+        time_mock.return_value = 1500000070
+        params = issuer.sign({"tags": ["avatar"]})
+        self.assertEqual(params["timestamp"], "1500000060")
+        self.assertEqual(issuer.stats()["hits"], 1)
+
+    @patch('time.time')
+    def test_accounts(self, time_mock):
+        """should not share signatures between the accounts of different scopes"""
+        time_mock.return_value = 1500000010
+        issuer = SignatureIssuer(window=60)
+        issuer._pregenerator = True  # remember requests without starting the thread
+        with cloudinary.using(api_key="k1", api_secret="s1"):
+            first = issuer.sign({"tags": ["avatar"]})
+        with cloudinary.using(api_key="k2", api_secret="s2"):
+            second = issuer.sign({"tags": ["avatar"]})
+        self.assertEqual(first["api_key"], "k1")
+        self.assertEqual(second["api_key"], "k2")
+        self.assertNotEqual(first["signature"], second["signature"])
+        self.assertEqual(issuer.stats()["hits"], 0)
+
+        issuer.pregenerate(1500000060)
+        time_mock.return_value = 1500000070
+        with cloudinary.using(api_key="k1", api_secret="s1"):
+            first = issuer.sign({"tags": ["avatar"]})
+        self.assertEqual(first["api_key"], "k1")
+        expected = utils.build_upload_params(tags=["avatar"])
+        expected["timestamp"] = "1500000060"
+        signed = utils.sign_request(expected, {"api_key": "k1", "api_secret": "s1"})
+        self.assertEqual(first["signature"], signed["signature"])
+        self.assertEqual(issuer.stats()["hits"], 1)
+
+    def test_pregenerate_thread(self):
+        issuer = SignatureIssuer(window=60, pregenerate=True)
+        issuer.sign({})
+        issuer.close()
+        self.assertIsNone(issuer._pregenerator)
+
+    def test_wsgi_app(self):
+        authorized = []
+
+        def authorize(environ, params):
+            authorized.append(params)
+            return environ.get("REMOTE_USER") == "user"
+
+        app = SignatureApp(authorize, self.issuer)
+
+        def call(method, body, user="user"):
+            response = {}
+
+            def start_response(status, headers):
+                response["status"] = status
+            environ = {"REQUEST_METHOD": method, "CONTENT_LENGTH": str(len(body)), "wsgi.input": io.BytesIO(body),
+                       "REMOTE_USER": user}
+            response_body = b"".join(app(environ, start_response))
+            return response["status"], response_body
+
+        status, body = call("POST", json.dumps([{"public_id": "a"}, {"public_id": "b"}]).encode("utf-8"))
+        self.assertEqual(status, "200 OK")
+        self.assertEqual([p["public_id"] for p in json.loads(body.decode("utf-8"))], ["a", "b"])
+
+        status, body = call("POST", b'{"type": "private"}')
+        self.assertEqual(status, "400 Bad Request")
+        self.assertIn("type", json.loads(body.decode("utf-8"))["error"]["message"])
+
+        status, _ = call("POST", b'not json')
+        self.assertEqual(status, "400 Bad Request")
+        status, _ = call("GET", b'')
+        self.assertEqual(status, "405 Method Not Allowed")
+
+        status, body = call("POST", b'{"public_id": "a"}', user=None)
+        self.assertEqual(status, "403 Forbidden")
+        self.assertNotIn("signature", body.decode("utf-8"))
+        self.assertEqual(authorized[-1], {"public_id": "a"})
+        with self.assertRaises(TypeError):
+            SignatureApp(self.issuer)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import multiprocessing
+import os
+import threading
+import unittest
+
+import cloudinary
+from cloudinary import api, uploader, utils
+from cloudinary.emulator import Emulator
+from test import benchmark_threads
+
+THREADS = 8
+ITERATIONS = 200
+OPTIONS = dict(cloud_name="threads", api_key="a", api_secret="b")
+GIF = "data:image/gif;base64,R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7"
+
+
+def run_threads(target, threads=THREADS):
+    """
+    Call ``target(index)`` from ``threads`` threads released at the same time.
+
+    :return: the results of the calls, and the exceptions they raised
+    """
+    start = threading.Event()
+    results = [None] * threads
+    errors = []
+
+    def work(index):
+        start.wait()
+        try:
+            results[index] = target(index)
+        except Exception as e:
+            errors.append(e)
+
+    workers = [threading.Thread(target=work, args=(index,)) for index in range(threads)]
+    for worker in workers:
+        worker.start()
+    start.set()
+    for worker in workers:
+        worker.join()
+    return results, errors
+
+
+class ThreadSafetyTest(unittest.TestCase):
+    def setUp(self):
+        cloudinary.reset_config()
+        cloudinary.config(**OPTIONS)
+
+    def tearDown(self):
+        cloudinary.reset_config()
+
+    def test_config_created_once(self):
+        cloudinary.reset_config()
+        results, errors = run_threads(lambda index: cloudinary.config())
+        self.assertEqual(errors, [])
+        self.assertEqual(len(set(id(result) for result in results)), 1)
+
+    def test_urls_with_concurrent_config_updates(self):
+        """should generate the same URLs while other threads update unrelated parameters"""
+        expected = utils.cloudinary_url("sample.jpg", width=100, crop="fill", sign_url=True)[0]
+
+        def generate(index):
+            if index == 0:
+                for i in range(ITERATIONS):
+                    cloudinary.config(unrelated=i, responsive_width=False)
+                return None
+            return set(utils.cloudinary_url("sample.jpg", width=100, crop="fill", sign_url=True)[0]
+                       for _ in range(ITERATIONS))
+
+        results, errors = run_threads(generate)
+        self.assertEqual(errors, [])
+        self.assertEqual([result for result in results[1:] if result != {expected}], [])
+
+    def test_scopes(self):
+        """should keep the configuration of each thread's scope while the global configuration changes"""
+        def generate(index):
+            urls = set()
+            with cloudinary.using(cloud_name="cloud{0}".format(index)):
+                for i in range(ITERATIONS):
+                    urls.add(utils.cloudinary_url("sample.jpg")[0])
+                    cloudinary.config(secure=bool(i % 2))
+            return urls
+
+        results, errors = run_threads(generate)
+        self.assertEqual(errors, [])
+        for index, urls in enumerate(results):
+            self.assertEqual(urls, set(scheme + "://res.cloudinary.com/cloud{0}/image/upload/sample.jpg".format(index)
+                                       for scheme in ("http", "https")))
+        self.assertIsNone(cloudinary.config().secure)
+
+    def test_shared_pools(self):
+        for module in (api, uploader):
+            module._http = None
+            results, errors = run_threads(lambda index: module._get_http())
+            self.assertEqual(errors, [])
+            self.assertEqual(len(set(id(result) for result in results)), 1)
+
+    def test_concurrent_uploads(self):
+        with Emulator(**OPTIONS) as emulator:
+            def upload(index):
+                return [uploader.upload(GIF, public_id="thread_{0}_{1}".format(index, i),
+                                        upload_prefix=emulator.url)["public_id"] for i in range(5)]
+
+            results, errors = run_threads(upload)
+            self.assertEqual(errors, [])
+            self.assertEqual(len(set(sum(results, []))), THREADS * 5)
+            self.assertEqual(len(api.resources(max_results=100, upload_prefix=emulator.url)["resources"]),
+                             THREADS * 5)
+
+
+@unittest.skipUnless(os.environ.get("CLOUDINARY_BENCHMARK"), "set CLOUDINARY_BENCHMARK=1 to run benchmarks")
+@unittest.skipIf(benchmark_threads.gil_enabled(), "requires a free-threaded Python build running without the GIL")
+@unittest.skipIf(multiprocessing.cpu_count() < 4, "requires at least 4 CPUs")
+class ScalingTest(unittest.TestCase):
+    def test_url_generation_scales(self):
+        """should generate URLs at least 3 times faster from 4 threads than from 1 thread"""
+        results = benchmark_threads.run([1, 4])
+        self.assertGreaterEqual(results[-1][2], 3.0, results)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
+import json
 import re
 import unittest
 from collections import OrderedDict
@@ -820,6 +821,44 @@ class TestUtils(unittest.TestCase):
         self.assertFalse(cloudinary.utils.is_remote_url(TEST_IMAGE))
         self.assertTrue(cloudinary.utils.is_remote_url(REMOTE_TEST_IMAGE))
 
+    @patch('time.time')
+    def test_signed_upload_params(self, time_mock):
+        """should reuse signed upload parameters within the freshness window"""
+        cloudinary.utils.clear_upload_params_cache()
+        options = {"tags": ["a", "b"], "eager": [{"width": 100}], "context": {"k": "v"}}
+        time_mock.return_value = 1500000010
+        params = cloudinary.utils.signed_upload_params(**options)
+        self.assertEqual(params["timestamp"], "1500000000")
+        self.assertEqual(params["signature"], cloudinary.utils.sign_request(
+            dict(cloudinary.utils.build_upload_params(**options), timestamp="1500000000"), {})["signature"])
+
+        time_mock.return_value = 1500000030
+        params["tags"] = "modified"
+        self.assertEqual(cloudinary.utils.signed_upload_params(**options)["tags"], "a,b")
+        self.assertEqual(cloudinary.utils.signed_upload_params(**options)["timestamp"], "1500000000")
+        self.assertEqual(cloudinary.utils.signed_upload_form_data(**options),
+                         json.dumps(cloudinary.utils.signed_upload_params(**options)))
+        self.assertEqual(cloudinary.utils._upload_params_cache.stats()["misses"], 1)
+
+        time_mock.return_value = 1500000070
+        self.assertEqual(cloudinary.utils.signed_upload_params(**options)["timestamp"], "1500000060")
+
+        unsigned = cloudinary.utils.signed_upload_params(unsigned=True, upload_preset="preset")
+        self.assertNotIn("signature", unsigned)
+        self.assertEqual(unsigned["upload_preset"], "preset")
+
+    @patch('time.time')
+    def test_signed_upload_params_cache_ttl(self, time_mock):
+        time_mock.return_value = 1500000010
+        try:
+            cloudinary.config(upload_params_cache_ttl=0)
+            self.assertEqual(cloudinary.utils.signed_upload_params()["timestamp"], "1500000010")
+            cloudinary.config(upload_params_cache_ttl=3600)
+            with self.assertRaises(ValueError):
+                cloudinary.utils.signed_upload_params()
+        finally:
+            cloudinary.config(upload_params_cache_ttl=None)
+
 
 if __name__ == '__main__':
     unittest.main()